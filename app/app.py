@@ -12,23 +12,30 @@ from routes.employes import employes_bp
 from routes.stats import stats_bp
 from routes.etl import etl_bp
 from routes.sources import sources_bp
+from routes.debug import debug_bp
+from services.metrics_service import init_metrics
+from services.json_response import FastJSONProvider
 
 def create_app():
     """Factory pour créer l'application Flask"""
     app = Flask(__name__)
     
     # Configuration
-    app.config['JSON_AS_ASCII'] = False  # Support des caractères UTF-8
-    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+    # JSON compact et UTF-8 (orjson si installé) : Decimal en nombre, dates ISO 8601, Employe
+    app.json = FastJSONProvider(app)
     
     # CORS
     CORS(app)
     
+    # Métriques Prometheus (/metrics)
+    init_metrics(app)
+    
     # Enregistrement des blueprints
     app.register_blueprint(employes_bp, url_prefix='/api')
     app.register_blueprint(stats_bp, url_prefix='/api')
     app.register_blueprint(etl_bp, url_prefix='/api')
     app.register_blueprint(sources_bp, url_prefix='/api')
+    app.register_blueprint(debug_bp, url_prefix='/api')
     
     # Route racine
     @app.route('/')
@@ -55,7 +62,8 @@ def create_app():
             'version': '1.0.0',
             'endpoints': {
                 'employes': {
-                    'GET /api/employes': 'Liste tous les employés (filtres: source, departement, limit, offset)',
+                    'GET /api/employes': 'Liste tous les employés (filtres: source, departement, limit, offset ; total=true : total filtré exact ou estimé ; fast=true : JSON construit par PostgreSQL ; archived=include|only : employés archivés ; as_of=AAAA-MM-JJ[THH:MM:SS] : état à cet instant)',
+                    'GET /api/employes/search': 'Recherche approximative sans accents (q, statut, limit, offset), classée par pertinence',
                     'GET /api/employes/<id>': 'Détails d\'un employé'
                 },
                 'stats': {
@@ -65,12 +73,20 @@ def create_app():
                 },
                 'etl': {
                     'POST /api/etl/trigger': 'Déclenche le DAG ETL',
+                    'POST /api/etl/sync': 'Synchronisation ciblée d\'emails sans DAG (body: emails) ; aussi ?sync=true sur les écritures /api/sources',
                     'GET /api/etl/status': 'Statut du DAG',
                     'GET /api/etl/history': 'Historique des exécutions',
-                    'GET /api/etl/last-sync': 'Info dernière synchronisation'
+                    'GET /api/etl/last-sync': 'Info dernière synchronisation',
+                    'GET /api/etl/performance': 'Durées, volumes et débits par tâche ETL (param: runs)'
+                },
+                'debug (DEBUG_ENDPOINTS=true)': {
+                    'GET /api/debug/slow-queries': 'Requêtes SQL lentes (top-N) avec plans EXPLAIN',
+                    'DELETE /api/debug/slow-queries': 'Réinitialise le journal des requêtes lentes',
+                    'GET /api/debug/replicas': 'État des réplicas de lecture de la base cible'
                 },
                 'health': {
-                    'GET /health': 'Santé de l\'application'
+                    'GET /health': 'Santé de l\'application',
+                    'GET /metrics': 'Métriques Prometheus (latences HTTP, requêtes SQL, connexions)'
                 }
             }
         }), 200
@@ -0,0 +1,230 @@
+"""Point d'entrée ASGI (mode asynchrone de l'API)
+
+Les routes de lecture du tableau de bord sont servies par une application Quart
+sur des pools asyncio (services/async_db_service.py) : une requête en attente de
+la base n'occupe plus de thread. Toutes les autres routes (écritures, ETL, CSV,
+/metrics, pages) sont transmises à l'application Flask, exécutée dans un pool de
+threads : même API, mêmes réponses JSON.
+
+Lancement :
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+(docker compose : APP_SERVER=asgi ; un worker par défaut, ASGI_WORKERS pour en lancer plusieurs :
+replica_router, count_cache et single_flight restent alors propres à chaque processus)
+"""
+import asyncio
+import os
+import time
+
+from a2wsgi import WSGIMiddleware
+from quart import Quart, Blueprint, Response, g, request
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+
+from app import create_app
+from routes.employes import SEARCH_MIN_LENGTH, SEARCH_MAX_LIMIT
+from services.async_db_service import AsyncDatabaseService
+from services.db_service import DatabaseService
+from services.employe_filters import EmployeFilters, FilterError
+from services.json_response import dumps_bytes, raw_json_body, wants_fast
+from services.metrics_service import REQUEST_LATENCY, REQUESTS_IN_PROGRESS
+from services.single_flight import AsyncSingleFlight, request_key
+
+async_db = AsyncDatabaseService()
+db_service = DatabaseService()
+single_flight = AsyncSingleFlight()
+
+
+async def coalesced(fn):
+    """Calcul partagé par les requêtes identiques concurrentes (services/single_flight.py)"""
+    return await single_flight.do(request_key(request.path, request.args), fn)
+
+
+def json_response(payload, status=200):
+    """Réponse JSON compacte (même sérialisation que l'application Flask)"""
+    return Response(dumps_bytes(payload), status=status, mimetype='application/json')
+
+
+def error_response(e, status=500):
+    return json_response({'success': False, 'message': str(e)}, status)
+
+
+# ==================== EMPLOYÉS ====================
+
+employes_bp = Blueprint('employes', __name__)
+
+@employes_bp.route('/employes', methods=['GET'])
+async def get_employes():
+    """Liste des employés (mêmes filtres, tri, total et chemin rapide que la route Flask)"""
+    try:
+        try:
+            filters = EmployeFilters.from_args(request.args)
+        except FilterError as e:
+            return error_response(e, 400)
+
+        limit = int(request.args.get('limit', 200))
+        offset = int(request.args.get('offset', 0))
+
+        totals = {}
+        if request.args.get('total', 'false').lower() in ('1', 'true', 'yes', 'oui'):
+            # Comptage exact ou estimé du service synchrone (cache partagé), hors boucle d'événements
+            totals = await asyncio.to_thread(db_service.count_employes, filters)
+
+        envelope = {'success': True}
+        if wants_fast(request.args):
+            page = await async_db.get_all_employes_json(filters, limit, offset)
+            envelope.update(count=page['count'], **totals, filters=filters.to_dict())
+            return Response(raw_json_body(envelope, page['data']), mimetype='application/json')
+
+        employes = await async_db.get_all_employes(filters, limit, offset)
+        envelope.update(count=len(employes), **totals, filters=filters.to_dict(), data=employes)
+        return json_response(envelope)
+
+    except Exception as e:
+        return error_response(e)
+
+
+@employes_bp.route('/employes/search', methods=['GET'])
+async def search_employes():
+    """Recherche approximative des employés, classée par pertinence"""
+    try:
+        q = (request.args.get('q') or '').strip()
+        if len(q) < SEARCH_MIN_LENGTH:
+            return error_response(f"Paramètre 'q' requis ({SEARCH_MIN_LENGTH} caractères minimum)", 400)
+
+        statut = (request.args.get('statut') or '').lower() or None
+        if statut and statut not in ('actif', 'inactif'):
+            return error_response(f"Valeur du paramètre 'Statut' invalide : {statut}. "
+                                  f"Voici les valeurs autorisées : ['actif', 'inactif']", 400)
+
+        limit = min(int(request.args.get('limit', 20)), SEARCH_MAX_LIMIT)
+        offset = int(request.args.get('offset', 0))
+
+        employes = await async_db.search_employes(q, statut, limit, offset)
+        return json_response({
+            'success': True,
+            'query': q,
+            'count': len(employes),
+            'limit': limit,
+            'offset': offset,
+            'data': employes
+        })
+
+    except Exception as e:
+        return error_response(e)
+
+
+# ==================== STATISTIQUES ====================
+
+stats_bp = Blueprint('stats', __name__)
+
+@stats_bp.route('/stats', methods=['GET'])
+async def get_stats_global():
+    try:
+        return json_response({'success': True, 'data': dict(await coalesced(async_db.get_stats_global))})
+    except Exception as e:
+        return error_response(e)
+
+
+@stats_bp.route('/stats/sources', methods=['GET'])
+async def get_stats_sources():
+    try:
+        return json_response({'success': True, 'data': [dict(s) for s in await coalesced(async_db.get_stats_by_source)]})
+    except Exception as e:
+        return error_response(e)
+
+
+@stats_bp.route('/stats/departements', methods=['GET'])
+async def get_stats_departements():
+    try:
+        return json_response({'success': True,
+                              'data': [dict(s) for s in await coalesced(async_db.get_stats_by_departement)]})
+    except Exception as e:
+        return error_response(e)
+
+
+# ==================== ETL / SOURCES ====================
+
+etl_bp = Blueprint('etl', __name__)
+
+@etl_bp.route('/etl/last-sync', methods=['GET'])
+async def get_last_sync():
+    try:
+        return json_response({'success': True, 'data': dict(await async_db.get_last_sync_info())})
+    except Exception as e:
+        return error_response(e)
+
+
+sources_bp = Blueprint('sources', __name__)
+
+@sources_bp.route('/sources/stats', methods=['GET'])
+async def get_sources_stats():
+    """Statistiques des bases sources : MySQL, PostgreSQL et CSV lus en parallèle"""
+    try:
+        counts = await coalesced(async_db.get_source_counts)
+        return json_response({
+            'success': True,
+            'data': {**counts, 'total_sources': sum(counts.values())}
+        })
+    except Exception as e:
+        return error_response(e)
+
+
+# ==================== APPLICATION ====================
+
+def create_async_app():
+    """Application Quart des routes asynchrones"""
+    app = Quart(__name__)
+
+    for bp in (employes_bp, stats_bp, etl_bp, sources_bp):
+        app.register_blueprint(bp, url_prefix='/api')
+
+    @app.before_serving
+    async def open_pools():
+        await async_db.start()
+
+    @app.after_serving
+    async def close_pools():
+        await async_db.close()
+
+    # Mêmes métriques HTTP que l'application Flask (services/metrics_service.py)
+    @app.before_request
+    async def start_timer():
+        route = request.url_rule.rule if request.url_rule else 'inconnue'
+        g.metrics_labels = (request.blueprint or 'app', route, request.method)
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(*g.metrics_labels).inc()
+
+    @app.after_request
+    async def record_request(response):
+        labels = g.pop('metrics_labels', None)
+        if labels is not None:
+            REQUEST_LATENCY.labels(*labels, str(response.status_code)).observe(
+                time.perf_counter() - g.pop('metrics_start'))
+            REQUESTS_IN_PROGRESS.labels(*labels).dec()
+        # Même politique que flask_cors.CORS(app) (toutes origines)
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    return app
+
+
+def create_application():
+    """Aiguillage ASGI : routes Quart si elles existent, sinon application Flask"""
+    async_app = create_async_app()
+    sync_app = WSGIMiddleware(create_app(), workers=int(os.getenv('ASGI_WSGI_THREADS', '10')))
+    routes = async_app.url_map.bind('localhost')
+
+    async def application(scope, receive, send):
+        if scope['type'] == 'http':
+            # Pré-vols CORS traités par flask_cors
+            if scope['method'] == 'OPTIONS':
+                return await sync_app(scope, receive, send)
+            try:
+                routes.match(scope['path'], method=scope['method'])
+            except (NotFound, MethodNotAllowed):
+                return await sync_app(scope, receive, send)
+        return await async_app(scope, receive, send)
+
+    return application
+
+
+application = create_application()
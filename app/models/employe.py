@@ -1,29 +1,105 @@
-"""Modèle de données pour les employés"""
-
-class Employe:
-    def __init__(self, id, source, source_id, nom, email, departement, salaire, date_embauche, created_at, updated_at):
-        self.id = id
-        self.source = source
-        self.source_id = source_id
-        self.nom = nom
-        self.email = email
-        self.departement = departement
-        self.salaire = float(salaire) if salaire else None
-        self.date_embauche = str(date_embauche) if date_embauche else None
-        self.created_at = str(created_at) if created_at else None
-        self.updated_at = str(updated_at) if updated_at else None
-    
+"""Modèle de données pour les employés
+
+Employe est adossé au tuple renvoyé par le driver : aucune copie de la ligne, et
+un seul dictionnaire {colonne: position} partagé par toutes les lignes d'une requête.
+Les curseurs EmployeCursor (psycopg2) et EmployeMySQLCursor (pymysql) construisent
+directement ces enregistrements ; la sérialisation JSON passe par to_dict()
+(services/json_response.py).
+"""
+from collections.abc import Mapping
+
+import psycopg2.extensions
+import pymysql.cursors
+
+
+class Employe(Mapping):
+    """Ligne d'employé (employes_unified ou table source), en lecture seule.
+
+    Mapping complet (in, itération sur les colonnes, items(), len()) : remplace les
+    dict et RealDictRow des curseurs sans changer le code appelant.
+    """
+
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index, values):
+        self._index = index    # {colonne: position}, partagé par les lignes d'une même requête
+        self._values = values  # tuple du driver
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({name: i for i, name in enumerate(data)}, tuple(data.values()))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._values[self._index[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self._values[self._index[name]]
+
+    def get(self, name, default=None):
+        position = self._index.get(name)
+        return default if position is None else self._values[position]
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def keys(self):
+        return self._index.keys()
+
+    def __repr__(self):
+        return f"Employe(id={self.get('id')!r}, email={self.get('email')!r})"
+
     def to_dict(self):
-        """Convertit l'employé en dictionnaire"""
-        return {
-            'id': self.id,
-            'source': self.source,
-            'source_id': self.source_id,
-            'nom': self.nom,
-            'email': self.email,
-            'departement': self.departement,
-            'salaire': self.salaire,
-            'date_embauche': self.date_embauche,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at
-        }
\ No newline at end of file
+        """Convertit l'employé en dictionnaire (colonnes dans l'ordre de la requête)"""
+        return dict(zip(self._index, self._values))
+
+
+def column_index(description):
+    return {column[0]: i for i, column in enumerate(description)}
+
+
+class EmployeCursor(psycopg2.extensions.cursor):
+    """Curseur psycopg2 dont les lignes sont des Employe (cursor_factory=EmployeCursor)"""
+
+    def execute(self, query, vars=None):
+        self._employe_index = None
+        return super().execute(query, vars)
+
+    def _row_index(self):
+        if self._employe_index is None:
+            self._employe_index = column_index(self.description)
+        return self._employe_index
+
+    def fetchone(self):
+        row = super().fetchone()
+        return None if row is None else Employe(self._row_index(), row)
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        index = self._row_index() if rows else None
+        return [Employe(index, row) for row in rows]
+
+    def fetchall(self):
+        rows = super().fetchall()
+        index = self._row_index() if rows else None
+        return [Employe(index, row) for row in rows]
+
+
+class EmployeMySQLCursor(pymysql.cursors.Cursor):
+    """Curseur pymysql dont les lignes sont des Employe (conn.cursor(EmployeMySQLCursor))"""
+
+    def _do_get_result(self):
+        super()._do_get_result()
+        if self.description:
+            index = column_index(self.description)
+            self._rows = [Employe(index, row) for row in self._rows]
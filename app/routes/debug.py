@@ -0,0 +1,49 @@
+"""Routes API de diagnostic (performances des requêtes SQL)
+
+Désactivées par défaut (404) : requêtes, plans et topologie de la base ne sont exposés
+qu'avec DEBUG_ENDPOINTS=true.
+"""
+import os
+
+from flask import Blueprint, jsonify
+from services.query_profiler import query_profiler
+from services.replica_router import replica_router
+
+debug_bp = Blueprint('debug', __name__)
+
+DEBUG_ENDPOINTS = os.getenv('DEBUG_ENDPOINTS', 'false').lower() == 'true'
+
+@debug_bp.before_request
+def require_debug_endpoints():
+    """Routes /api/debug/* inexistantes sans DEBUG_ENDPOINTS=true"""
+    if not DEBUG_ENDPOINTS:
+        return jsonify({
+            'success': False,
+            'message': 'Endpoints de diagnostic désactivés (DEBUG_ENDPOINTS=true pour les activer)'
+        }), 404
+
+@debug_bp.route('/debug/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """Top-N des requêtes lentes avec leur plan EXPLAIN (ANALYZE, BUFFERS)"""
+    return jsonify({
+        'success': True,
+        'data': query_profiler.snapshot()
+    }), 200
+
+@debug_bp.route('/debug/slow-queries', methods=['DELETE'])
+def reset_slow_queries():
+    """Réinitialise le journal des requêtes lentes"""
+    query_profiler.reset()
+    
+    return jsonify({
+        'success': True,
+        'message': 'Journal des requêtes lentes réinitialisé'
+    }), 200
+
+@debug_bp.route('/debug/replicas', methods=['GET'])
+def get_replicas():
+    """État des réplicas de lecture de la base cible"""
+    return jsonify({
+        'success': True,
+        'data': replica_router.status()
+    }), 200
@@ -1,6 +1,8 @@
 """Routes API pour la gestion des employés"""
 from flask import Blueprint, jsonify, request
 from services.db_service import DatabaseService
+from services.employe_filters import EmployeFilters, FilterError
+from services.json_response import wants_fast, raw_json_response
 from datetime import datetime
 
 employes_bp = Blueprint('employes', __name__)
@@ -8,13 +10,72 @@ db_service = DatabaseService()
 
 @employes_bp.route('/employes', methods=['GET'])
 def get_employes():
-    """Récupère la liste des employés avec filtres optionnels"""
+    """Récupère la liste des employés avec filtres optionnels.
+
+    Filtres : source, departement (valeurs multiples), statut, salaire_min/salaire_max,
+    date_embauche_min/date_embauche_max ; tri : sort=<clé> ou sort=-<clé>.
+    total=true : ajoute le total filtré (exact, ou estimé pour les grands ensembles).
+    fast=true : lignes sérialisées par PostgreSQL (json_agg), dates au format ISO 8601.
+    archived=include|only : lignes de employes_unified_archive en plus / à la place.
+    as_of=<date ou date et heure ISO 8601> : état à cet instant (employes_history).
+    """
     try:
-        source = request.args.get('source')
-        departement = request.args.get('departement')
+        try:
+            filters = EmployeFilters.from_args(request.args)
+        except FilterError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+            
+        limit = int(request.args.get('limit', 200))
+        offset = int(request.args.get('offset', 0))
+        
+        totals = {}
+        if request.args.get('total', 'false').lower() in ('1', 'true', 'yes', 'oui'):
+            totals = db_service.count_employes(filters)
+        
+        if wants_fast(request.args):
+            page = db_service.get_all_employes_json(filters, limit, offset)
+            return raw_json_response({
+                'success': True,
+                'count': page['count'],
+                **totals,
+                'filters': filters.to_dict()
+            }, page['data'])
+        
+        employes = db_service.get_all_employes(filters, limit, offset)
+        
+        return jsonify({
+            'success': True,
+            'count': len(employes),
+            **totals,
+            'filters': filters.to_dict(),
+            'data': employes
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+# Recherche : 3 caractères minimum (en dessous, les trigrammes ne filtrent plus et la requête parcourt la table)
+SEARCH_MIN_LENGTH = 3
+SEARCH_MAX_LIMIT = 100
 
+@employes_bp.route('/employes/search', methods=['GET'])
+def search_employes():
+    """Recherche approximative des employés (nom, email, département), classée par pertinence"""
+    try:
+        q = (request.args.get('q') or '').strip()
+        if len(q) < SEARCH_MIN_LENGTH:
+            return jsonify({
+                'success': False,
+                'message': f"Paramètre 'q' requis ({SEARCH_MIN_LENGTH} caractères minimum)"
+            }), 400
+        
         statut = request.args.get('statut')
-        # Validation du statut (insensible à la casse)
         if statut:
             statut = statut.lower()
             statuts_valides = ['actif', 'inactif']
@@ -23,17 +84,19 @@ def get_employes():
                     'success': False,
                     'message': f"Valeur du paramètre 'Statut' invalide : {statut}. Voici les valeurs autorisées : {statuts_valides}"
                 }), 400
-            
-        limit = int(request.args.get('limit', 200))
-        offset = int(request.args.get('offset', 0))
         
+        limit = min(int(request.args.get('limit', 20)), SEARCH_MAX_LIMIT)
+        offset = int(request.args.get('offset', 0))
         
-        employes = db_service.get_all_employes(source, departement, statut, limit, offset)
+        employes = db_service.search_employes(q, statut, limit, offset)
         
         return jsonify({
             'success': True,
+            'query': q,
             'count': len(employes),
-            'data': [dict(emp) for emp in employes]
+            'limit': limit,
+            'offset': offset,
+            'data': employes
         }), 200
     
     except Exception as e:
@@ -56,7 +119,7 @@ def get_employe(employe_id):
         
         return jsonify({
             'success': True,
-            'data': dict(employe)
+            'data': employe
         }), 200
     
     except Exception as e:
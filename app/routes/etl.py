@@ -1,11 +1,16 @@
 """Routes API pour l'ETL et l'intégration Airflow"""
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from services.airflow_service import AirflowService
 from services.db_service import DatabaseService
+from services.sync_service import SyncService
 
 etl_bp = Blueprint('etl', __name__)
 airflow_service = AirflowService()
 db_service = DatabaseService()
+sync_service = SyncService()
+
+# Nombre maximal d'emails par synchronisation ciblée (au-delà : déclencher le DAG)
+SYNC_MAX_EMAILS = 500
 
 @etl_bp.route('/etl/trigger', methods=['POST'])
 def trigger_etl():
@@ -17,6 +22,38 @@ def trigger_etl():
     else:
         return jsonify(result), 500
 
+@etl_bp.route('/etl/sync', methods=['POST'])
+def sync_emails():
+    """Synchronisation ciblée d'une liste d'emails, sans exécution du DAG"""
+    data = request.get_json(silent=True) or {}
+    emails = data.get('emails') or ([data['email']] if data.get('email') else [])
+    
+    if not emails or not isinstance(emails, list):
+        return jsonify({
+            'success': False,
+            'message': "Champ requis : emails (liste) ou email"
+        }), 400
+    if len(emails) > SYNC_MAX_EMAILS:
+        return jsonify({
+            'success': False,
+            'message': f"{len(emails)} emails : maximum {SYNC_MAX_EMAILS}, utiliser POST /api/etl/trigger"
+        }), 400
+    
+    try:
+        report = sync_service.sync_emails(emails)
+        
+        return jsonify({
+            'success': True,
+            'count': len(report),
+            'data': report
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @etl_bp.route('/etl/status', methods=['GET'])
 def get_etl_status():
     """Récupère le statut du DAG ETL"""
@@ -48,6 +85,30 @@ def get_last_sync():
             'data': dict(info)
         }), 200
     
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@etl_bp.route('/etl/performance', methods=['GET'])
+def get_etl_performance():
+    """Récupère les mesures de performance par tâche et les tendances par étape"""
+    try:
+        runs = int(request.args.get('runs', 10))
+        
+        executions = db_service.get_etl_performance(runs)
+        etapes = db_service.get_etl_stage_trends(runs)
+        
+        return jsonify({
+            'success': True,
+            'runs': runs,
+            'data': {
+                'etapes': [dict(e) for e in etapes],
+                'executions': [dict(e) for e in executions]
+            }
+        }), 200
+    
     except Exception as e:
         return jsonify({
             'success': False,
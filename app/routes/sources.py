@@ -1,9 +1,31 @@
 """Routes API pour gérer les bases sources"""
 from flask import Blueprint, jsonify, request
 from services.source_db_service import SourceDatabaseService
+from services.sync_service import SyncService
+from services.json_response import wants_fast, raw_json_response
+from services.single_flight import single_flight, request_key
+import os
 
 sources_bp = Blueprint('sources', __name__)
 source_service = SourceDatabaseService()
+sync_service = SyncService()
+
+# Synchronisation ciblée après écriture : ?sync=true (valeur par défaut configurable)
+SYNC_ON_WRITE = os.getenv('ETL_SYNC_ON_WRITE', 'false')
+
+
+def sync_after_write(*emails):
+    """Réconcilie les emails écrits dans employes_unified si demandé (None sinon).
+
+    L'écriture source est déjà validée : une erreur de synchronisation est
+    renvoyée dans la réponse sans la faire échouer.
+    """
+    if request.args.get('sync', SYNC_ON_WRITE).lower() not in ('1', 'true', 'yes', 'oui'):
+        return None
+    try:
+        return {'success': True, 'data': sync_service.sync_emails([e for e in emails if e])}
+    except Exception as e:
+        return {'success': False, 'message': str(e)}
 
 # ==================== MYSQL ====================
 
@@ -15,13 +37,14 @@ def get_mysql_employes():
         offset = int(request.args.get('offset', 0))
         
         employes = source_service.get_mysql_employees(limit, offset)
-        count = source_service.get_mysql_count()
+        # Total exact pour une petite table, sinon estimé ou en cache (total_exact=false)
+        totals = source_service.get_mysql_total()
         
         return jsonify({
             'success': True,
             'source': 'MySQL',
             'count': len(employes),
-            'total': count,
+            **totals,
             'data': employes
         }), 200
     except Exception as e:
@@ -47,11 +70,13 @@ def add_to_mysql():
                 }), 400
         
         result = source_service.add_to_mysql(data)
+        sync = sync_after_write(data['email'])
         
         return jsonify({
             'success': True,
             'message': f'Employé ajouté dans MySQL source (ID: {result["id"]})',
-            'data': result
+            'data': result,
+            'sync': sync
         }), 201
         
     except Exception as e:
@@ -101,11 +126,14 @@ def update_mysql_employe(employe_id):
         
         # Mise à jour
         result = source_service.update_mysql_employee(employe_id, data)
+        # Ancien et nouvel email : un changement d'email libère l'ancien
+        sync = sync_after_write(employe.get('email'), data.get('email'))
         
         return jsonify({
             'success': True,
             'message': 'Employé MySQL mis à jour avec succès',
-            'data': result
+            'data': result,
+            'sync': sync
         }), 200
         
     except Exception as e:
@@ -129,10 +157,12 @@ def delete_mysql_employe(employe_id):
         
         # Suppression
         source_service.delete_mysql_employee(employe_id)
+        sync = sync_after_write(employe.get('email'))
         
         return jsonify({
             'success': True,
-            'message': 'Employé supprimé de MySQL source'
+            'message': 'Employé supprimé de MySQL source',
+            'sync': sync
         }), 200
         
     except Exception as e:
@@ -146,19 +176,30 @@ def delete_mysql_employe(employe_id):
 
 @sources_bp.route('/sources/postgresql/employes', methods=['GET'])
 def get_postgresql_employes():
-    """Liste des employés PostgreSQL source"""
+    """Liste des employés PostgreSQL source (fast=true : JSON construit par PostgreSQL)"""
     try:
         limit = int(request.args.get('limit', 200))
         offset = int(request.args.get('offset', 0))
         
+        # Total exact pour une petite table, sinon estimé ou en cache (total_exact=false)
+        totals = source_service.get_postgresql_total()
+        
+        if wants_fast(request.args):
+            count, data = source_service.get_postgresql_employees_json(limit, offset)
+            return raw_json_response({
+                'success': True,
+                'source': 'PostgreSQL',
+                'count': count,
+                **totals
+            }, data)
+        
         employes = source_service.get_postgresql_employees(limit, offset)
-        count = source_service.get_postgresql_count()
         
         return jsonify({
             'success': True,
             'source': 'PostgreSQL',
             'count': len(employes),
-            'total': count,
+            **totals,
             'data': employes
         }), 200
     except Exception as e:
@@ -184,11 +225,13 @@ def add_to_postgresql():
                 }), 400
         
         result = source_service.add_to_postgresql(data)
+        sync = sync_after_write(data['email'])
         
         return jsonify({
             'success': True,
             'message': f'Employé ajouté dans PostgreSQL source (ID: {result["id"]})',
-            'data': result
+            'data': result,
+            'sync': sync
         }), 201
         
     except Exception as e:
@@ -238,11 +281,14 @@ def update_postgresql_employe(employe_id):
         
         # Mise à jour
         result = source_service.update_postgresql_employee(employe_id, data)
+        # Ancien et nouvel email : un changement d'email libère l'ancien
+        sync = sync_after_write(employe.get('email'), data.get('email'))
         
         return jsonify({
             'success': True,
             'message': 'Employé PostgreSQL mis à jour avec succès',
-            'data': result
+            'data': result,
+            'sync': sync
         }), 200
         
     except Exception as e:
@@ -266,10 +312,12 @@ def delete_postgresql_employe(employe_id):
         
         # Suppression
         source_service.delete_postgresql_employee(employe_id)
+        sync = sync_after_write(employe.get('email'))
         
         return jsonify({
             'success': True,
-            'message': 'Employé supprimé de PostgreSQL source'
+            'message': 'Employé supprimé de PostgreSQL source',
+            'sync': sync
         }), 200
         
     except Exception as e:
@@ -281,24 +329,26 @@ def delete_postgresql_employe(employe_id):
 
 # ==================== STATISTIQUES ====================
   
+def count_sources():
+    """Compte directement dans les bases sources (pas employes_unified) et le fichier CSV"""
+    return {
+        'csv': source_service.get_csv_count(),
+        'mysql': source_service.get_mysql_count(),
+        'postgresql': source_service.get_postgresql_count()
+    }
+
 @sources_bp.route('/sources/stats', methods=['GET'])
 def get_sources_stats():
     """Statistiques des BASES SOURCES DIRECTES (temps réel)"""
     try:
-        # Compter directement depuis les bases sources (pas employes_unified)
-        mysql_count = source_service.get_mysql_count()
-        postgresql_count = source_service.get_postgresql_count()
-        
-        # CSV count depuis le fichier
-        csv_count = source_service.get_csv_count()
+        # Requêtes identiques concurrentes : un seul comptage partagé
+        counts = single_flight.do(request_key(request.path, request.args), count_sources)
         
         return jsonify({
             'success': True,
             'data': {
-                'csv': csv_count,
-                'mysql': mysql_count,
-                'postgresql': postgresql_count,
-                'total_sources': mysql_count + postgresql_count + csv_count
+                **counts,
+                'total_sources': counts['mysql'] + counts['postgresql'] + counts['csv']
             }
         }), 200
     except Exception as e:
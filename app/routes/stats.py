@@ -1,6 +1,7 @@
 """Routes API pour les statistiques"""
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from services.db_service import DatabaseService
+from services.single_flight import single_flight, request_key
 
 stats_bp = Blueprint('stats', __name__)
 db_service = DatabaseService()
@@ -9,7 +10,8 @@ db_service = DatabaseService()
 def get_stats_global():
     """Récupère les statistiques globales"""
     try:
-        stats = db_service.get_stats_global()
+        # Requêtes identiques concurrentes : un seul calcul partagé
+        stats = single_flight.do(request_key(request.path, request.args), db_service.get_stats_global)
         
         return jsonify({
             'success': True,
@@ -26,7 +28,7 @@ def get_stats_global():
 def get_stats_sources():
     """Récupère les statistiques par source"""
     try:
-        stats = db_service.get_stats_by_source()
+        stats = single_flight.do(request_key(request.path, request.args), db_service.get_stats_by_source)
         
         return jsonify({
             'success': True,
@@ -43,7 +45,7 @@ def get_stats_sources():
 def get_stats_departements():
     """Récupère les statistiques par département"""
     try:
-        stats = db_service.get_stats_by_departement()
+        stats = single_flight.do(request_key(request.path, request.args), db_service.get_stats_by_departement)
         
         return jsonify({
             'success': True,
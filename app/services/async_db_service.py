@@ -0,0 +1,171 @@
+"""Accès asynchrones aux bases pour le mode ASGI (asgi.py)
+
+- Base cible : pool asyncpg sur le primaire, pools paresseux sur les réplicas
+  (même routage et même fenêtre de lecture de ses écritures que DatabaseService)
+- Sources : pool asyncpg (PostgreSQL source) et pool aiomysql (MySQL source)
+- Mêmes requêtes que les services synchrones : les paramètres psycopg2
+  (%s, %(nom)s) sont convertis en paramètres asyncpg ($1, $2...)
+"""
+import asyncio
+import os
+import re
+
+import aiomysql
+import asyncpg
+
+from models.employe import Employe
+from services.db_service import (DatabaseService, STATS_GLOBAL_QUERY, STATS_BY_SOURCE_QUERY,
+                                 STATS_BY_DEPARTEMENT_QUERY, LAST_SYNC_QUERY)
+from services.json_response import json_agg_query
+from services.metrics_service import track_db
+from services.replica_router import replica_router
+from services.source_db_service import SourceDatabaseService
+
+PLACEHOLDER = re.compile(r'%\((\w+)\)s|%s|%%')
+
+# Erreurs de connexion qui écartent un réplica
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError,
+                  asyncpg.CannotConnectNowError)
+
+
+def pg_placeholders(query, params=None):
+    """Requête au format psycopg2 -> requête asyncpg et liste d'arguments"""
+    args, positions = [], {}
+    values = iter(params or []) if not isinstance(params, dict) else None
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        name = match.group(1)
+        if name is None:
+            args.append(next(values))
+            return f'${len(args)}'
+        if name not in positions:
+            args.append(params[name])
+            positions[name] = len(args)
+        return f'${positions[name]}'
+
+    return PLACEHOLDER.sub(replace, query), args
+
+
+def to_employes(records):
+    """Records asyncpg -> Employe (le Record est indexable : aucune copie)"""
+    if not records:
+        return []
+    index = {name: i for i, name in enumerate(records[0].keys())}
+    return [Employe(index, record) for record in records]
+
+
+class AsyncDatabaseService:
+    """Lectures asynchrones de la base cible et des sources"""
+
+    def __init__(self):
+        self.target_config = {k: v for k, v in DatabaseService().conn_params.items() if k != 'client_encoding'}
+        self.target_config['port'] = int(self.target_config['port'])
+        sources = SourceDatabaseService()
+        self.source_service = sources
+        self.postgres_source_config = {k: v for k, v in sources.postgres_config.items() if k != 'client_encoding'}
+        mysql = dict(sources.mysql_config)
+        mysql['db'] = mysql.pop('database')
+        self.mysql_config = mysql
+        self.pool_size = int(os.getenv('ASYNC_POOL_SIZE', '20'))
+        self.target_pool = None
+        self.replica_pools = {}
+        self.postgres_source_pool = None
+        self.mysql_pool = None
+
+    async def start(self):
+        """Ouvre les pools au démarrage du serveur ASGI (connexions ouvertes à la demande)"""
+        self.target_pool = await asyncpg.create_pool(min_size=0, max_size=self.pool_size, **self.target_config)
+        self.postgres_source_pool = await asyncpg.create_pool(min_size=0, max_size=self.pool_size,
+                                                              **self.postgres_source_config)
+        self.mysql_pool = await aiomysql.create_pool(minsize=0, maxsize=self.pool_size, **self.mysql_config)
+
+    async def close(self):
+        for pool in [self.target_pool, self.postgres_source_pool, *self.replica_pools.values()]:
+            if pool is not None:
+                await pool.close()
+        if self.mysql_pool is not None:
+            self.mysql_pool.close()
+            await self.mysql_pool.wait_closed()
+
+    # ========== BASE CIBLE ==========
+
+    async def read_pool_fetch(self, method, query, args):
+        """Lecture sur un réplica sain, sinon sur le primaire"""
+        for dsn in replica_router.candidates():
+            pool = self.replica_pools.get(dsn)
+            if pool is None:
+                pool = self.replica_pools[dsn] = await asyncpg.create_pool(
+                    dsn, min_size=0, max_size=self.pool_size, timeout=replica_router.connect_timeout)
+            try:
+                async with pool.acquire() as conn:
+                    result = await getattr(conn, method)(query, *args)
+            except REPLICA_ERRORS as e:
+                replica_router.mark_down(dsn, e)
+                continue
+            replica_router.mark_up(dsn)
+            return result
+
+        async with self.target_pool.acquire() as conn:
+            return await getattr(conn, method)(query, *args)
+
+    async def fetch(self, query, params=None):
+        return await self.read_pool_fetch('fetch', *pg_placeholders(query, params))
+
+    async def fetchrow(self, query, params=None):
+        return await self.read_pool_fetch('fetchrow', *pg_placeholders(query, params))
+
+    @track_db('target')
+    async def get_all_employes(self, filters, limit=200, offset=0):
+        query, params = DatabaseService.employes_page_query(filters, limit, offset)
+        return to_employes(await self.fetch(query, params))
+
+    @track_db('target')
+    async def get_all_employes_json(self, filters, limit=200, offset=0):
+        query, params = DatabaseService.employes_page_query(filters, limit, offset)
+        return await self.fetchrow(json_agg_query(query, filters.order_by()), params)
+
+    @track_db('target')
+    async def search_employes(self, q, statut=None, limit=20, offset=0):
+        query, params = DatabaseService.search_query(q, statut, limit, offset)
+        return to_employes(await self.fetch(query, params))
+
+    @track_db('target')
+    async def get_stats_global(self):
+        return await self.fetchrow(STATS_GLOBAL_QUERY)
+
+    @track_db('target')
+    async def get_stats_by_source(self):
+        return await self.fetch(STATS_BY_SOURCE_QUERY)
+
+    @track_db('target')
+    async def get_stats_by_departement(self):
+        return await self.fetch(STATS_BY_DEPARTEMENT_QUERY)
+
+    @track_db('target')
+    async def get_last_sync_info(self):
+        return await self.fetchrow(LAST_SYNC_QUERY)
+
+    # ========== SOURCES ==========
+
+    @track_db('mysql_source')
+    async def get_mysql_count(self):
+        async with self.mysql_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT COUNT(*) FROM employes_mysql")
+                return (await cursor.fetchone())[0]
+
+    @track_db('postgres_source')
+    async def get_postgresql_count(self):
+        async with self.postgres_source_pool.acquire() as conn:
+            return await conn.fetchval("SELECT COUNT(*) FROM employes_source")
+
+    async def get_source_counts(self):
+        """Nombre d'employés par source : les trois lectures en parallèle"""
+        mysql, postgresql, csv = await asyncio.gather(
+            self.get_mysql_count(),
+            self.get_postgresql_count(),
+            asyncio.to_thread(self.source_service.get_csv_count)
+        )
+        return {'csv': csv, 'mysql': mysql, 'postgresql': postgresql}
@@ -0,0 +1,122 @@
+"""Totaux des listes paginées : exacts pour les petits ensembles, estimés ou en cache sinon
+
+- Estimation du planificateur d'abord (EXPLAIN, statistiques de table) : une lecture de métadonnées
+- Estimation sous le seuil : COUNT(*) exact (index-only sur les index composites)
+- Au-delà : dernier total exact en cache pour ces filtres s'il est récent, sinon l'estimation ;
+  le total exact est alors recalculé en arrière-plan (un seul calcul par clé à la fois)
+- Cache borné (LRU, entrées expirées purgées) et recalculs limités à COUNT_REFRESH_WORKERS
+  simultanés : au-delà, le recalcul est abandonné et l'estimation reste servie
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CountCache:
+    """Cache des totaux exacts par (base, requête, paramètres)"""
+
+    def __init__(self, exact_threshold=10000, ttl_s=60, max_entries=1000, refresh_workers=2):
+        self.exact_threshold = exact_threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé -> (total, horodatage), du moins au plus récent
+        self._refreshing = set()       # clés en cours de recalcul
+        self._workers = threading.BoundedSemaphore(max(1, refresh_workers))
+
+    @classmethod
+    def from_env(cls):
+        """Configuration via les variables COUNT_*"""
+        return cls(
+            exact_threshold=int(os.getenv('COUNT_EXACT_THRESHOLD', '10000')),
+            ttl_s=float(os.getenv('COUNT_CACHE_TTL_S', '60')),
+            max_entries=int(os.getenv('COUNT_CACHE_MAX_ENTRIES', '1000')),
+            refresh_workers=int(os.getenv('COUNT_REFRESH_WORKERS', '2'))
+        )
+
+    def cached(self, key):
+        """Total exact récent pour cette clé (None si absent ou expiré)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] >= self.ttl_s:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def store(self, key, total):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (total, now)
+            self._entries.move_to_end(key)
+            self._evict(now)
+
+    def _evict(self, now):
+        """Purge les entrées expirées puis les moins récemment utilisées au-delà de max_entries (verrou tenu)"""
+        expired = [k for k, (_, stored) in self._entries.items() if now - stored >= self.ttl_s]
+        for k in expired:
+            del self._entries[k]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def refresh_async(self, key, exact_fn):
+        """Recalcule le total exact en arrière-plan.
+
+        Ignoré si déjà en cours pour cette clé, ou si tous les recalculs
+        autorisés (refresh_workers) sont occupés : l'estimation reste servie.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if not self._workers.acquire(blocking=False):
+                logger.debug(f"Recalcul du total {key[0]} abandonné : recalculs saturés")
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.store(key, exact_fn())
+            except Exception as e:
+                logger.warning(f"Recalcul du total {key[0]} impossible : {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+                self._workers.release()
+
+        threading.Thread(target=run, name='count-refresh', daemon=True).start()
+
+    def total(self, key, estimate_fn, exact_fn):
+        """Total d'une liste et sa nature.
+
+        key : identifiant hashable de la liste filtrée ;
+        estimate_fn : estimation du planificateur (None si inconnue) ;
+        exact_fn : COUNT(*) exact.
+        Retourne {'total', 'total_exact', 'total_method'} avec total_method
+        'count' (exact), 'cache' (exact, âgé de moins de ttl_s) ou 'estimate'.
+        """
+        estimate = estimate_fn()
+        if estimate is None or estimate <= self.exact_threshold:
+            total = exact_fn()
+            self.store(key, total)
+            return {'total': total, 'total_exact': True, 'total_method': 'count'}
+
+        cached = self.cached(key)
+        if cached is not None:
+            return {'total': cached, 'total_exact': False, 'total_method': 'cache'}
+
+        self.refresh_async(key, exact_fn)
+        return {'total': int(estimate), 'total_exact': False, 'total_method': 'estimate'}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Instance partagée par les services de base cible et sources
+count_cache = CountCache.from_env()
@@ -1,7 +1,64 @@
 """Service de connexion à la base de données PostgreSQL"""
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from services.metrics_service import track_db
+from services.query_profiler import query_profiler
+from services.count_cache import count_cache
+from services.json_response import json_agg_query
+from services.replica_router import replica_router
+from models.employe import EmployeCursor
 import os
+import time
+
+# Document de recherche : expression identique à l'index idx_employes_search
+# (scripts/sql/migrations/001_employes_search.sql), sans quoi l'index n'est pas utilisé
+SEARCH_DOCUMENT = "search_normalize(nom || ' ' || email || ' ' || COALESCE(departement, ''))"
+
+
+def like_escape(value):
+    """Échappe les jokers LIKE saisis par l'utilisateur"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# Requêtes de lecture partagées avec le service asynchrone (services/async_db_service.py)
+STATS_GLOBAL_QUERY = """
+        SELECT 
+            COUNT(*) as total_employes,
+            COUNT(DISTINCT source) as nb_sources,
+            COUNT(DISTINCT departement) as nb_departements,
+            AVG(salaire) as salaire_moyen,
+            MIN(salaire) as salaire_min,
+            MAX(salaire) as salaire_max
+        FROM employes_unified
+        """
+
+STATS_BY_SOURCE_QUERY = """
+        SELECT 
+            source,
+            COUNT(*) as count,
+            AVG(salaire) as salaire_moyen
+        FROM employes_unified
+        GROUP BY source
+        ORDER BY source
+        """
+
+STATS_BY_DEPARTEMENT_QUERY = """
+        SELECT 
+            departement,
+            COUNT(*) as count,
+            AVG(salaire) as salaire_moyen
+        FROM employes_unified
+        GROUP BY departement
+        ORDER BY count DESC
+        """
+
+LAST_SYNC_QUERY = """
+        SELECT 
+            MAX(updated_at) as derniere_maj,
+            COUNT(*) as total
+        FROM employes_unified
+        """
+
 
 class DatabaseService:
     def __init__(self):
@@ -14,16 +71,42 @@ class DatabaseService:
             'client_encoding': 'utf8'
         }
     
-    def get_connection(self):
-        """Crée une connexion à la base de données"""
+    def get_connection(self, read_only=False):
+        """Crée une connexion : primaire, ou réplica sain pour une lecture (read_only=True)"""
+        if read_only:
+            return replica_router.connect(lambda: psycopg2.connect(**self.conn_params))
         return psycopg2.connect(**self.conn_params)
     
-    def execute_query(self, query, params=None, fetch_one=False):
-        """Exécute une requête SQL"""
+    # Historique temporel (migration 005) : vérifié à chaque écriture tant que la migration
+    # n'est pas appliquée (écritures inchangées), mémorisé une fois la fonction trouvée
+    history_enabled = False
+
+    def record_history(self, conn, ids=None, emails=None):
+        """Historise les employés écrits (id ou email), dans la transaction de l'écriture"""
+        cursor = conn.cursor()
+        if not DatabaseService.history_enabled:
+            cursor.execute("SELECT to_regprocedure('employes_history_sync(integer[], text[])') IS NOT NULL")
+            DatabaseService.history_enabled = cursor.fetchone()[0]
+        if DatabaseService.history_enabled:
+            self.timed_execute(cursor, "SELECT employes_history_sync(%s::integer[], %s::text[])", (ids, emails))
+        cursor.close()
+    
+    def timed_execute(self, cursor, query, params=None):
+        """Exécute une requête en la chronométrant pour le journal des requêtes lentes"""
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        return query_profiler.record(query, params, (time.perf_counter() - start) * 1000)
+    
+    def execute_query(self, query, params=None, fetch_one=False, cursor_factory=RealDictCursor, read_only=False):
+        """Exécute une requête SQL (lignes en dict, ou en Employe avec cursor_factory=EmployeCursor).
+
+        read_only=True : lecture routée vers un réplica si disponible (services/replica_router.py).
+        """
         conn = None
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            conn = self.get_connection(read_only)
+            cursor = conn.cursor(cursor_factory=cursor_factory)
+            start = time.perf_counter()
             cursor.execute(query, params)
             
             if fetch_one:
@@ -31,6 +114,12 @@ class DatabaseService:
             else:
                 result = cursor.fetchall()
             
+            # Temps mesuré jusqu'à la lecture complète du résultat
+            is_slow = query_profiler.record(query, params, (time.perf_counter() - start) * 1000)
+            if is_slow and query_profiler.should_explain(query):
+                # Plan capturé en arrière-plan sur sa propre connexion (même routage) : la réponse n'attend pas
+                query_profiler.capture_plan_async(lambda: self.get_connection(read_only), query, params)
+            
             cursor.close()
             return result
         except Exception as e:
@@ -39,90 +128,184 @@ class DatabaseService:
             if conn:
                 conn.close()
     
-    def get_all_employes(self, source=None, departement=None, statut=None, limit=200, offset=0):
-        """Récupère tous les employés avec filtres optionnels"""
-        query = "SELECT * FROM employes_unified WHERE 1=1"
-        params = []
+    @staticmethod
+    def employes_page_query(filters, limit, offset):
+        """Requête d'une page d'employés filtrés et ses paramètres.
+
+        Jointure différée : la page d'id est lue dans un index composite (parcours
+        index-only, OFFSET compris), puis seules ces lignes sont lues dans la table.
+        Avec archived=include|only ou as_of, même requête sur l'archive ou l'historique
+        (filters.relation()).
+        """
+        where, params = filters.where()
+        order = filters.order_by()
+        relation = filters.relation()
+        query = f"""
+        SELECT e.*
+        FROM {relation} e
+        JOIN (
+            SELECT id FROM {relation} r
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT %s OFFSET %s
+        ) page USING (id)
+        ORDER BY {order}
+        """
+        return query, params + [limit, offset]
+    
+    @track_db('target')
+    def get_all_employes(self, filters, limit=200, offset=0):
+        """Récupère les employés selon des filtres typés (services/employe_filters.py)"""
+        query, params = self.employes_page_query(filters, limit, offset)
+        return self.execute_query(query, params, cursor_factory=EmployeCursor, read_only=True)
+    
+    @track_db('target')
+    def get_all_employes_json(self, filters, limit=200, offset=0):
+        """Même page que get_all_employes, sérialisée par PostgreSQL : {'count', 'data' (texte JSON)}"""
+        query, params = self.employes_page_query(filters, limit, offset)
+        return self.execute_query(json_agg_query(query, filters.order_by()), params, fetch_one=True, read_only=True)
+    
+    @track_db('target')
+    def count_employes(self, filters):
+        """Total des employés filtrés : exact si l'estimation est petite, sinon cache ou estimation"""
+        where, params = filters.where()
+        relation = filters.relation()
+        
+        def estimate():
+            plan = self.execute_query(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {relation} r WHERE {where}",
+                                      params, fetch_one=True, read_only=True)
+            return plan['QUERY PLAN'][0]['Plan']['Plan Rows']
         
-        if source:
-            query += " AND source = %s"
-            params.append(source)
+        def exact():
+            row = self.execute_query(f"SELECT COUNT(*) AS total FROM {relation} r WHERE {where}",
+                                     params, fetch_one=True, read_only=True)
+            return row['total']
         
-        if departement:
-            query += " AND departement = %s"
-            params.append(departement)
+        return count_cache.total((relation, where, repr(params)), estimate, exact)
+    
+    @staticmethod
+    def search_query(q, statut=None, limit=20, offset=0):
+        """Requête de recherche approximative (sous-chaîne ou mots proches) sur nom, email et département.
 
+        Accents et casse ignorés ; tri par pertinence (similarité de mots), servi par
+        l'index GiST trigramme avec LIMIT.
+        """
+        query = f"""
+        SELECT *, ROUND(word_similarity(search_normalize(%(q)s), {SEARCH_DOCUMENT})::numeric, 3) AS score
+        FROM employes_unified
+        WHERE ({SEARCH_DOCUMENT} LIKE '%%' || search_normalize(%(pattern)s) || '%%'
+               OR {SEARCH_DOCUMENT} %%> search_normalize(%(q)s))
+        """
+        params = {'q': q, 'pattern': like_escape(q), 'limit': limit, 'offset': offset}
+        
         if statut:
-            #query += " AND statut = %s"
-            query += " AND statut ILIKE %s"
-            params.append(statut)
-
-        query += " ORDER BY id LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
+            query += " AND statut = %(statut)s"
+            params['statut'] = statut
         
-        return self.execute_query(query, params)
+        query += f" ORDER BY {SEARCH_DOCUMENT} <->> search_normalize(%(q)s), id LIMIT %(limit)s OFFSET %(offset)s"
+        return query, params
     
+    @track_db('target')
+    def search_employes(self, q, statut=None, limit=20, offset=0):
+        """Recherche approximative des employés, classée par pertinence (voir search_query)"""
+        query, params = self.search_query(q, statut, limit, offset)
+        return self.execute_query(query, params, cursor_factory=EmployeCursor, read_only=True)
+    
+    @track_db('target')
     def get_employe_by_id(self, employe_id):
         """Récupère un employé par son ID"""
         query = "SELECT * FROM employes_unified WHERE id = %s"
-        return self.execute_query(query, (employe_id,), fetch_one=True)
+        return self.execute_query(query, (employe_id,), fetch_one=True, cursor_factory=EmployeCursor)
     
+    @track_db('target')
     def get_stats_global(self):
         """Récupère les statistiques globales"""
-        query = """
-        SELECT 
-            COUNT(*) as total_employes,
-            COUNT(DISTINCT source) as nb_sources,
-            COUNT(DISTINCT departement) as nb_departements,
-            AVG(salaire) as salaire_moyen,
-            MIN(salaire) as salaire_min,
-            MAX(salaire) as salaire_max
-        FROM employes_unified
-        """
-        return self.execute_query(query, fetch_one=True)
+        return self.execute_query(STATS_GLOBAL_QUERY, fetch_one=True, read_only=True)
     
+    @track_db('target')
     def get_stats_by_source(self):
         """Récupère les statistiques par source"""
-        query = """
-        SELECT 
-            source,
-            COUNT(*) as count,
-            AVG(salaire) as salaire_moyen
-        FROM employes_unified
-        GROUP BY source
-        ORDER BY source
-        """
-        return self.execute_query(query)
+        return self.execute_query(STATS_BY_SOURCE_QUERY, read_only=True)
     
+    @track_db('target')
     def get_stats_by_departement(self):
         """Récupère les statistiques par département"""
-        query = """
-        SELECT 
-            departement,
-            COUNT(*) as count,
-            AVG(salaire) as salaire_moyen
-        FROM employes_unified
-        GROUP BY departement
-        ORDER BY count DESC
-        """
-        return self.execute_query(query)
+        return self.execute_query(STATS_BY_DEPARTEMENT_QUERY, read_only=True)
     
+    @track_db('target')
     def get_last_sync_info(self):
         """Récupère les informations de la dernière synchronisation"""
+        return self.execute_query(LAST_SYNC_QUERY, fetch_one=True, read_only=True)
+    
+    @track_db('target')
+    def get_etl_performance(self, runs=10):
+        """Récupère les mesures par tâche des dernières exécutions ETL"""
         query = """
-        SELECT 
-            MAX(updated_at) as derniere_maj,
-            COUNT(*) as total
-        FROM employes_unified
+        WITH derniers_runs AS (
+            SELECT dag_run_id, MIN(start_time) AS run_start
+            FROM etl_log
+            GROUP BY dag_run_id
+            ORDER BY run_start DESC
+            LIMIT %s
+        )
+        SELECT
+            l.dag_run_id,
+            r.run_start,
+            l.task_name,
+            l.status,
+            l.records_processed,
+            l.records_inserted,
+            l.records_updated,
+            l.records_soft_deleted,
+            l.bytes_moved,
+            l.peak_memory_kb,
+            l.duration_ms,
+            CASE WHEN l.duration_ms > 0
+                 THEN ROUND(COALESCE(l.records_processed, 0) * 1000.0 / l.duration_ms, 2) END AS rows_per_sec,
+            CASE WHEN l.duration_ms > 0
+                 THEN ROUND(COALESCE(l.bytes_moved, 0) * 1000.0 / l.duration_ms, 2) END AS bytes_per_sec,
+            l.error_message
+        FROM etl_log l
+        JOIN derniers_runs r ON r.dag_run_id = l.dag_run_id
+        ORDER BY r.run_start DESC, l.start_time
+        """
+        return self.execute_query(query, (runs,))
+    
+    @track_db('target')
+    def get_etl_stage_trends(self, runs=10):
+        """Agrège durée et débit par étape sur les dernières exécutions ETL"""
+        query = """
+        WITH derniers_runs AS (
+            SELECT dag_run_id, MIN(start_time) AS run_start
+            FROM etl_log
+            GROUP BY dag_run_id
+            ORDER BY run_start DESC
+            LIMIT %s
+        )
+        SELECT
+            l.task_name,
+            COUNT(*) AS executions,
+            COUNT(*) FILTER (WHERE l.status = 'failed') AS echecs,
+            ROUND(AVG(l.duration_ms), 0) AS duree_moyenne_ms,
+            MAX(l.duration_ms) AS duree_max_ms,
+            ROUND(SUM(COALESCE(l.records_processed, 0)) * 1000.0 / NULLIF(SUM(l.duration_ms), 0), 2) AS rows_per_sec,
+            ROUND(SUM(COALESCE(l.bytes_moved, 0)) * 1000.0 / NULLIF(SUM(l.duration_ms), 0), 2) AS bytes_per_sec,
+            MAX(l.peak_memory_kb) AS pic_memoire_kb,
+            ROUND(SUM(l.duration_ms) * 100.0 / NULLIF(SUM(SUM(l.duration_ms)) OVER (), 0), 1) AS part_temps_pct
+        FROM etl_log l
+        JOIN derniers_runs r ON r.dag_run_id = l.dag_run_id
+        GROUP BY l.task_name
+        ORDER BY duree_moyenne_ms DESC NULLS LAST
         """
-        return self.execute_query(query, fetch_one=True)
+        return self.execute_query(query, (runs,))
     
+    @track_db('target')
     def create_employe(self, data):
         """Crée un nouvel employé"""
         conn = None
         try:
             conn = self.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor(cursor_factory=EmployeCursor)
             
             query = """
             INSERT INTO employes_unified 
@@ -132,7 +315,7 @@ class DatabaseService:
             """
             
             from datetime import datetime
-            cursor.execute(query, (
+            self.timed_execute(cursor, query, (
                 data.get('source', 'Manuel'),
                 data.get('source_id'),
                 data['nom'],
@@ -145,10 +328,12 @@ class DatabaseService:
             ))
             
             result = cursor.fetchone()
+            self.record_history(conn, ids=[result.id])
             conn.commit()
+            replica_router.mark_write()
             cursor.close()
             
-            return dict(result)
+            return result
         except Exception as e:
             if conn:
                 conn.rollback()
@@ -157,12 +342,13 @@ class DatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('target')
     def update_employe(self, employe_id, data):
         """Met à jour un employé"""
         conn = None
         try:
             conn = self.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor(cursor_factory=EmployeCursor)
             
             # Construire la requête dynamiquement
             fields = []
@@ -196,12 +382,15 @@ class DatabaseService:
             RETURNING *
             """
             
-            cursor.execute(query, values)
+            self.timed_execute(cursor, query, values)
             result = cursor.fetchone()
+            if result is not None:
+                self.record_history(conn, ids=[employe_id])
             conn.commit()
+            replica_router.mark_write()
             cursor.close()
             
-            return dict(result)
+            return result
         except Exception as e:
             if conn:
                 conn.rollback()
@@ -210,6 +399,7 @@ class DatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('target')
     def delete_employe(self, employe_id):
         """Supprime un employé"""
         conn = None
@@ -218,9 +408,12 @@ class DatabaseService:
             cursor = conn.cursor()
             
             query = "DELETE FROM employes_unified WHERE id = %s"
-            cursor.execute(query, (employe_id,))
+            self.timed_execute(cursor, query, (employe_id,))
+            # Version courante fermée : l'employé reste visible avec as_of antérieur
+            self.record_history(conn, ids=[employe_id])
             
             conn.commit()
+            replica_router.mark_write()
             cursor.close()
         except Exception as e:
             if conn:
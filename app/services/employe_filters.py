@@ -0,0 +1,201 @@
+"""Filtres et tris typés de la liste des employés (GET /api/employes)
+
+Chaque filtre est converti puis traduit en condition SARGable (colonne nue comparée
+à un paramètre : =, = ANY, >=, <=), utilisable par les index composites de
+scripts/sql/migrations/002_employes_list_indexes.sql. Table partitionnée par statut
+(migration 003) : la condition statut = %s limite le plan à une partition, dont les
+index ne contiennent plus statut. Les clés de tri sont whitelistées et toujours
+complétées par id pour une pagination stable.
+"""
+from datetime import datetime, timezone
+
+STATUTS = ['actif', 'inactif']
+
+# Lignes archivées (employes_unified_archive, migration 004) : exclues par défaut
+ARCHIVED = {'false': 'exclude', 'exclude': 'exclude', 'true': 'include', 'include': 'include', 'only': 'only'}
+EMPLOYE_COLUMNS = ("id, source, source_id, nom, email, departement, salaire, date_embauche, "
+                   "statut, created_at, updated_at")
+RELATIONS = {
+    'exclude': 'employes_unified',
+    'only': 'employes_unified_archive',
+    'include': f"""(
+            SELECT {EMPLOYE_COLUMNS}, NULL::timestamp AS archived_at FROM employes_unified
+            UNION ALL
+            SELECT {EMPLOYE_COLUMNS}, archived_at FROM employes_unified_archive
+        )""",
+}
+
+# Historique (employes_history, migration 005) : versions valables à un instant donné
+# (index GiST idx_employes_history_valid), id de l'employé et début de la version en updated_at
+HISTORY_RELATION = """(
+            SELECT employe_id AS id, source, source_id, nom, email, departement, salaire, date_embauche,
+                   statut, created_at, lower(valid_during) AS updated_at, upper(valid_during) AS valid_until
+            FROM employes_history
+            WHERE valid_during @> TIMESTAMP '{as_of}'
+        )"""
+
+# Clé de tri exposée -> colonne (préfixe '-' pour un tri décroissant)
+SORT_KEYS = {
+    'id': 'id',
+    'nom': 'nom',
+    'salaire': 'salaire',
+    'date_embauche': 'date_embauche',
+    'updated_at': 'updated_at',
+}
+
+
+class FilterError(ValueError):
+    """Paramètre de filtre ou de tri invalide (réponse 400)"""
+
+
+def split_values(args, name):
+    """Valeurs multiples : ?departement=RH&departement=Finance ou ?departement=RH,Finance"""
+    values = []
+    for raw in args.getlist(name):
+        values.extend(v.strip() for v in raw.split(',') if v.strip())
+    return values
+
+
+def parse_number(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise FilterError(f"Paramètre '{name}' invalide : {value} (nombre attendu)")
+
+
+def parse_instant(args, name):
+    """Date (AAAA-MM-JJ, minuit) ou date et heure ISO 8601 ; heure avec fuseau ramenée en UTC"""
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        instant = datetime.fromisoformat(value)
+    except ValueError:
+        raise FilterError(f"Paramètre '{name}' invalide : {value} (format AAAA-MM-JJ ou AAAA-MM-JJTHH:MM:SS attendu)")
+    # Horodatages de la base sans fuseau, en UTC (fuseau par défaut de l'image postgres)
+    if instant.tzinfo is not None:
+        instant = instant.astimezone(timezone.utc).replace(tzinfo=None)
+    return instant
+
+
+def parse_date(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise FilterError(f"Paramètre '{name}' invalide : {value} (format AAAA-MM-JJ attendu)")
+
+
+class EmployeFilters:
+    """Filtres validés d'une requête de liste"""
+
+    def __init__(self, sources=None, departements=None, statut=None, salaire_min=None, salaire_max=None,
+                 embauche_min=None, embauche_max=None, sort='id', archived='exclude', as_of=None):
+        self.sources = sources or []
+        self.departements = departements or []
+        self.statut = statut
+        self.salaire_min = salaire_min
+        self.salaire_max = salaire_max
+        self.embauche_min = embauche_min
+        self.embauche_max = embauche_max
+        self.sort = sort
+        self.archived = archived
+        self.as_of = as_of
+
+    @classmethod
+    def from_args(cls, args):
+        """Construit les filtres depuis request.args (FilterError si une valeur est invalide)"""
+        statut = (args.get('statut') or '').lower() or None
+        if statut and statut not in STATUTS:
+            raise FilterError(f"Valeur du paramètre 'Statut' invalide : {statut}. Voici les valeurs autorisées : {STATUTS}")
+
+        sort = args.get('sort') or 'id'
+        if sort.lstrip('-') not in SORT_KEYS:
+            raise FilterError(f"Tri invalide : {sort}. Clés autorisées : {sorted(SORT_KEYS)} (préfixe '-' : décroissant)")
+
+        archived = (args.get('archived') or 'false').lower()
+        if archived not in ARCHIVED:
+            raise FilterError(f"Valeur du paramètre 'archived' invalide : {archived}. "
+                              f"Voici les valeurs autorisées : ['false', 'true', 'include', 'only']")
+
+        filters = cls(
+            sources=split_values(args, 'source'),
+            departements=split_values(args, 'departement'),
+            statut=statut,
+            salaire_min=parse_number(args, 'salaire_min'),
+            salaire_max=parse_number(args, 'salaire_max'),
+            embauche_min=parse_date(args, 'date_embauche_min'),
+            embauche_max=parse_date(args, 'date_embauche_max'),
+            sort=sort,
+            archived=ARCHIVED[archived],
+            as_of=parse_instant(args, 'as_of'),
+        )
+        if filters.as_of is not None and filters.archived != 'exclude':
+            raise FilterError("as_of ne se combine pas avec archived : l'historique couvre déjà les employés archivés")
+        if None not in (filters.salaire_min, filters.salaire_max) and filters.salaire_min > filters.salaire_max:
+            raise FilterError("salaire_min doit être inférieur ou égal à salaire_max")
+        if None not in (filters.embauche_min, filters.embauche_max) and filters.embauche_min > filters.embauche_max:
+            raise FilterError("date_embauche_min doit être antérieure ou égale à date_embauche_max")
+        return filters
+
+    def relation(self):
+        """Table interrogée : employes_unified, l'archive, les deux (colonne archived_at),
+        ou l'état de l'historique à l'instant as_of (colonne valid_until)"""
+        if self.as_of is not None:
+            # Instant déjà converti en datetime : littéral sûr, et connu du planificateur
+            return HISTORY_RELATION.format(as_of=self.as_of.isoformat(sep=' '))
+        return RELATIONS[self.archived]
+
+    def where(self):
+        """Clause WHERE (sans le mot-clé) et paramètres ; '1=1' sans filtre"""
+        conditions, params = [], []
+        if self.statut:
+            conditions.append("statut = %s")
+            params.append(self.statut)
+        if self.sources:
+            conditions.append("source = ANY(%s)")
+            params.append(self.sources)
+        if self.departements:
+            conditions.append("departement = ANY(%s)")
+            params.append(self.departements)
+        if self.salaire_min is not None:
+            conditions.append("salaire >= %s")
+            params.append(self.salaire_min)
+        if self.salaire_max is not None:
+            conditions.append("salaire <= %s")
+            params.append(self.salaire_max)
+        if self.embauche_min is not None:
+            conditions.append("date_embauche >= %s")
+            params.append(self.embauche_min)
+        if self.embauche_max is not None:
+            conditions.append("date_embauche <= %s")
+            params.append(self.embauche_max)
+        return (' AND '.join(conditions) or '1=1'), params
+
+    def order_by(self):
+        """Clause ORDER BY (sans le mot-clé) : clé whitelistée puis id dans le même sens"""
+        direction = 'DESC' if self.sort.startswith('-') else 'ASC'
+        column = SORT_KEYS[self.sort.lstrip('-')]
+        if column == 'id':
+            return f"id {direction}"
+        return f"{column} {direction}, id {direction}"
+
+    def to_dict(self):
+        """Filtres appliqués, renvoyés dans la réponse"""
+        return {
+            'source': self.sources or None,
+            'departement': self.departements or None,
+            'statut': self.statut,
+            'salaire_min': self.salaire_min,
+            'salaire_max': self.salaire_max,
+            'date_embauche_min': self.embauche_min.isoformat() if self.embauche_min else None,
+            'date_embauche_max': self.embauche_max.isoformat() if self.embauche_max else None,
+            'sort': self.sort,
+            'archived': self.archived,
+            'as_of': self.as_of.isoformat() if self.as_of else None,
+        }
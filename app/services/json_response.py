@@ -0,0 +1,82 @@
+"""Sérialisation JSON des réponses de l'API
+
+- FastJSONProvider : fournisseur JSON de l'application (orjson si installé, sinon json),
+  qui sérialise Decimal en nombre, date/datetime en ISO 8601 et les Employe
+  (models/employe.py) sans conversion préalable en dict par les routes
+- Chemin rapide des listes (?fast=true) : la page est agrégée en un tableau JSON
+  côté base (json_agg) et renvoyée telle quelle ; seule l'enveloppe (success,
+  count, total...) est sérialisée en Python. Même format que FastJSONProvider.
+"""
+import json
+from datetime import date
+from decimal import Decimal
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+from models.employe import Employe
+
+try:
+    import orjson
+except ImportError:  # json de la bibliothèque standard, plus lent
+    orjson = None
+
+
+def to_json_value(obj):
+    """Types non natifs de JSON rencontrés dans les réponses"""
+    if isinstance(obj, Employe):
+        return obj.to_dict()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+
+def dumps_bytes(obj):
+    """JSON compact en UTF-8 (orjson si installé)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=to_json_value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=to_json_value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Fournisseur JSON compact, UTF-8, clés dans l'ordre d'insertion"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+FAST_VALUES = ('1', 'true', 'yes', 'oui')
+
+
+def wants_fast(args):
+    """Chemin rapide demandé par ?fast=true"""
+    return args.get('fast', 'false').lower() in FAST_VALUES
+
+
+def json_agg_query(page_query, order):
+    """Agrège une requête de page en (count, data) : data est le tableau JSON en texte.
+
+    order : ORDER BY de la page, réappliqué dans json_agg (l'ordre d'une sous-requête
+    n'est pas garanti dans l'agrégat). Le cast ::text évite le décodage JSON de psycopg2.
+    """
+    return f"""
+    SELECT COUNT(*) AS count, COALESCE(json_agg(r ORDER BY {order}), '[]')::text AS data
+    FROM ({page_query}) r
+    """
+
+
+def raw_json_body(envelope, data):
+    """Enveloppe sérialisée + champ 'data' déjà en JSON (texte)"""
+    head = json.dumps(envelope, ensure_ascii=False, separators=(',', ':'), default=to_json_value)
+    return f'{head[:-1]},"data":{data}}}' if envelope else f'{{"data":{data}}}'
+
+
+def raw_json_response(envelope, data, status=200):
+    """Réponse compacte dont les lignes sont déjà sérialisées par la base"""
+    return Response(raw_json_body(envelope, data), status=status, mimetype='application/json')
@@ -0,0 +1,139 @@
+"""Métriques Prometheus de l'API Flask"""
+from flask import Response, g, request
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess)
+import functools
+import inspect
+import os
+import time
+
+# Plusieurs workers (uvicorn --workers N) : PROMETHEUS_MULTIPROC_DIR partagé, /metrics agrège
+# les fichiers de tous les processus (jauges : somme des processus vivants)
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+# ========== REQUÊTES HTTP ==========
+
+REQUEST_LATENCY = Histogram(
+    'flask_request_duration_seconds',
+    'Latence des requêtes HTTP par blueprint et route',
+    ['blueprint', 'route', 'method', 'status']
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    'flask_requests_in_progress',
+    'Requêtes HTTP en cours de traitement',
+    ['blueprint', 'route', 'method'],
+    multiprocess_mode='livesum'
+)
+
+# ========== BASES DE DONNÉES ==========
+
+DB_QUERY_LATENCY = Histogram(
+    'db_query_duration_seconds',
+    'Durée des opérations base de données (connexion + requête)',
+    ['database', 'operation']
+)
+
+DB_QUERY_ERRORS = Counter(
+    'db_query_errors_total',
+    'Erreurs des opérations base de données',
+    ['database', 'operation']
+)
+
+DB_CONNECTIONS_IN_USE = Gauge(
+    'db_connections_in_use',
+    'Connexions ouvertes en cours d\'utilisation',
+    ['database'],
+    multiprocess_mode='livesum'
+)
+
+# ========== REGROUPEMENT DES REQUÊTES IDENTIQUES ==========
+
+SINGLE_FLIGHT_EXECUTIONS = Counter(
+    'single_flight_executions_total',
+    'Calculs réellement exécutés par les routes regroupées',
+    ['endpoint']
+)
+
+SINGLE_FLIGHT_SUPPRESSED = Counter(
+    'single_flight_suppressed_total',
+    'Requêtes identiques servies par un calcul déjà en cours (doublons évités)',
+    ['endpoint']
+)
+
+
+def track_db(database):
+    """Décorateur : mesure durée, erreurs et connexions d'une méthode de service (synchrone ou async)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                operation = func.__name__
+                in_use = DB_CONNECTIONS_IN_USE.labels(database)
+                in_use.inc()
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    DB_QUERY_ERRORS.labels(database, operation).inc()
+                    raise
+                finally:
+                    DB_QUERY_LATENCY.labels(database, operation).observe(time.perf_counter() - start)
+                    in_use.dec()
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            operation = func.__name__
+            in_use = DB_CONNECTIONS_IN_USE.labels(database)
+            in_use.inc()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                DB_QUERY_ERRORS.labels(database, operation).inc()
+                raise
+            finally:
+                DB_QUERY_LATENCY.labels(database, operation).observe(time.perf_counter() - start)
+                in_use.dec()
+        return wrapper
+    return decorator
+
+
+def _route_labels():
+    """Labels blueprint/route/méthode de la requête courante"""
+    route = request.url_rule.rule if request.url_rule else 'inconnue'
+    return (request.blueprint or 'app', route, request.method)
+
+
+def init_metrics(app):
+    """Enregistre les hooks de mesure et l'endpoint /metrics"""
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_labels = _route_labels()
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(*g.metrics_labels).inc()
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record_request(exc):
+        labels = g.pop('metrics_labels', None)
+        if labels is None:
+            return
+        status = g.pop('metrics_status', 500)
+        REQUEST_LATENCY.labels(*labels, str(status)).observe(time.perf_counter() - g.pop('metrics_start'))
+        REQUESTS_IN_PROGRESS.labels(*labels).dec()
+
+    @app.route('/metrics')
+    def metrics():
+        """Endpoint Prometheus"""
+        if MULTIPROCESS:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
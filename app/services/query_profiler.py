@@ -0,0 +1,184 @@
+"""Profilage des requêtes SQL : temps d'exécution, requêtes lentes et plans EXPLAIN
+
+Les plans sont capturés en arrière-plan sur une connexion dédiée (la requête lente n'est
+pas ralentie) ; les paramètres ne sont conservés que sous forme de types et longueurs.
+"""
+from datetime import datetime
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+
+# Normalisation : commentaires, littéraux et paramètres remplacés par '?'
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMS = re.compile(r'%\(\w+\)s|%s')
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACES = re.compile(r'\s+')
+# Écritures (WITH ... UPDATE/DELETE/INSERT ... RETURNING) et verrous (SELECT ... FOR UPDATE)
+_WRITES = re.compile(r'\b(?:INSERT|UPDATE|DELETE|MERGE)\b', re.I)
+# Paramètres décrits dans un échantillon (listes IN longues tronquées)
+_MAX_PARAMS = 20
+
+
+def normalize_sql(query):
+    """Forme canonique d'une requête (sans valeurs) pour agréger les exécutions"""
+    sql = _COMMENTS.sub(' ', query)
+    sql = _STRINGS.sub('?', sql)
+    sql = _PARAMS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _IN_LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def describe_params(params):
+    """Types (et longueurs) des paramètres, sans leurs valeurs (recherches, emails, noms)"""
+    def describe(value):
+        if isinstance(value, (str, bytes, list, tuple)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(params, dict):
+        return {key: describe(value) for key, value in list(params.items())[:_MAX_PARAMS]}
+    params = list(params)
+    described = [describe(value) for value in params[:_MAX_PARAMS]]
+    if len(params) > _MAX_PARAMS:
+        described.append(f"... (+{len(params) - _MAX_PARAMS})")
+    return described
+
+
+class QueryProfiler:
+    """Chronomètre chaque requête, garde le top-N des plus lentes et capture leur plan"""
+
+    def __init__(self, threshold_ms=100, top_n=20, explain=True, explain_cooldown_s=300):
+        self.threshold_ms = threshold_ms
+        self.top_n = top_n
+        self.explain = explain
+        self.explain_cooldown_s = explain_cooldown_s
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._stats = {}    # requête normalisée -> agrégats
+        self._slowest = []  # tas min (durée, seq, échantillon) limité à top_n
+        self._plans = {}    # requête normalisée -> dernier plan capturé
+        self._capturing = set()  # requêtes normalisées dont le plan est en cours de capture
+
+    @classmethod
+    def from_env(cls):
+        """Configuration via les variables SLOW_QUERY_*"""
+        return cls(
+            threshold_ms=float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100')),
+            top_n=int(os.getenv('SLOW_QUERY_TOP_N', '20')),
+            explain=os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true',
+            explain_cooldown_s=float(os.getenv('SLOW_QUERY_EXPLAIN_COOLDOWN_S', '300'))
+        )
+
+    def record(self, query, params, duration_ms):
+        """Enregistre une exécution ; retourne True si la requête dépasse le seuil"""
+        normalized = normalize_sql(query)
+        is_slow = duration_ms >= self.threshold_ms
+
+        with self._lock:
+            stat = self._stats.setdefault(normalized, {
+                'query': normalized, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'slow_calls': 0
+            })
+            stat['calls'] += 1
+            stat['total_ms'] += duration_ms
+            stat['max_ms'] = max(stat['max_ms'], duration_ms)
+
+            if is_slow:
+                stat['slow_calls'] += 1
+                sample = {
+                    'query': normalized,
+                    'duration_ms': round(duration_ms, 2),
+                    'params': describe_params(params) if params else None,
+                    'at': datetime.now().isoformat(timespec='seconds')
+                }
+                entry = (duration_ms, next(self._seq), sample)
+                if len(self._slowest) < self.top_n:
+                    heapq.heappush(self._slowest, entry)
+                elif duration_ms > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+        return is_slow
+
+    def should_explain(self, query):
+        """EXPLAIN ANALYZE réexécute la requête : lectures seulement, au plus une fois par période.
+
+        Retourne True à un seul appelant : la requête est alors marquée en cours de capture
+        jusqu'à la fin de capture_plan_async (les exécutions lentes concurrentes l'ignorent).
+        """
+        if not self.explain:
+            return False
+        normalized = normalize_sql(query)
+        if not normalized.lstrip('(').upper().startswith(('SELECT', 'WITH')) or _WRITES.search(normalized):
+            return False
+        with self._lock:
+            captured = self._plans.get(normalized)
+            if normalized in self._capturing or (
+                    captured is not None and time.time() - captured['captured_at'] < self.explain_cooldown_s):
+                return False
+            self._capturing.add(normalized)
+            return True
+
+    def capture_plan_async(self, connect, query, params):
+        """Capture EXPLAIN (ANALYZE, BUFFERS) en arrière-plan sur une nouvelle connexion (connect())"""
+        normalized = normalize_sql(query)
+
+        def run():
+            conn = None
+            try:
+                conn = connect()
+                cursor = conn.cursor()
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+                plan = cursor.fetchone()[0]
+                cursor.close()
+            except Exception as e:
+                plan = {'erreur': str(e)}
+            finally:
+                if conn:
+                    conn.close()
+
+            with self._lock:
+                self._capturing.discard(normalized)
+                self._plans[normalized] = {
+                    'plan': plan,
+                    'at': datetime.now().isoformat(timespec='seconds'),
+                    'captured_at': time.time()
+                }
+
+        threading.Thread(target=run, name='explain-capture', daemon=True).start()
+
+    def snapshot(self):
+        """Etat courant : top-N des exécutions lentes et agrégats par requête"""
+        with self._lock:
+            slowest = [dict(sample) for _, _, sample in sorted(self._slowest, reverse=True)]
+            statements = sorted(
+                (dict(s, avg_ms=round(s['total_ms'] / s['calls'], 2), total_ms=round(s['total_ms'], 2))
+                 for s in self._stats.values()),
+                key=lambda s: s['total_ms'], reverse=True
+            )
+            plans = {q: {'plan': p['plan'], 'at': p['at']} for q, p in self._plans.items()}
+
+        for sample in slowest:
+            sample['explain'] = plans.get(sample['query'])
+
+        return {
+            'threshold_ms': self.threshold_ms,
+            'top_n': self.top_n,
+            'slowest': slowest,
+            'statements': statements
+        }
+
+    def reset(self):
+        """Vide les mesures collectées"""
+        with self._lock:
+            self._stats.clear()
+            self._slowest.clear()
+            self._plans.clear()
+
+
+# Instance partagée par toutes les instances de DatabaseService
+query_profiler = QueryProfiler.from_env()
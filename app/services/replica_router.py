@@ -0,0 +1,122 @@
+"""Routage des lectures de la base cible vers des réplicas PostgreSQL
+
+- Réplicas déclarés par POSTGRES_REPLICA_DSNS (DSN ou URI séparés par des virgules),
+  essayés à tour de rôle pour les lectures (DatabaseService.get_connection(read_only=True))
+- Réplica injoignable : écarté pendant REPLICA_RETRY_S secondes, la lecture passe
+  au réplica suivant puis au primaire
+- Lecture de ses écritures : après une écriture de l'API, les lectures restent sur le
+  primaire pendant READ_YOUR_WRITES_S secondes (retard de réplication)
+- Sans réplica configuré, tout passe par le primaire
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+
+def replica_name(dsn):
+    """Nom affiché d'un réplica (hôte:port, sans identifiants)"""
+    try:
+        params = psycopg2.extensions.parse_dsn(dsn)
+    except psycopg2.ProgrammingError:
+        return 'replica'
+    return f"{params.get('host', 'localhost')}:{params.get('port', '5432')}"
+
+
+class ReplicaRouter:
+    """Choix de la connexion des lectures : réplica sain, sinon primaire"""
+
+    def __init__(self, dsns=None, retry_s=30, read_your_writes_s=5, connect_timeout=2):
+        self.dsns = [d for d in (dsns or []) if d]
+        self.retry_s = retry_s
+        self.read_your_writes_s = read_your_writes_s
+        self.connect_timeout = connect_timeout
+        self._lock = threading.Lock()
+        self._down_until = {}   # dsn -> instant (monotonic) de la prochaine tentative
+        self._last_error = {}   # dsn -> dernière erreur de connexion
+        self._last_write = None
+        self._cycle = itertools.cycle(range(len(self.dsns))) if self.dsns else None
+
+    @classmethod
+    def from_env(cls):
+        """Configuration via les variables POSTGRES_REPLICA_DSNS, REPLICA_* et READ_YOUR_WRITES_S"""
+        return cls(
+            dsns=[d.strip() for d in os.getenv('POSTGRES_REPLICA_DSNS', '').split(',')],
+            retry_s=float(os.getenv('REPLICA_RETRY_S', '30')),
+            read_your_writes_s=float(os.getenv('READ_YOUR_WRITES_S', '5')),
+            connect_timeout=int(os.getenv('REPLICA_CONNECT_TIMEOUT', '2'))
+        )
+
+    def mark_write(self):
+        """Écriture validée sur le primaire : ouvre la fenêtre de lecture de ses écritures"""
+        with self._lock:
+            self._last_write = time.monotonic()
+
+    def in_write_window(self):
+        with self._lock:
+            last_write = self._last_write
+        return last_write is not None and time.monotonic() - last_write < self.read_your_writes_s
+
+    def candidates(self):
+        """Réplicas disponibles pour une lecture, en commençant par le suivant du tourniquet.
+
+        Liste vide sans réplica ou pendant la fenêtre de lecture de ses écritures.
+        """
+        if not self.dsns or self.in_write_window():
+            return []
+        now = time.monotonic()
+        with self._lock:
+            start = next(self._cycle)
+            order = self.dsns[start:] + self.dsns[:start]
+            return [dsn for dsn in order if self._down_until.get(dsn, 0) <= now]
+
+    def mark_down(self, dsn, error):
+        """Réplica injoignable : écarté pendant retry_s secondes"""
+        with self._lock:
+            self._down_until[dsn] = time.monotonic() + self.retry_s
+            self._last_error[dsn] = str(error).strip()
+        logger.warning(f"Réplica {replica_name(dsn)} injoignable, écarté {self.retry_s:.0f}s : {error}")
+
+    def mark_up(self, dsn):
+        with self._lock:
+            self._down_until.pop(dsn, None)
+            self._last_error.pop(dsn, None)
+
+    def connect(self, connect_primary):
+        """Connexion de lecture : premier réplica joignable, sinon connect_primary()"""
+        for dsn in self.candidates():
+            try:
+                conn = psycopg2.connect(dsn, connect_timeout=self.connect_timeout, client_encoding='utf8')
+            except psycopg2.OperationalError as e:
+                self.mark_down(dsn, e)
+                continue
+            self.mark_up(dsn)
+            return conn
+
+        return connect_primary()
+
+    def status(self):
+        """État des réplicas et de la fenêtre de lecture de ses écritures"""
+        now = time.monotonic()
+        with self._lock:
+            replicas = [{
+                'replica': replica_name(dsn),
+                'healthy': self._down_until.get(dsn, 0) <= now,
+                'retry_in_s': round(max(self._down_until.get(dsn, 0) - now, 0), 1),
+                'last_error': self._last_error.get(dsn)
+            } for dsn in self.dsns]
+        return {
+            'replicas': replicas,
+            'read_your_writes_s': self.read_your_writes_s,
+            'reads_on_primary': not any(r['healthy'] for r in replicas) or self.in_write_window()
+        }
+
+
+# Instance partagée : la fenêtre de lecture de ses écritures couvre tous les services de la cible,
+# dans ce processus seulement (un worker ASGI par défaut, voir asgi.py)
+replica_router = ReplicaRouter.from_env()
@@ -0,0 +1,86 @@
+"""Regroupement des requêtes identiques concurrentes (single-flight)
+
+Quand plusieurs requêtes identiques (même route, mêmes paramètres) arrivent pendant
+qu'un calcul est en cours, elles attendent ce calcul et partagent son résultat (ou
+son erreur) au lieu de relancer les mêmes agrégats. Rien n'est mis en cache : une
+requête arrivée après la fin du calcul en relance un.
+
+- SingleFlight : threads (application Flask)
+- AsyncSingleFlight : asyncio (mode ASGI, asgi.py)
+Compteurs Prometheus : single_flight_executions_total, single_flight_suppressed_total.
+"""
+import asyncio
+import threading
+
+from services.metrics_service import SINGLE_FLIGHT_EXECUTIONS, SINGLE_FLIGHT_SUPPRESSED
+
+
+def request_key(path, args):
+    """Clé d'une requête : route et paramètres (ordre des paramètres indifférent)"""
+    return (path, tuple(sorted(args.items(multi=True))))
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Un seul calcul en cours par clé ; les appels concurrents en attendent le résultat"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT_SUPPRESSED.labels(key[0]).inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLE_FLIGHT_EXECUTIONS.labels(key[0]).inc()
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Version asyncio : les requêtes concurrentes attendent la même tâche"""
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, coro_fn):
+        task = self._tasks.get(key)
+        if task is not None:
+            SINGLE_FLIGHT_SUPPRESSED.labels(key[0]).inc()
+            # shield : l'annulation d'un client n'annule pas le calcul partagé
+            return await asyncio.shield(task)
+
+        SINGLE_FLIGHT_EXECUTIONS.labels(key[0]).inc()
+        task = self._tasks[key] = asyncio.ensure_future(coro_fn())
+        task.add_done_callback(lambda done: self._tasks.pop(key) if self._tasks.get(key) is done else None)
+        return await asyncio.shield(task)
+
+
+# Instance partagée par les routes Flask
+single_flight = SingleFlight()
@@ -2,6 +2,10 @@
 import pymysql
 import psycopg2
 from datetime import datetime
+from services.metrics_service import track_db
+from services.count_cache import count_cache
+from services.json_response import json_agg_query
+from models.employe import EmployeCursor, EmployeMySQLCursor
 import os
 
 class SourceDatabaseService:
@@ -31,12 +35,13 @@ class SourceDatabaseService:
     
     # ========== MYSQL ==========
     
+    @track_db('mysql_source')
     def get_mysql_employees(self, limit=200, offset=0):
         """Récupère les employés de MySQL source"""
         conn = None
         try:
             conn = pymysql.connect(**self.mysql_config)
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor = conn.cursor(EmployeMySQLCursor)
             
             query = """
             SELECT id, nom, email, departement, salaire, date_embauche, last_updated
@@ -49,7 +54,7 @@ class SourceDatabaseService:
             results = cursor.fetchall()
             cursor.close()
             
-            return [dict(row) for row in results]
+            return list(results)
             
         except Exception as e:
             raise Exception(f"Erreur MySQL : {str(e)}")
@@ -57,19 +62,20 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('mysql_source')
     def get_mysql_employee_by_id(self, employee_id):
         """Récupère un employé MySQL par ID"""
         conn = None
         try:
             conn = pymysql.connect(**self.mysql_config)
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor = conn.cursor(EmployeMySQLCursor)
             
             query = "SELECT * FROM employes_mysql WHERE id = %s"
             cursor.execute(query, (employee_id,))
             result = cursor.fetchone()
             cursor.close()
             
-            return dict(result) if result else None
+            return result
             
         except Exception as e:
             raise Exception(f"Erreur MySQL : {str(e)}")
@@ -77,6 +83,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('mysql_source')
     def add_to_mysql(self, data):
         """Ajoute un employé dans MySQL source"""
         conn = None
@@ -117,6 +124,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('mysql_source')
     def update_mysql_employee(self, employee_id, data):
         """Met à jour un employé dans MySQL source"""
         conn = None
@@ -172,6 +180,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('mysql_source')
     def delete_mysql_employee(self, employee_id):
         """Supprime un employé de MySQL source"""
         conn = None
@@ -193,6 +202,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('mysql_source')
     def get_mysql_count(self):
         """Compte les employés dans MySQL"""
         conn = None
@@ -207,14 +217,37 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('mysql_source')
+    def get_mysql_estimate(self):
+        """Nombre de lignes estimé par InnoDB (statistiques de table, sans parcours)"""
+        conn = None
+        try:
+            conn = pymysql.connect(**self.mysql_config)
+            cursor = conn.cursor()
+            cursor.execute("""
+            SELECT TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'employes_mysql'
+            """)
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0]) if row and row[0] is not None else None
+        finally:
+            if conn:
+                conn.close()
+    
+    def get_mysql_total(self):
+        """Total MySQL : exact sous le seuil, sinon cache ou estimation"""
+        return count_cache.total(('employes_mysql',), self.get_mysql_estimate, self.get_mysql_count)
+    
     # ========== POSTGRESQL ==========
     
+    @track_db('postgres_source')
     def get_postgresql_employees(self, limit=200, offset=0):
         """Récupère les employés de PostgreSQL source"""
         conn = None
         try:
             conn = psycopg2.connect(**self.postgres_config)
-            cursor = conn.cursor()
+            cursor = conn.cursor(cursor_factory=EmployeCursor)
             
             query = """
             SELECT id, nom, email, departement, salaire, date_embauche, last_updated
@@ -224,8 +257,7 @@ class SourceDatabaseService:
             """
             
             cursor.execute(query, (limit, offset))
-            columns = [desc[0] for desc in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            results = cursor.fetchall()
             cursor.close()
             
             return results
@@ -236,20 +268,20 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('postgres_source')
     def get_postgresql_employee_by_id(self, employee_id):
         """Récupère un employé PostgreSQL par ID"""
         conn = None
         try:
             conn = psycopg2.connect(**self.postgres_config)
-            cursor = conn.cursor()
+            cursor = conn.cursor(cursor_factory=EmployeCursor)
             
             query = "SELECT * FROM employes_source WHERE id = %s"
             cursor.execute(query, (employee_id,))
-            columns = [desc[0] for desc in cursor.description]
             result = cursor.fetchone()
             cursor.close()
             
-            return dict(zip(columns, result)) if result else None
+            return result
             
         except Exception as e:
             raise Exception(f"Erreur PostgreSQL : {str(e)}")
@@ -257,6 +289,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('postgres_source')
     def add_to_postgresql(self, data):
         """Ajoute un employé dans PostgreSQL source"""
         conn = None
@@ -298,6 +331,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('postgres_source')
     def update_postgresql_employee(self, employee_id, data):
         """Met à jour un employé dans PostgreSQL source"""
         conn = None
@@ -353,6 +387,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('postgres_source')
     def delete_postgresql_employee(self, employee_id):
         """Supprime un employé de PostgreSQL source"""
         conn = None
@@ -374,6 +409,7 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
     
+    @track_db('postgres_source')
     def get_postgresql_count(self):
         """Compte les employés dans PostgreSQL"""
         conn = None
@@ -388,7 +424,53 @@ class SourceDatabaseService:
             if conn:
                 conn.close()
 
-                # ========== CSV ==========
+    @track_db('postgres_source')
+    def get_postgresql_employees_json(self, limit=200, offset=0):
+        """Page d'employés sérialisée par PostgreSQL : (count, texte JSON)"""
+        conn = None
+        try:
+            conn = psycopg2.connect(**self.postgres_config)
+            cursor = conn.cursor()
+            
+            query = """
+            SELECT id, nom, email, departement, salaire, date_embauche, last_updated
+            FROM employes_source
+            ORDER BY id ASC
+            LIMIT %s OFFSET %s
+            """
+            
+            cursor.execute(json_agg_query(query, 'id ASC'), (limit, offset))
+            count, data = cursor.fetchone()
+            cursor.close()
+            
+            return count, data
+            
+        except Exception as e:
+            raise Exception(f"Erreur PostgreSQL : {str(e)}")
+        finally:
+            if conn:
+                conn.close()
+    
+    @track_db('postgres_source')
+    def get_postgresql_estimate(self):
+        """Nombre de lignes estimé (pg_class.reltuples, None si la table n'a jamais été analysée)"""
+        conn = None
+        try:
+            conn = psycopg2.connect(**self.postgres_config)
+            cursor = conn.cursor()
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = 'employes_source'::regclass")
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0]) if row and row[0] >= 0 else None
+        finally:
+            if conn:
+                conn.close()
+    
+    def get_postgresql_total(self):
+        """Total PostgreSQL : exact sous le seuil, sinon cache ou estimation"""
+        return count_cache.total(('employes_source',), self.get_postgresql_estimate, self.get_postgresql_count)
+
+    # ========== CSV ==========
     
     def get_csv_count(self):
         """Compte le nombre d'employés dans le fichier CSV"""
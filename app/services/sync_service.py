@@ -0,0 +1,211 @@
+"""Synchronisation ciblée de quelques emails vers employes_unified (sans run du DAG)
+
+Mêmes règles que le DAG etl_employe (dags/etl_engines.py) :
+- fusion : source la plus prioritaire, puis last_updated le plus récent ; priorité du
+  dernier chargement du DAG (table etl_settings), ETL_MERGE_PRIORITY avant le premier run
+- comparaison sur l'email normalisé (trim + minuscules), tous statuts confondus
+- update si nom / département (normalisés), salaire (écart > 0.01), date d'embauche
+  changent ou si la ligne est inactive (réactivation)
+- soft delete si l'email n'existe plus dans aucune source (les trois sources lues,
+  synchronisation annulée sinon)
+"""
+import csv
+import json
+import os
+from datetime import date, datetime
+
+import psycopg2
+import pymysql
+from psycopg2.extras import RealDictCursor
+
+from services.db_service import DatabaseService
+from services.metrics_service import track_db
+from services.replica_router import replica_router
+from services.source_db_service import SourceDatabaseService
+
+SALAIRE_TOLERANCE = 0.01
+CSV_PATHS = [
+    os.getenv('CSV_FILE_PATH'),
+    '/data/data.csv',
+    os.path.join(os.getcwd(), 'data', 'data.csv'),
+    '/app/data/data.csv',
+]
+
+
+def normalize(value):
+    """Chaîne comparée (trim + minuscules, vide si absente)"""
+    return '' if value is None else str(value).strip().lower()
+
+
+def to_date(value):
+    """Date d'embauche (date, datetime ou chaîne ISO) -> date, None si absente ou invalide"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value).strip()[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def to_salaire(value):
+    try:
+        return float(value) if value not in (None, '') else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class SyncService:
+    """Réconcilie une liste d'emails entre les sources et employes_unified"""
+
+    def __init__(self):
+        self.sources = SourceDatabaseService()
+        self.target = DatabaseService()
+        self.default_priority = [p.strip() for p in os.getenv('ETL_MERGE_PRIORITY', 'postgresql,mysql,csv').split(',')
+                                 if p.strip()]
+
+    def merge_priority(self):
+        """Priorité appliquée par le dernier chargement du DAG : une seule règle pour les deux
+        chemins d'écriture, sans quoi chacun rétablirait sa source à chaque passage"""
+        try:
+            row = self.target.execute_query(
+                "SELECT value FROM etl_settings WHERE name = 'merge_priority'", fetch_one=True)
+        except Exception:
+            row = None  # table absente (base antérieure) : ETL_MERGE_PRIORITY
+        return json.loads(row['value']) if row else self.default_priority
+
+    # ========== LECTURE DES SOURCES ==========
+
+    def read_mysql(self, keys):
+        conn = pymysql.connect(**self.sources.mysql_config)
+        try:
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            # Email normalisé comme la fusion du DAG (espaces et casse) : index fonctionnel
+            # idx_email_normalized (scripts/sql/mysql-source-init.sql)
+            cursor.execute(
+                "SELECT id, nom, email, departement, salaire, date_embauche, last_updated "
+                f"FROM employes_mysql WHERE LOWER(TRIM(email)) IN ({','.join(['%s'] * len(keys))})", keys)
+            rows = [dict(r, source='mysql') for r in cursor.fetchall()]
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def read_postgresql(self, keys):
+        conn = psycopg2.connect(**self.sources.postgres_config)
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute(
+                "SELECT id, nom, email, departement, salaire, date_embauche, last_updated "
+                "FROM employes_source WHERE LOWER(TRIM(email)) = ANY(%s)", (keys,))
+            rows = [dict(r, source='postgresql') for r in cursor.fetchall()]
+            cursor.close()
+            return rows
+        finally:
+            conn.close()
+
+    def read_csv(self, keys):
+        csv_file = next((p for p in CSV_PATHS if p and os.path.exists(p)), None)
+        if not csv_file:
+            # Source illisible : ses emails passeraient pour supprimés (soft delete à tort)
+            raise Exception("Fichier CSV source introuvable (CSV_FILE_PATH) : synchronisation annulée")
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            return [
+                {'id': row.get('id') or None, 'nom': row.get('nom'), 'email': row.get('email'),
+                 'departement': row.get('departement'), 'salaire': row.get('salaire'),
+                 'date_embauche': row.get('date_embauche'), 'last_updated': None, 'source': 'csv'}
+                for row in csv.DictReader(f) if normalize(row.get('email')) in keys
+            ]
+
+    def winners(self, rows, priority):
+        """Ligne retenue par email normalisé (priorité des sources, puis last_updated le plus récent)"""
+        rank = {source: i for i, source in enumerate(priority)}
+        best = {}
+        for row in rows:
+            key = normalize(row['email'])
+            updated = row.get('last_updated')
+            order = (rank.get(row['source'], len(rank)), -updated.timestamp() if updated else float('inf'))
+            if key and (key not in best or order < best[key][0]):
+                best[key] = (order, row)
+        return {key: row for key, (_, row) in best.items()}
+
+    # ========== COMPARAISON ==========
+
+    @staticmethod
+    def changed(existing, row):
+        """Mêmes critères que compare_and_prepare"""
+        return any([
+            normalize(existing['nom']) != normalize(row['nom']),
+            normalize(existing['departement']) != normalize(row['departement']),
+            abs(to_salaire(existing['salaire']) - to_salaire(row['salaire'])) > SALAIRE_TOLERANCE,
+            to_date(existing['date_embauche']) != to_date(row['date_embauche']),
+            existing['statut'] == 'inactif',
+        ])
+
+    @track_db('target')
+    def sync_emails(self, emails):
+        """Applique à employes_unified l'état courant des sources pour ces emails.
+
+        Retourne une action par email : insert, update, soft_delete ou unchanged.
+        """
+        keys = sorted({normalize(e) for e in emails} - {''})
+        if not keys:
+            return []
+
+        # Une source illisible lève une exception : pas de soft delete sans les trois sources lues
+        rows = self.read_mysql(keys) + self.read_postgresql(keys) + self.read_csv(set(keys))
+        winners = self.winners(rows, self.merge_priority())
+
+        conn = self.target.get_connection()
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            # Index idx_email_normalized : même clé que la comparaison du DAG
+            cursor.execute("SELECT * FROM employes_unified WHERE LOWER(TRIM(email)) = ANY(%s) FOR UPDATE", (keys,))
+            existing = {normalize(r['email']): r for r in cursor.fetchall()}
+
+            report = []
+            for key in keys:
+                row, current = winners.get(key), existing.get(key)
+                if row is None:
+                    action = 'unchanged'
+                    if current is not None and current['statut'] == 'actif':
+                        cursor.execute("UPDATE employes_unified SET statut = 'inactif', updated_at = NOW() "
+                                       "WHERE id = %s", (current['id'],))
+                        action = 'soft_delete'
+                elif current is None:
+                    cursor.execute("""
+                        INSERT INTO employes_unified
+                        (source, source_id, nom, email, departement, salaire, date_embauche, statut, updated_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, 'actif', NOW())
+                    """, (row['source'], row['id'], row['nom'], str(row['email']).strip(), row['departement'],
+                          to_salaire(row['salaire']), to_date(row['date_embauche'])))
+                    action = 'insert'
+                elif self.changed(current, row):
+                    cursor.execute("""
+                        UPDATE employes_unified
+                        SET nom = %s, departement = %s, salaire = %s, date_embauche = %s,
+                            statut = 'actif', updated_at = NOW()
+                        WHERE id = %s
+                    """, (row['nom'], row['departement'], to_salaire(row['salaire']),
+                          to_date(row['date_embauche']), current['id']))
+                    action = 'update'
+                else:
+                    action = 'unchanged'
+                report.append({'email': key, 'action': action, 'source': row['source'] if row else None})
+
+            written = [r['email'] for r in report if r['action'] != 'unchanged']
+            if written:
+                self.target.record_history(conn, emails=written)
+            conn.commit()
+            if written:
+                replica_router.mark_write()
+            cursor.close()
+            return report
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Erreur synchronisation ciblée : {str(e)}")
+        finally:
+            conn.close()
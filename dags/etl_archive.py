@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Archivage des employés inactifs (tâche archive_inactive du DAG, scripts/archive_inactive.py)
+- Lignes 'inactif' dont updated_at (date du soft delete) dépasse la rétention,
+  déplacées de employes_unified vers employes_unified_archive
+- Petits lots, chacun dans sa propre transaction (DELETE ... RETURNING puis INSERT) :
+  verrous de ligne seulement, tenus le temps d'un lot
+- Lignes verrouillées par une autre transaction ignorées (SKIP LOCKED), lock_timeout
+  court sur la table, pause entre deux lots pour laisser passer la charge
+- Réactivation : trigger employes_unified_unarchive (scripts/sql/migrations/004_employes_archive.sql)
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLE = 'employes_unified_archive'
+ARCHIVE_COLUMNS = ("id, source, source_id, nom, email, departement, salaire, date_embauche, "
+                   "statut, created_at, updated_at")
+
+# Un lot : inactifs les plus anciens (index partiel idx_employes_inactif_updated)
+ARCHIVE_BATCH_SQL = f"""
+    WITH batch AS (
+        SELECT id FROM employes_unified
+        WHERE statut = 'inactif' AND updated_at < NOW() - %(retention_days)s * INTERVAL '1 day'
+        ORDER BY updated_at, id
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM employes_unified e
+        USING batch
+        WHERE e.id = batch.id AND e.statut = 'inactif'
+        RETURNING e.*
+    )
+    INSERT INTO {ARCHIVE_TABLE} ({ARCHIVE_COLUMNS}, archived_at)
+    SELECT {ARCHIVE_COLUMNS}, NOW() FROM moved
+"""
+
+# Lots successifs annulés par lock_timeout avant abandon du run
+MAX_LOCK_RETRIES = 5
+
+ELIGIBLE_SQL = """
+    SELECT COUNT(*) FROM employes_unified
+    WHERE statut = 'inactif' AND updated_at < NOW() - %(retention_days)s * INTERVAL '1 day'
+"""
+
+
+def archive_ready(conn) -> bool:
+    """Table d'archive présente (postgres-target-init.sql ou migration 004)"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (ARCHIVE_TABLE,))
+        ready = cur.fetchone()[0]
+    conn.rollback()
+    return ready
+
+
+def count_eligible(conn, retention_days: float) -> int:
+    """Nombre de lignes inactives au-delà de la rétention (simulation)"""
+    with conn.cursor() as cur:
+        cur.execute(ELIGIBLE_SQL, {'retention_days': retention_days})
+        count = cur.fetchone()[0]
+    conn.rollback()
+    return count
+
+
+def archive_inactive(conn, retention_days: float, batch_size: int = 500, pause_s: float = 0.2,
+                     max_batches: Optional[int] = None, lock_timeout_ms: int = 2000) -> Dict[str, Any]:
+    """Archive par lots les inactifs plus anciens que retention_days.
+
+    S'arrête quand un lot est incomplet (plus rien à archiver) ou après max_batches lots.
+    Un lot qui dépasse lock_timeout_ms est annulé puis retenté après la pause
+    (abandon après MAX_LOCK_RETRIES échecs consécutifs).
+    """
+    archived, batches, lock_timeouts, retries = 0, 0, 0, 0
+    started = time.perf_counter()
+    params = {'retention_days': retention_days, 'batch_size': batch_size}
+
+    while max_batches is None or batches < max_batches:
+        batches += 1
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL lock_timeout = %s", (f"{int(lock_timeout_ms)}ms",))
+                cur.execute(ARCHIVE_BATCH_SQL, params)
+                moved = cur.rowcount
+            conn.commit()
+        except psycopg2.errors.LockNotAvailable as e:
+            conn.rollback()
+            lock_timeouts += 1
+            retries += 1
+            if retries >= MAX_LOCK_RETRIES:
+                logger.warning(f"Lot {batches} : verrou non obtenu {retries} fois de suite, archivage interrompu")
+                break
+            logger.warning(f"Lot {batches} : verrou non obtenu en {lock_timeout_ms} ms, nouvel essai ({e})")
+            time.sleep(pause_s)
+            continue
+        except Exception:
+            conn.rollback()
+            raise
+
+        retries = 0
+        archived += moved
+        logger.info(f"Lot {batches} : {moved} lignes archivées (total {archived})")
+        if moved < batch_size:
+            break
+        time.sleep(pause_s)
+
+    return {
+        'archived': archived,
+        'batches': batches,
+        'lock_timeouts': lock_timeouts,
+        'duration_s': round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Checksums par bucket pour la réconciliation sources / cible (mode 'checksum')
+- Chaque ligne est rangée dans un bucket : MD5 de l'email normalisé modulo N
+- Empreinte d'un bucket : nombre de lignes et somme des MD5 (tronqués à 60 bits) des lignes normalisées
+- Calcul dans les bases (GROUP BY) : seuls N couples (nombre, somme) transitent par le réseau
+- Même empreinte en Python pour le CSV, identique octet pour octet aux expressions SQL
+- La somme ne dépend pas de l'ordre des lignes : pas de tri ni d'agrégation de chaînes côté base
+- Empreintes du dernier chargement réussi sérialisées en JSON (table etl_bucket_checksums)
+"""
+import hashlib
+import json
+from typing import Dict, List, Tuple, Iterable
+
+import pandas as pd
+
+# Empreinte d'un bucket : (nombre de lignes, somme des hash de lignes)
+BucketChecksums = Dict[int, Tuple[int, int]]
+
+# Champs comparés, normalisés comme dans compare (casse, espaces) ; salaire absent chargé à 0.00
+ROW_FIELDS = {
+    'mysql': ("LOWER(TRIM(email))", "LOWER(TRIM(COALESCE(nom, '')))", "LOWER(TRIM(COALESCE(departement, '')))",
+              "CAST(CAST(COALESCE(salaire, 0) AS DECIMAL(12,2)) AS CHAR)", "COALESCE(CAST(date_embauche AS CHAR), '')"),
+    'postgres': ("LOWER(TRIM(email))", "LOWER(TRIM(COALESCE(nom, '')))", "LOWER(TRIM(COALESCE(departement, '')))",
+                 "COALESCE(salaire, 0)::numeric(12,2)::text", "COALESCE(date_embauche::text, '')"),
+}
+
+# Premiers chiffres hexadécimaux d'un MD5 convertis en entier positif
+HEX_TO_INT = {
+    'mysql': "CAST(CONV(SUBSTRING({expr}, 1, {digits}), 16, 10) AS UNSIGNED)",
+    'postgres': "('x' || SUBSTR({expr}, 1, {digits}))::bit({bits})::bigint",
+}
+
+BUCKET_DIGITS = 8
+ROW_DIGITS = 15
+
+
+def hex_to_int_sql(db_type: str, expr: str, digits: int) -> str:
+    return HEX_TO_INT[db_type].format(expr=expr, digits=digits, bits=digits * 4)
+
+
+def bucket_sql(db_type: str, bucket_count: int) -> str:
+    """Expression SQL du bucket d'une ligne (colonne email)"""
+    # MOD() plutôt que % : les requêtes paramétrées (psycopg2, MySQLdb) interprètent les %
+    return f"MOD({hex_to_int_sql(db_type, 'MD5(LOWER(TRIM(email)))', BUCKET_DIGITS)}, {int(bucket_count)})"
+
+
+def row_hash_sql(db_type: str) -> str:
+    """Expression SQL du hash d'une ligne normalisée"""
+    fields = ', '.join(ROW_FIELDS[db_type])
+    return hex_to_int_sql(db_type, f"MD5(CONCAT_WS('|', {fields}))", ROW_DIGITS)
+
+
+def checksum_query(db_type: str, table: str, bucket_count: int, where: str = '') -> str:
+    """Requête d'agrégation : une ligne (bucket, n, checksum) par bucket non vide"""
+    conditions = ["email IS NOT NULL", "TRIM(email) <> ''"] + ([where] if where else [])
+    return (f"SELECT {bucket_sql(db_type, bucket_count)} AS bucket, COUNT(*) AS n, "
+            f"SUM({row_hash_sql(db_type)}) AS checksum FROM {table} "
+            f"WHERE {' AND '.join(conditions)} GROUP BY 1")
+
+
+def read_checksums(df: pd.DataFrame) -> BucketChecksums:
+    """Résultat de checksum_query -> {bucket: (n, checksum)} (sommes DECIMAL/NUMERIC converties en int)"""
+    return {int(b): (int(n), int(c)) for b, n, c in zip(df['bucket'], df['n'], df['checksum'])}
+
+
+def md5_int(value: str, digits: int) -> int:
+    return int(hashlib.md5(value.encode('utf-8')).hexdigest()[:digits], 16)
+
+
+def normalized_email(email) -> str:
+    return '' if email is None or pd.isna(email) else str(email).strip().lower()
+
+
+def email_bucket(email, bucket_count: int) -> int:
+    """Bucket d'un email, identique à bucket_sql"""
+    return md5_int(normalized_email(email), BUCKET_DIGITS) % bucket_count
+
+
+def row_hash(email, nom, departement, salaire, date_embauche) -> int:
+    """Hash d'une ligne normalisée, identique à row_hash_sql"""
+    def text(v):
+        return '' if v is None or pd.isna(v) else str(v).strip().lower()
+    salaire = 0.0 if salaire is None or pd.isna(salaire) else float(salaire)
+    date = '' if date_embauche is None or pd.isna(date_embauche) else pd.Timestamp(date_embauche).strftime('%Y-%m-%d')
+    value = '|'.join([normalized_email(email), text(nom), text(departement), f"{salaire:.2f}", date])
+    return md5_int(value, ROW_DIGITS)
+
+
+def frame_checksums(df: pd.DataFrame, bucket_count: int) -> BucketChecksums:
+    """Empreintes par bucket d'un DataFrame au format des extractions (CSV)"""
+    sums: Dict[int, List[int]] = {}
+    for email, nom, dep, sal, date in zip(df['email'], df['nom'], df['departement'], df['salaire'], df['date_embauche']):
+        if not normalized_email(email):
+            continue
+        entry = sums.setdefault(email_bucket(email, bucket_count), [0, 0])
+        entry[0] += 1
+        entry[1] += row_hash(email, nom, dep, sal, date)
+    return {b: (n, c) for b, (n, c) in sums.items()}
+
+
+def diff_buckets(left: BucketChecksums, right: BucketChecksums) -> List[int]:
+    """Buckets dont l'empreinte diffère (ou présents d'un seul côté)"""
+    return sorted(b for b in set(left) | set(right) if left.get(b) != right.get(b))
+
+
+def dump_checksums(checksums: BucketChecksums) -> str:
+    """Sérialisation JSON (triplets [bucket, n, checksum] : les clés entières sont conservées)"""
+    return json.dumps(sorted([b, n, c] for b, (n, c) in checksums.items()))
+
+
+def load_checksums(value: str) -> BucketChecksums:
+    return {int(b): (int(n), int(c)) for b, n, c in json.loads(value)}
+
+
+def in_buckets(df: pd.DataFrame, buckets: Iterable[int], bucket_count: int) -> pd.DataFrame:
+    """Lignes d'un DataFrame dont l'email tombe dans l'un des buckets"""
+    wanted = set(buckets)
+    mask = [bool(normalized_email(e)) and email_bucket(e, bucket_count) in wanted for e in df['email']]
+    return df[mask]
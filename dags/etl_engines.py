@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+Moteurs de calcul des étapes de fusion (transform) et de comparaison (compare)
+- pandas : implémentation de référence, mono-thread
+- polars : moteur vectorisé multi-threads (optionnel, pip install polars)
+- duckdb : base embarquée, requêtes SQL multi-threads (optionnel, pip install duckdb)
+
+Chaque moteur reçoit et rend des objets pandas typés (voir etl_schema) :
+    merge(df, priority)          -> (DataFrame fusionné, rapport de conflits)
+    compare(df_new, df_existing) -> (positions à insérer, positions à mettre à jour)
+Les moteurs optionnels ne travaillent que sur des colonnes simples (texte, flottants)
+et doivent produire exactement le même résultat que pandas (scripts/bench/bench_engines.py).
+"""
+import logging
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from etl_schema import normalize_str, dates_equal
+
+logger = logging.getLogger(__name__)
+
+# Écart de salaire en dessous duquel deux montants sont considérés égaux
+SALAIRE_TOLERANCE = 0.01
+
+
+def _text(series: pd.Series) -> pd.Series:
+    """Colonne texte brute (object, None pour les valeurs absentes)"""
+    return series.astype(object).where(series.notna(), None)
+
+
+def _seconds(series: pd.Series) -> np.ndarray:
+    """Dates en secondes depuis l'epoch (NaN si absente), comparables sans fuseau"""
+    values = pd.to_datetime(series, errors='coerce', utc=True)
+    seconds = (values - pd.Timestamp(0, tz='UTC')).dt.total_seconds()
+    return seconds.to_numpy(dtype='float64', na_value=np.nan)
+
+
+class PandasEngine:
+    """Implémentation de référence : fusion vectorisée, comparaison ligne par ligne"""
+
+    name = 'pandas'
+
+    # ---------- Fusion ----------
+    def merge(self, df: pd.DataFrame, priority: List[str]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Déduplique les lignes des sources sur l'email normalisé.
+
+        Pour chaque email (trim + minuscules), la ligne retenue est celle de la source la
+        plus prioritaire ; à priorité égale, le last_updated le plus récent l'emporte, puis
+        la dernière ligne lue. Retourne le DataFrame fusionné et un rapport des conflits
+        par paire (source retenue, source écartée).
+        """
+        rank = {source: i for i, source in enumerate(priority)}
+        df = df.reset_index(drop=True)
+        work = pd.DataFrame({
+            'email': _text(df['email']),
+            'rank': df['source'].astype(object).map(rank).fillna(len(rank)).astype('float64'),
+            'updated': _seconds(df['last_updated']) if 'last_updated' in df.columns else np.nan,
+            'order': np.arange(len(df)),
+            'source': _text(df['source']),
+        })
+
+        winners, conflicts, without_email = self.select_winners(work)
+
+        merged = df.loc[np.sort(np.asarray(winners, dtype='int64'))].reset_index(drop=True)
+        merged['email'] = merged['email'].where(merged['email'].isna(), merged['email'].astype(str).str.strip())
+        duplicates = len(df) - without_email - len(merged)
+        report = {
+            'priority': list(priority),
+            'rows_in': len(df),
+            'rows_out': len(merged),
+            'duplicates': duplicates,
+            'without_email': without_email,
+            'conflicts': sorted(
+                ({'winner': w, 'loser': l, 'count': int(n)} for w, l, n in conflicts),
+                key=lambda c: (-c['count'], c['winner'], c['loser'])
+            ),
+        }
+        return merged, report
+
+    def select_winners(self, work: pd.DataFrame) -> Tuple[np.ndarray, List[tuple], int]:
+        """Positions retenues, conflits (retenue, écartée, nombre) et lignes sans email"""
+        work = work.assign(key=work['email'].fillna('').astype(str).str.strip().str.lower())
+
+        # Lignes sans email : non rapprochables, ignorées par la suite du pipeline
+        without_email = int((work['key'] == '').sum())
+        work = work[work['key'] != '']
+
+        work = work.sort_values(
+            ['key', 'rank', 'updated', 'order'],
+            ascending=[True, True, False, False],
+            na_position='last'
+        )
+        is_loser = work.duplicated('key', keep='first')
+        winners = work[~is_loser]
+        losers = work[is_loser]
+
+        # Conflits : source retenue face à chaque ligne écartée du même email
+        pairs = losers[['key', 'source']].merge(
+            winners[['key', 'source']], on='key', suffixes=('_ecartee', '_retenue')
+        )
+        counts = pairs.groupby(['source_retenue', 'source_ecartee']).size()
+        conflicts = [(winner, loser, n) for (winner, loser), n in counts.items()]
+        return winners['order'].to_numpy(), conflicts, without_email
+
+    # ---------- Comparaison ----------
+    def compare(self, df_new: pd.DataFrame, df_existing: pd.DataFrame) -> Tuple[List[int], List[int]]:
+        """Compare chaque ligne à l'existant (tous statuts) indexé par email normalisé"""
+        # Index par email pour une recherche rapide
+        existing_map = {}
+        if not df_existing.empty:
+            for _, r in df_existing.iterrows():
+                email_key = normalize_str(r.get('email'))
+                if email_key:  # Ignorer les emails vides
+                    existing_map[email_key] = r
+
+        insert_pos = []
+        update_pos = []
+
+        for pos, (_, row) in enumerate(df_new.iterrows()):
+            email = normalize_str(row.get('email'))
+            if not email:
+                logger.warning("Ligne sans email ignorée")
+                continue
+
+            existing_row = existing_map.get(email)
+
+            if existing_row is None:
+                # NOUVEL enregistrement
+                insert_pos.append(pos)
+            else:
+                # ENREGISTREMENT EXISTANT - vérifier les changements de données
+                nom_change = normalize_str(existing_row.get('nom')) != normalize_str(row.get('nom'))
+                dept_change = normalize_str(existing_row.get('departement')) != normalize_str(row.get('departement'))
+
+                # Comparaison robuste des salaires
+                try:
+                    ex_s = float(existing_row.get('salaire', 0)) if existing_row.get('salaire') not in (None, '', 'NULL') else 0.0
+                    new_s = float(row.get('salaire', 0)) if row.get('salaire') not in (None, '', 'NULL') else 0.0
+                    salaire_change = abs(ex_s - new_s) > SALAIRE_TOLERANCE
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Erreur conversion salaire pour {email}: {e}")
+                    salaire_change = str(existing_row.get('salaire')) != str(row.get('salaire'))
+
+                date_change = not dates_equal(existing_row.get('date_embauche'), row.get('date_embauche'))
+
+                # Vérifier si l'enregistrement est inactif (doit être réactivé)
+                statut_inactif = existing_row.get('statut') == 'inactif'
+
+                # Mise à jour nécessaire si données changées OU statut inactif
+                if any([nom_change, dept_change, salaire_change, date_change, statut_inactif]):
+                    update_pos.append(pos)
+                    logger.debug(f"Mise à jour nécessaire pour {email}: "
+                                 f"nom={nom_change}, dept={dept_change}, salaire={salaire_change}, "
+                                 f"date={date_change}, inactif={statut_inactif}")
+
+        return insert_pos, update_pos
+
+    @staticmethod
+    def compare_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Colonnes simples utilisées par les comparaisons vectorisées"""
+        return pd.DataFrame({
+            'pos': np.arange(len(df)),
+            'email': _text(df['email']) if 'email' in df.columns else None,
+            'nom': _text(df['nom']) if 'nom' in df.columns else None,
+            'departement': _text(df['departement']) if 'departement' in df.columns else None,
+            'salaire': pd.to_numeric(df['salaire'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            if 'salaire' in df.columns else np.nan,
+            # Dates normalisées au jour : comparaison en jours entiers
+            'date_embauche': np.floor(_seconds(df['date_embauche']) / 86400) if 'date_embauche' in df.columns else np.nan,
+            'statut': _text(df['statut']) if 'statut' in df.columns else None,
+        })
+
+
+class PolarsEngine(PandasEngine):
+    """Fusion et comparaison en Polars (plan paresseux exécuté sur tous les cœurs)"""
+
+    name = 'polars'
+
+    def __init__(self):
+        import polars as pl
+        self.pl = pl
+
+    def frame(self, df: pd.DataFrame):
+        """DataFrame Polars à partir de colonnes simples (sans dépendance pyarrow)"""
+        pl = self.pl
+        columns = {}
+        for col in df.columns:
+            if df[col].dtype == object:
+                columns[col] = pl.Series(col, df[col].tolist(), dtype=pl.String)
+            else:
+                columns[col] = pl.Series(col, df[col].to_numpy(), nan_to_null=True)
+        return pl.DataFrame(columns).lazy()
+
+    def key(self):
+        return self.pl.col('email').fill_null('').str.strip_chars().str.to_lowercase().alias('key')
+
+    def norm(self, col: str):
+        return self.pl.col(col).fill_null('').str.strip_chars().str.to_lowercase()
+
+    def select_winners(self, work: pd.DataFrame) -> Tuple[np.ndarray, List[tuple], int]:
+        pl = self.pl
+        lf = self.frame(work).with_columns(self.key())
+
+        ranked = (
+            lf.filter(pl.col('key') != '')
+            .sort(['key', 'rank', 'updated', 'order'], descending=[False, False, True, True], nulls_last=True)
+            .with_columns(pl.col('key').is_first_distinct().alias('first'))
+        )
+        winners = ranked.filter(pl.col('first'))
+        pairs = (
+            ranked.filter(~pl.col('first'))
+            .join(winners.select('key', pl.col('source').alias('winner')), on='key')
+            .group_by('winner', pl.col('source').alias('loser'))
+            .agg(pl.len().alias('count'))
+        )
+        without_email = lf.filter(pl.col('key') == '').select(pl.len())
+
+        winners_df, pairs_df, without_df = pl.collect_all([winners.select('order'), pairs, without_email])
+        conflicts = list(pairs_df.select('winner', 'loser', 'count').iter_rows())
+        return winners_df['order'].to_numpy(), conflicts, int(without_df.item())
+
+    def compare(self, df_new: pd.DataFrame, df_existing: pd.DataFrame) -> Tuple[List[int], List[int]]:
+        pl = self.pl
+        normalized = [self.key(), self.norm('nom').alias('nom_n'), self.norm('departement').alias('dept_n')]
+        new = self.frame(self.compare_frame(df_new)).with_columns(normalized).filter(pl.col('key') != '')
+        # Dernière occurrence d'un email existant retenue, comme l'index de référence
+        existing = (
+            self.frame(self.compare_frame(df_existing)).with_columns(normalized)
+            .filter(pl.col('key') != '')
+            .unique(subset='key', keep='last', maintain_order=True)
+            .select('key', 'nom_n', 'dept_n', 'salaire', 'date_embauche', 'statut', pl.lit(True).alias('matched'))
+        )
+        joined = new.join(existing, on='key', how='left', suffix='_ex')
+
+        changed = (
+            (pl.col('nom_n') != pl.col('nom_n_ex'))
+            | (pl.col('dept_n') != pl.col('dept_n_ex'))
+            | ((pl.col('salaire') - pl.col('salaire_ex')).abs() > SALAIRE_TOLERANCE).fill_null(False)
+            | (pl.col('date_embauche').is_null() != pl.col('date_embauche_ex').is_null())
+            | (pl.col('date_embauche') != pl.col('date_embauche_ex')).fill_null(False)
+            | (pl.col('statut_ex') == 'inactif').fill_null(False)
+        )
+        inserts, updates = pl.collect_all([
+            joined.filter(pl.col('matched').is_null()).select('pos').sort('pos'),
+            joined.filter(pl.col('matched').is_not_null() & changed).select('pos').sort('pos'),
+        ])
+        return inserts['pos'].to_list(), updates['pos'].to_list()
+
+
+class DuckDBEngine(PandasEngine):
+    """Fusion et comparaison en SQL dans une base DuckDB embarquée (en mémoire)"""
+
+    name = 'duckdb'
+
+    # Trim des espaces (\s) puis minuscules, comme normalize_str
+    KEY_SQL = "lower(regexp_replace(coalesce({col}, ''), '^\\s+|\\s+$', '', 'g'))"
+
+    def __init__(self):
+        import duckdb
+        self.duckdb = duckdb
+
+    def norm(self, col: str) -> str:
+        return self.KEY_SQL.format(col=col)
+
+    def select_winners(self, work: pd.DataFrame) -> Tuple[np.ndarray, List[tuple], int]:
+        con = self.duckdb.connect()
+        try:
+            con.register('work', work)
+            con.execute(f"""
+                CREATE TEMP TABLE ranked AS
+                SELECT "order", source, key,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY key
+                           ORDER BY rank, updated DESC NULLS LAST, "order" DESC
+                       ) AS rn
+                FROM (SELECT *, {self.norm('email')} AS key FROM work)
+                WHERE key <> ''
+            """)
+            winners = con.execute('SELECT "order" FROM ranked WHERE rn = 1').fetchnumpy()['order']
+            conflicts = con.execute("""
+                SELECT w.source, l.source, COUNT(*)
+                FROM ranked l JOIN ranked w ON w.key = l.key AND w.rn = 1
+                WHERE l.rn > 1
+                GROUP BY w.source, l.source
+            """).fetchall()
+            without_email = con.execute(
+                f"SELECT COUNT(*) FROM work WHERE {self.norm('email')} = ''"
+            ).fetchone()[0]
+        finally:
+            con.close()
+        return winners, conflicts, int(without_email)
+
+    def compare(self, df_new: pd.DataFrame, df_existing: pd.DataFrame) -> Tuple[List[int], List[int]]:
+        con = self.duckdb.connect()
+        try:
+            con.register('new_rows', self.compare_frame(df_new))
+            con.register('existing_rows', self.compare_frame(df_existing))
+            rows = con.execute(f"""
+                WITH n AS (
+                    SELECT *, {self.norm('email')} AS key, {self.norm('nom')} AS nom_n,
+                           {self.norm('departement')} AS dept_n
+                    FROM new_rows
+                ),
+                e AS (
+                    SELECT * FROM (
+                        SELECT *, {self.norm('email')} AS key, {self.norm('nom')} AS nom_n,
+                               {self.norm('departement')} AS dept_n,
+                               ROW_NUMBER() OVER (PARTITION BY {self.norm('email')} ORDER BY pos DESC) AS rn
+                        FROM existing_rows
+                    ) WHERE key <> '' AND rn = 1
+                )
+                SELECT n.pos,
+                       e.key IS NULL AS is_insert,
+                       e.key IS NOT NULL AND (
+                           n.nom_n <> e.nom_n
+                           OR n.dept_n <> e.dept_n
+                           OR coalesce(abs(n.salaire - e.salaire) > {SALAIRE_TOLERANCE}, false)
+                           OR n.date_embauche IS DISTINCT FROM e.date_embauche
+                           OR coalesce(e.statut = 'inactif', false)
+                       ) AS is_update
+                FROM n LEFT JOIN e ON e.key = n.key
+                WHERE n.key <> ''
+                ORDER BY n.pos
+            """).fetchall()
+        finally:
+            con.close()
+        inserts = [pos for pos, is_insert, _ in rows if is_insert]
+        updates = [pos for pos, _, is_update in rows if is_update]
+        return inserts, updates
+
+
+ENGINES = {
+    'pandas': PandasEngine,
+    'polars': PolarsEngine,
+    'duckdb': DuckDBEngine,
+}
+
+
+def get_engine(name: str) -> PandasEngine:
+    """Instancie le moteur demandé (ImportError explicite si la bibliothèque manque)"""
+    if name not in ENGINES:
+        raise ValueError(f"Moteur inconnu '{name}' (disponibles : {', '.join(ENGINES)})")
+    try:
+        return ENGINES[name]()
+    except ImportError as e:
+        raise ImportError(f"Moteur '{name}' indisponible : {e}. Installer le paquet correspondant "
+                          f"ou utiliser engine='pandas'") from e
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Historique temporel des employés (chargement et detect_deletions du DAG)
+- Versions successives dans employes_history, valables sur valid_during
+  (scripts/sql/migrations/005_employes_history.sql)
+- Maintenance ensembliste par la fonction SQL employes_history_sync, partagée
+  avec l'API : un appel par lot d'emails, dans la transaction de l'écriture
+- Sans la migration 005, aucune historisation (chargement inchangé)
+"""
+import logging
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FUNCTION = 'employes_history_sync(integer[], text[])'
+HISTORY_BATCH_SIZE = 1000
+
+
+def record_history(cur, emails: Iterable[str], batch_size: int = HISTORY_BATCH_SIZE) -> int:
+    """Historise les employés de ces emails (normalisés par la fonction) ; retourne le nombre de changements"""
+    keys = sorted({str(e) for e in emails if e})
+    if not keys:
+        return 0
+    cur.execute("SELECT to_regprocedure(%s) IS NOT NULL", (HISTORY_FUNCTION,))
+    if not cur.fetchone()[0]:
+        return 0
+
+    changed = 0
+    for i in range(0, len(keys), batch_size):
+        cur.execute("SELECT employes_history_sync(NULL, %s::text[])", (keys[i:i + batch_size],))
+        changed += cur.fetchone()[0]
+    logger.info(f"Historique : {changed} versions pour {len(keys)} emails")
+    return changed
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Métriques Prometheus du pipeline ETL
+- Chaque tâche écrit ses mesures dans un fichier texte (format exposition Prometheus)
+- Les fichiers sont exposés par node-exporter (collecteur textfile) puis scrapés par Prometheus
+"""
+import glob
+import os
+import logging
+from typing import Dict, Any
+
+from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.getenv('ETL_METRICS_DIR', '/opt/airflow/metrics')
+
+# Compteurs de task_stats publiés tels quels (clé -> nom de métrique, description)
+COUNTER_METRICS = {
+    'records_deduplicated': ('etl_rows_deduplicated', 'Doublons supprimés lors de la transformation'),
+    'records_inserted': ('etl_rows_inserted', 'Lignes insérées dans employes_unified'),
+    'records_updated': ('etl_rows_updated', 'Lignes mises à jour dans employes_unified'),
+    'records_soft_deleted': ('etl_rows_soft_deleted', 'Lignes marquées inactives (soft delete)'),
+    'run_skipped': ('etl_run_skipped', 'Run court-circuité car aucune source n\'a changé (1) ou non (0)'),
+}
+
+
+def publish_task_metrics(task_id: str, stats: Dict[str, Any], duration_s: float, status: str) -> None:
+    """Écrit les métriques d'une tâche dans <METRICS_DIR>/etl_<task_id>.prom (écriture atomique)"""
+    try:
+        registry = CollectorRegistry()
+
+        Gauge('etl_stage_duration_seconds', 'Durée de la dernière exécution de l\'étape',
+              ['stage'], registry=registry).labels(task_id).set(duration_s)
+        Gauge('etl_stage_success', 'Dernière exécution de l\'étape réussie (1) ou non (0)',
+              ['stage'], registry=registry).labels(task_id).set(1 if status == 'success' else 0)
+        Gauge('etl_stage_last_run_timestamp_seconds', 'Horodatage de fin de la dernière exécution',
+              ['stage'], registry=registry).labels(task_id).set_to_current_time()
+        Gauge('etl_stage_rows_processed', 'Lignes traitées par l\'étape',
+              ['stage'], registry=registry).labels(task_id).set(stats.get('records_processed') or 0)
+        Gauge('etl_xcom_payload_bytes', 'Volume XCom lu et écrit par l\'étape (octets)',
+              ['stage'], registry=registry).labels(task_id).set(stats.get('bytes_moved') or 0)
+
+        # Lignes extraites par source (tâches d'extraction, une série par partition)
+        if stats.get('source'):
+            Gauge('etl_rows_extracted', 'Lignes extraites par source',
+                  ['source', 'stage'], registry=registry).labels(stats['source'], task_id).set(stats.get('records_processed') or 0)
+
+        # Conflits de fusion par paire de sources (transform)
+        if stats.get('merge_conflicts'):
+            conflicts = Gauge('etl_merge_conflicts', 'Doublons d\'email entre sources (source retenue / écartée)',
+                              ['winner', 'loser'], registry=registry)
+            for c in stats['merge_conflicts']:
+                conflicts.labels(c['winner'], c['loser']).set(c['count'])
+
+        for key, (name, description) in COUNTER_METRICS.items():
+            if key in stats:
+                Gauge(name, description, registry=registry).set(stats[key] or 0)
+
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        write_to_textfile(os.path.join(METRICS_DIR, f'etl_{task_id}.prom'), registry)
+    except Exception as e:
+        logger.warning(f"Impossible de publier les métriques Prometheus de {task_id}: {e}")
+
+
+def clear_mapped_metrics(task_id: str) -> None:
+    """Supprime les fichiers <METRICS_DIR>/etl_<task_id>_<N>.prom des instances mappées d'un run précédent.
+
+    Sans cela, les instances qui n'existent plus (moins de partitions, autre mode d'extraction)
+    continueraient d'être exportées et compteraient en double dans les sommes par source.
+    """
+    for path in glob.glob(os.path.join(METRICS_DIR, f'etl_{task_id}_*.prom')):
+        if os.path.basename(path)[len(f'etl_{task_id}_'):-len('.prom')].isdigit():
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Impossible de supprimer les métriques {path}: {e}")
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Schéma typé des DataFrames du pipeline ETL
+- Catégories pour les valeurs répétées (source, departement, statut)
+- Entiers nullables pour les identifiants
+- Dates en datetime64, salaires arrondis au centime (float64, sans objets Decimal)
+- Appliqué à chaque lecture (source, base cible ou XCom) : le JSON des XCom ne conserve pas les types
+- Normalisation des valeurs comparées (chaînes, dates)
+"""
+import io
+import json
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STATUT_DTYPE = pd.CategoricalDtype(['actif', 'inactif'])
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Applique les types compacts du pipeline aux colonnes présentes"""
+    for col in ('id', 'source_id'):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+    if 'source' in df.columns:
+        # Catégories tirées des données : la cible contient aussi des lignes hors ETL (source 'Manuel' de l'API)
+        df['source'] = df['source'].astype('category')
+    if 'departement' in df.columns:
+        df['departement'] = df['departement'].astype('category')
+    if 'statut' in df.columns:
+        df['statut'] = df['statut'].astype(STATUT_DTYPE)
+    if 'salaire' in df.columns:
+        df['salaire'] = pd.to_numeric(df['salaire'], errors='coerce').astype('float64').round(2)
+    if 'date_embauche' in df.columns:
+        df['date_embauche'] = pd.to_datetime(df['date_embauche'], errors='coerce').dt.normalize()
+    if 'last_updated' in df.columns:
+        df['last_updated'] = pd.to_datetime(df['last_updated'], errors='coerce', utc=True)
+    return df
+
+
+def read_payload(payload: str) -> pd.DataFrame:
+    """Relit un DataFrame sérialisé en XCom et rétablit ses types"""
+    return apply_schema(pd.read_json(io.StringIO(payload)))
+
+
+def to_payload(df: pd.DataFrame) -> str:
+    """Sérialise un DataFrame typé pour XCom (dates ISO, catégories en texte)"""
+    return df.to_json(date_format='iso')
+
+
+def to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Lignes d'un DataFrame typé en dictionnaires sérialisables (inserts/updates)"""
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def normalize_str(s: Any) -> str:
+    """Normalise les chaînes de caractères"""
+    if pd.isna(s) or s is None:
+        return ''
+    return str(s).strip().lower()
+
+
+def safe_normalize_date(date_val: Any) -> Optional[datetime.date]:
+    """Normalise les dates de manière robuste pour la base de données"""
+    if date_val is None or pd.isna(date_val) or date_val == '':
+        return None
+    
+    try:
+        # Si c'est déjà un objet date/datetime
+        if isinstance(date_val, (datetime, pd.Timestamp)):
+            return date_val.date() if hasattr(date_val, 'date') else date_val
+        
+        # Gestion des timestamps numériques (provenant de JSON)
+        if isinstance(date_val, (int, float)):
+            # Détection si timestamp en millisecondes ou secondes
+            if date_val > 1000000000000:  # Millisecondes
+                date_val = date_val / 1000
+            return datetime.fromtimestamp(date_val).date()
+        
+        # Gestion des strings
+        if isinstance(date_val, str):
+            date_val = date_val.strip()
+            if not date_val:
+                return None
+                
+        # Conversion via pandas (plus robuste)
+        dt = pd.to_datetime(date_val, errors='coerce')
+        if pd.isna(dt):
+            logger.warning(f"Impossible de parser la date: {date_val}")
+            return None
+        return dt.date()
+        
+    except Exception as e:
+        logger.warning(f"Erreur normalisation date '{date_val}': {e}")
+        return None
+
+
+def dates_equal(a: Any, b: Any) -> bool:
+    """Compare deux dates avec normalisation"""
+    d1 = safe_normalize_date(a)
+    d2 = safe_normalize_date(b)
+    if d1 is None and d2 is None:
+        return True
+    if d1 is None or d2 is None:
+        return False
+    return d1 == d2
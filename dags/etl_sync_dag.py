@@ -8,15 +8,39 @@ DAG ETL (Version Finale - Production Ready)
 """
 from datetime import datetime, timedelta
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, BranchPythonOperator
 from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.providers.mysql.hooks.mysql import MySqlHook
-from airflow.exceptions import AirflowException
+from airflow.exceptions import AirflowException, AirflowSkipException
 
 import pandas as pd
+import hashlib
+import json
 import logging
 import traceback
-from typing import List, Dict, Any, Optional
+import functools
+import os
+import resource
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from etl_archive import archive_inactive, archive_ready
+from etl_checksums import (
+    checksum_query, read_checksums, frame_checksums, diff_buckets, in_buckets, bucket_sql,
+    dump_checksums, load_checksums
+)
+from etl_engines import get_engine
+from etl_history import record_history
+from etl_metrics import publish_task_metrics, clear_mapped_metrics
+from etl_schema import (
+    apply_schema, read_payload, to_payload, to_records,
+    normalize_str, safe_normalize_date
+)
 
 # -----------------------
 # Configuration du logging
@@ -36,6 +60,37 @@ default_args = {
     'email_on_retry': False
 }
 
+# Paramètres d'exécution (modifiables au déclenchement via conf)
+DEFAULT_PARAMS = {
+    # 'full' : une requête par source | 'partitioned' : plages d'id extraites en parallèle
+    # 'cdc' : uniquement les événements des tables changelog depuis le dernier offset
+    # 'checksum' : uniquement les lignes des buckets dont l'empreinte a changé depuis le dernier chargement
+    'extraction_mode': 'full',
+    'partition_count': 4,
+    # 'minmax' : plages de largeur égale | 'quantile' : plages de même effectif (NTILE sur l'index id)
+    'partition_strategy': 'minmax',
+    # 'serial' : une connexion, ligne par ligne | 'parallel' : partitions par email sur plusieurs connexions
+    'load_mode': 'serial',
+    'load_workers': 4,
+    'load_retries': 3,
+    # Mode 'cdc' : événements lus par run, délai au-delà duquel un trou de séquence est ignoré
+    'cdc_batch_size': 10000,
+    'cdc_gap_timeout_s': 60,
+    # Mode 'checksum' : nombre de buckets (plus il y en a, plus les lignes relues par écart sont ciblées)
+    'checksum_buckets': 1024,
+    # Ordre de priorité des sources en cas de doublon d'email (la première l'emporte)
+    'merge_priority': ['postgresql', 'mysql', 'csv'],
+    # Run réduit à la validation si aucune source n'a changé depuis le dernier run réussi
+    'skip_unchanged': True,
+    # Moteur de fusion/comparaison : 'pandas' (référence) | 'polars' | 'duckdb' (multi-threads, optionnels)
+    'engine': 'pandas',
+    # Archivage des inactifs depuis plus de N jours (0 : désactivé), par lots espacés de archive_pause_s
+    'archive_retention_days': 180,
+    'archive_batch_size': 500,
+    'archive_pause_s': 0.2,
+    'archive_max_batches': 200,
+}
+
 dag = DAG(
     'etl_employe',
     default_args=default_args,
@@ -44,6 +99,7 @@ dag = DAG(
     max_active_runs=1,
     is_paused_upon_creation=False,
     description="ETL synchronisation employés - Version Finale Corrigée",
+    params=DEFAULT_PARAMS,
     tags=['ETL', 'employes', 'production']
 )
 
@@ -52,56 +108,56 @@ dag = DAG(
 # -----------------------
 EXPECTED_COLS = ["nom", "email", "departement", "salaire", "date_embauche", "source", "source_id"]
 EMAIL_PATTERN = r'^[^@]+@[^@]+\.[^@]+'
+CSV_PATH = os.getenv('ETL_CSV_PATH', '/opt/airflow/data/data.csv')
 
-def normalize_str(s: Any) -> str:
-    """Normalise les chaînes de caractères"""
-    if pd.isna(s) or s is None:
-        return ''
-    return str(s).strip().lower()
+# Sources base de données : connexion, table, table changelog (CDC) et clés XCom de l'extraction
+DB_SOURCES = {
+    'mysql': {'conn_id': 'mysql_source_conn', 'db_type': 'mysql', 'table': 'employes_mysql',
+              'changelog': 'employes_mysql_changelog', 'xcom_key': 'mysql_data', 'cdc_key': 'mysql_cdc',
+              'buckets_key': 'mysql_buckets'},
+    'postgresql': {'conn_id': 'postgres_source_conn', 'db_type': 'postgres', 'table': 'employes_source',
+                   'changelog': 'employes_source_changelog', 'xcom_key': 'pgsql_data', 'cdc_key': 'pgsql_cdc',
+                   'buckets_key': 'pgsql_buckets'},
+}
+# Taille maximale des listes IN (...) envoyées aux bases
+IN_BATCH_SIZE = 1000
+SOURCE_COLUMNS = "id, nom, email, departement, salaire, date_embauche, last_updated"
+# Colonnes extraites : last_updated sert uniquement à départager les doublons (absent du CSV)
+EXTRACT_COLS = EXPECTED_COLS + ["last_updated"]
 
-def safe_normalize_date(date_val: Any) -> Optional[datetime.date]:
-    """Normalise les dates de manière robuste pour la base de données"""
-    if date_val is None or pd.isna(date_val) or date_val == '':
-        return None
-    
+def get_param(kwargs: Dict[str, Any], name: str) -> Any:
+    """Lit un paramètre d'exécution du DAG (valeur par défaut si absent)"""
+    params = kwargs.get('params') or {}
+    return params.get(name, DEFAULT_PARAMS[name])
+
+def to_salaire(value: Any) -> float:
+    """Convertit un salaire de manière robuste (0.0 si absent ou invalide)"""
     try:
-        # Si c'est déjà un objet date/datetime
-        if isinstance(date_val, (datetime, pd.Timestamp)):
-            return date_val.date() if hasattr(date_val, 'date') else date_val
-        
-        # Gestion des timestamps numériques (provenant de JSON)
-        if isinstance(date_val, (int, float)):
-            # Détection si timestamp en millisecondes ou secondes
-            if date_val > 1000000000000:  # Millisecondes
-                date_val = date_val / 1000
-            return datetime.fromtimestamp(date_val).date()
-        
-        # Gestion des strings
-        if isinstance(date_val, str):
-            date_val = date_val.strip()
-            if not date_val:
-                return None
-                
-        # Conversion via pandas (plus robuste)
-        dt = pd.to_datetime(date_val, errors='coerce')
-        if pd.isna(dt):
-            logger.warning(f"Impossible de parser la date: {date_val}")
-            return None
-        return dt.date()
-        
-    except Exception as e:
-        logger.warning(f"Erreur normalisation date '{date_val}': {e}")
-        return None
+        return float(value) if value not in [None, ''] else 0.0
+    except (ValueError, TypeError):
+        return 0.0
 
-def dates_equal(a: Any, b: Any) -> bool:
-    """Compare deux dates avec normalisation"""
-    d1 = safe_normalize_date(a)
-    d2 = safe_normalize_date(b)
-    if d1 is None and d2 is None:
-        return True
-    if d1 is None or d2 is None:
-        return False
-    return d1 == d2
+def insert_values(row: Dict[str, Any]) -> tuple:
+    """Paramètres d'INSERT dans employes_unified avec types corrects"""
+    return (
+        str(row.get('source', '')),
+        None if pd.isna(row.get('source_id')) else str(row.get('source_id')),
+        str(row.get('nom', '')),
+        str(row.get('email', '')),
+        str(row.get('departement', '')),
+        to_salaire(row.get('salaire', 0)),
+        safe_normalize_date(row.get('date_embauche')),
+    )
+
+def update_values(row: Dict[str, Any]) -> tuple:
+    """Paramètres d'UPDATE (nom, departement, salaire, date_embauche, email)"""
+    return (
+        str(row.get('nom', '')),
+        str(row.get('departement', '')),
+        to_salaire(row.get('salaire', 0)),
+        safe_normalize_date(row.get('date_embauche')),
+        str(row.get('email', '')),
+    )
 
 def ensure_columns(df: pd.DataFrame, cols: List[str] = EXPECTED_COLS) -> pd.DataFrame:
     """Assure que le DataFrame contient toutes les colonnes attendues"""
@@ -132,23 +188,304 @@ def test_database_connection(conn_id: str, db_type: str = 'postgres') -> bool:
         logger.error(f"✗ Échec connexion {conn_id} ({db_type}): {e}")
         raise AirflowException(f"Connexion {conn_id} indisponible: {e}")
 
+def get_source_hook(source: str):
+    """Hook Airflow de la base source"""
+    cfg = DB_SOURCES[source]
+    if cfg['db_type'] == 'mysql':
+        return MySqlHook(mysql_conn_id=cfg['conn_id'])
+    return PostgresHook(postgres_conn_id=cfg['conn_id'])
+
+def in_batches(values: List[Any], size: int = IN_BATCH_SIZE):
+    """Découpe une liste de valeurs en lots pour les clauses IN (...)"""
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def read_source(source: str, lo: Optional[int] = None, hi: Optional[int] = None,
+                ids: Optional[List[int]] = None, emails: Optional[List[str]] = None,
+                buckets: Optional[List[int]] = None, bucket_count: int = 0) -> pd.DataFrame:
+    """Lit une source base de données : entièrement, sur la plage d'id [lo, hi),
+    ou seulement les lignes d'une liste d'id ou d'emails (mode 'cdc') ou de buckets (mode 'checksum')"""
+    hook = get_source_hook(source)
+    query = f"SELECT {SOURCE_COLUMNS} FROM {DB_SOURCES[source]['table']}"
+    
+    if ids is not None or emails is not None or buckets is not None:
+        if buckets is not None:
+            column, values = bucket_sql(DB_SOURCES[source]['db_type'], bucket_count), buckets
+        else:
+            column, values = ('id', ids) if ids is not None else ('email', emails)
+        frames = [
+            hook.get_pandas_df(f"{query} WHERE {column} IN ({','.join(['%s'] * len(batch))})", parameters=batch)
+            for batch in in_batches(values)
+        ]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['id'] + EXTRACT_COLS)
+    else:
+        params = None
+        if lo is not None and hi is not None:
+            query += " WHERE id >= %s AND id < %s"
+            params = (lo, hi)
+        df = hook.get_pandas_df(query, parameters=params)
+    
+    df['source'] = source
+    df['source_id'] = df['id']
+    df = apply_schema(ensure_columns(df, EXTRACT_COLS))
+    validate_schema(df)
+    return df
+
+def read_target(hook: PostgresHook, emails: Optional[List[str]] = None, active_only: bool = False,
+                buckets: Optional[List[int]] = None, bucket_count: int = 0) -> pd.DataFrame:
+    """Lit employes_unified, entièrement ou seulement pour une liste d'emails ou de buckets"""
+    query = "SELECT * FROM employes_unified"
+    conditions = ["statut='actif'"] if active_only else []
+    if emails is None and buckets is None:
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return hook.get_pandas_df(query + where)
+    
+    column, values = ('email', emails) if buckets is None else (bucket_sql('postgres', bucket_count), buckets)
+    frames = []
+    for batch in in_batches(values):
+        placeholders = ','.join(['%s'] * len(batch))
+        where = ' AND '.join(conditions + [f"{column} IN ({placeholders})"])
+        frames.append(hook.get_pandas_df(f"{query} WHERE {where}", parameters=batch))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=EXPECTED_COLS + ['statut'])
+
+# -----------------------
+# SUIVI DE PERFORMANCE (etl_log)
+# -----------------------
+def count_bytes(stats: Dict[str, Any], payload: Any) -> None:
+    """Ajoute la taille d'un payload XCom aux octets déplacés par la tâche"""
+    if payload is None:
+        return
+    size = len(payload.encode('utf-8')) if isinstance(payload, str) else len(str(payload).encode('utf-8'))
+    stats['bytes_moved'] = stats.get('bytes_moved', 0) + size
+
+def write_etl_log(entry: Dict[str, Any]) -> None:
+    """Écrit une ligne de mesure dans etl_log (ne fait jamais échouer la tâche)"""
+    conn = None
+    try:
+        hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+        conn = hook.get_conn()
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO etl_log
+            (dag_run_id, task_name, status, records_processed, records_inserted, records_updated,
+             records_soft_deleted, bytes_moved, peak_memory_kb, duration_ms, start_time, end_time, error_message)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            entry['dag_run_id'], entry['task_name'], entry['status'],
+            entry.get('records_processed'), entry.get('records_inserted'), entry.get('records_updated'),
+            entry.get('records_soft_deleted'), entry.get('bytes_moved'), entry.get('peak_memory_kb'),
+            entry.get('duration_ms'), entry['start_time'], entry['end_time'], entry.get('error_message')
+        ))
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        logger.warning(f"Impossible d'écrire dans etl_log: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+def track_task(func):
+    """Mesure durée, volumes, pic mémoire et statut d'une tâche puis les écrit dans etl_log.
+
+    La tâche reçoit un dictionnaire `task_stats` dans ses kwargs qu'elle complète
+    avec ses compteurs (records_processed, records_inserted, bytes_moved, ...).
+    """
+    @functools.wraps(func)
+    def wrapper(**kwargs):
+        stats: Dict[str, Any] = {}
+        kwargs['task_stats'] = stats
+        ti = kwargs.get('ti')
+        dag_run = kwargs.get('dag_run')
+        task_name = ti.task_id if ti else func.__name__
+        # Tâches mappées : une mesure par instance
+        if ti is not None and getattr(ti, 'map_index', -1) >= 0:
+            task_name = f"{task_name}_{ti.map_index}"
+        start_time = datetime.now()
+        started = time.perf_counter()
+        status = 'success'
+        error_message = None
+
+        try:
+            result = func(**kwargs)
+            # detect_deletions signale ses erreurs sans lever d'exception
+            if isinstance(result, dict) and result.get('status') == 'error':
+                status = 'failed'
+                error_message = result.get('message')
+            elif stats.get('errors'):
+                status = 'partial'
+            return result
+        except AirflowSkipException as e:
+            status = 'skipped'
+            error_message = str(e)
+            raise
+        except Exception as e:
+            status = 'failed'
+            error_message = str(e)
+            raise
+        finally:
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            write_etl_log({
+                'dag_run_id': dag_run.run_id if dag_run else kwargs.get('run_id'),
+                'task_name': task_name,
+                'status': status,
+                'records_processed': stats.get('records_processed'),
+                'records_inserted': stats.get('records_inserted'),
+                'records_updated': stats.get('records_updated'),
+                'records_soft_deleted': stats.get('records_soft_deleted'),
+                'bytes_moved': stats.get('bytes_moved', 0),
+                # ru_maxrss est exprimé en Ko sous Linux
+                'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                'duration_ms': duration_ms,
+                'start_time': start_time,
+                'end_time': datetime.now(),
+                'error_message': error_message,
+            })
+            publish_task_metrics(task_name, stats, duration_ms / 1000, status)
+            logger.info(f"Performance {func.__name__}: {duration_ms} ms, "
+                        f"{stats.get('records_processed', 0)} lignes, {stats.get('bytes_moved', 0)} octets")
+
+    return wrapper
+
+# -----------------------
+# EMPREINTE DES SOURCES (court-circuit si rien n'a changé)
+# -----------------------
+# Tâches suivies par la branche quand au moins une source a changé
+EXTRACT_TASKS = ['extract_csv', 'extract_mysql', 'extract_pgsql', 'plan_partitions']
+FINGERPRINT_CHUNK = 1024 * 1024
+
+def is_enabled(value: Any) -> bool:
+    """Booléen d'un paramètre passé en conf JSON ou en ligne de commande ('false', 0...)"""
+    return str(value).strip().lower() not in ('false', '0', 'no', 'non', 'none', '')
+
+def csv_fingerprint() -> Dict[str, Any]:
+    """Date de modification, taille et SHA-256 du fichier CSV"""
+    try:
+        st = os.stat(CSV_PATH)
+    except FileNotFoundError:
+        return {'missing': True}
+    digest = hashlib.sha256()
+    with open(CSV_PATH, 'rb') as f:
+        for chunk in iter(lambda: f.read(FINGERPRINT_CHUNK), b''):
+            digest.update(chunk)
+    return {'mtime': st.st_mtime, 'size': st.st_size, 'sha256': digest.hexdigest()}
+
+def db_fingerprint(source: str) -> Dict[str, Any]:
+    """Nombre de lignes et dernier last_updated d'une source base de données"""
+    try:
+        df = get_source_hook(source).get_pandas_df(
+            f"SELECT COUNT(*) AS n, MAX(last_updated) AS last_updated FROM {DB_SOURCES[source]['table']}")
+    except Exception as e:
+        # Source injoignable : considérée comme modifiée, l'extraction remontera l'erreur
+        logger.warning(f"Empreinte {source} indisponible: {e}")
+        return {'error': str(e)}
+    last_updated = df.iloc[0]['last_updated']
+    return {'count': int(df.iloc[0]['n']),
+            'last_updated': None if pd.isna(last_updated) else str(pd.Timestamp(last_updated))}
+
+def comparable(fingerprint: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Champs qui décident d'un changement (un CSV réécrit à l'identique ne compte pas)"""
+    if fingerprint is None:
+        return None
+    return {k: v for k, v in fingerprint.items() if k != 'mtime'}
+
+def read_fingerprints() -> Dict[str, Dict[str, Any]]:
+    """Empreintes enregistrées par le dernier run réussi ({} si jamais enregistrées)"""
+    try:
+        hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+        df = hook.get_pandas_df("SELECT source, fingerprint FROM etl_fingerprints")
+    except Exception as e:
+        logger.warning(f"Impossible de lire etl_fingerprints: {e}")
+        return {}
+    return {r['source']: json.loads(r['fingerprint']) for _, r in df.iterrows()}
+
+def save_fingerprints(kwargs: Dict[str, Any]) -> None:
+    """Enregistre les empreintes calculées en début de run (après un chargement complet)"""
+    ti = kwargs['ti']
+    dag_run = kwargs.get('dag_run')
+    fingerprints = ti.xcom_pull(key='fingerprints')
+    # Mode 'cdc' : un run peut s'arrêter avant la fin du changelog (lot, trou de séquence)
+    if not fingerprints or get_param(kwargs, 'extraction_mode') == 'cdc':
+        return
+    
+    hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+    conn = hook.get_conn()
+    try:
+        cur = conn.cursor()
+        for source, fingerprint in fingerprints.items():
+            cur.execute("""
+                INSERT INTO etl_fingerprints (source, fingerprint, dag_run_id, updated_at)
+                VALUES (%s, %s, %s, NOW())
+                ON CONFLICT (source) DO UPDATE
+                SET fingerprint = EXCLUDED.fingerprint, dag_run_id = EXCLUDED.dag_run_id, updated_at = NOW()
+            """, (source, json.dumps(fingerprint, sort_keys=True), dag_run.run_id if dag_run else kwargs.get('run_id')))
+        conn.commit()
+        cur.close()
+        logger.info(f"Empreintes enregistrées: {', '.join(fingerprints)}")
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Impossible d'enregistrer les empreintes: {e}")
+    finally:
+        conn.close()
+
+@track_task
+def check_fingerprint(**kwargs) -> List[str]:
+    """Branche : extraction complète si une source a changé, validation seule sinon"""
+    logger.info("=== EMPREINTE DES SOURCES ===")
+    ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    
+    current = {'csv': csv_fingerprint()}
+    current.update({source: db_fingerprint(source) for source in DB_SOURCES})
+    # Une autre priorité de fusion change le résultat même à sources identiques
+    current['config'] = {'merge_priority': get_merge_priority(kwargs)}
+    previous = read_fingerprints()
+    
+    changed = [s for s in current if comparable(current[s]) != comparable(previous.get(s))]
+    skip = is_enabled(get_param(kwargs, 'skip_unchanged')) and not changed
+    ti.xcom_push(key='fingerprints', value=current)
+    ti.xcom_push(key='fingerprint_skip', value=skip)
+    stats['run_skipped'] = int(skip)
+    
+    if skip:
+        logger.info("✓ Sources inchangées depuis le dernier run réussi -> validation directe")
+        return ['validate']
+    logger.info(f"Sources modifiées: {', '.join(changed) if changed else 'aucune (skip_unchanged désactivé)'}")
+    return EXTRACT_TASKS + ['validate']
+
 # -----------------------
 # EXTRACTIONS
 # -----------------------
+def read_csv_source() -> pd.DataFrame:
+    """Lit le fichier CSV source au format des extractions"""
+    df = pd.read_csv(CSV_PATH, encoding='utf-8')
+    df['source'] = 'csv'
+    df['source_id'] = df.get('id', pd.Series([None]*len(df)))
+    df = apply_schema(ensure_columns(df, EXTRACT_COLS))
+    validate_schema(df)
+    return df
+
+@track_task
 def extract_csv(**kwargs) -> str:
     """Extraction CSV"""
     logger.info("=== EXTRACTION CSV ===")
     ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    
+    if get_param(kwargs, 'extraction_mode') == 'cdc':
+        raise AirflowSkipException("Mode CDC : le CSV n'a pas de changelog, relu par transform pour les emails modifiés")
     
     try:
-        df = pd.read_csv('/opt/airflow/data/data.csv', encoding='utf-8')
-        df['source'] = 'csv'
-        df['source_id'] = df.get('id', pd.Series([None]*len(df))).astype(str)
-        df = ensure_columns(df)
+        df = read_csv_source()
+        stats['source'] = 'csv'
         
-        validate_schema(df)
+        if get_param(kwargs, 'extraction_mode') == 'checksum':
+            return extract_buckets('csv', kwargs, df)
         
-        ti.xcom_push(key='csv_data', value=df.to_json(date_format='iso'))
+        payload = to_payload(df)
+        ti.xcom_push(key='csv_data', value=payload)
+        stats['records_processed'] = len(df)
+        count_bytes(stats, payload)
         logger.info(f"✓ CSV extrait : {len(df)} lignes")
         return f"CSV extraction ok - {len(df)} lignes"
     except Exception as e:
@@ -156,57 +493,512 @@ def extract_csv(**kwargs) -> str:
         ti.xcom_push(key='csv_data', value=pd.DataFrame(columns=EXPECTED_COLS).to_json())
         raise
 
+@track_task
 def extract_mysql(**kwargs) -> str:
     """Extraction MySQL"""
     logger.info("=== EXTRACTION MYSQL ===")
     ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    
+    if get_param(kwargs, 'extraction_mode') == 'partitioned':
+        raise AirflowSkipException("Mode partitionné : extraction par extract_partition")
     
     test_database_connection('mysql_source_conn', 'mysql')
+    stats['source'] = 'mysql'
     
-    hook = MySqlHook(mysql_conn_id='mysql_source_conn')
-    df = hook.get_pandas_df("SELECT id, nom, email, departement, salaire, date_embauche FROM employes_mysql")
-    df['source'] = 'mysql'
-    df['source_id'] = df['id'].astype(str)
-    df = ensure_columns(df)
+    if get_param(kwargs, 'extraction_mode') == 'cdc':
+        return extract_changes('mysql', kwargs)
+    if get_param(kwargs, 'extraction_mode') == 'checksum':
+        return extract_buckets('mysql', kwargs)
     
-    validate_schema(df)
+    # Position du changelog lue avant la table : les événements suivants seront rejoués par le mode 'cdc'
+    head = read_cdc_head('mysql')
+    df = read_source('mysql')
+    if head is not None:
+        ti.xcom_push(key=DB_SOURCES['mysql']['cdc_key'], value={'source': 'mysql', 'to_seq': head, 'deleted_emails': []})
     
-    ti.xcom_push(key='mysql_data', value=df.to_json(date_format='iso'))
+    payload = to_payload(df)
+    ti.xcom_push(key='mysql_data', value=payload)
+    stats['records_processed'] = len(df)
+    count_bytes(stats, payload)
     logger.info(f"✓ MySQL extrait : {len(df)} lignes")
     return f"MySQL extraction ok - {len(df)} lignes"
 
+@track_task
 def extract_postgres(**kwargs) -> str:
     """Extraction PostgreSQL"""
     logger.info("=== EXTRACTION POSTGRESQL ===")
     ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    
+    if get_param(kwargs, 'extraction_mode') == 'partitioned':
+        raise AirflowSkipException("Mode partitionné : extraction par extract_partition")
     
     test_database_connection('postgres_source_conn', 'postgres')
+    stats['source'] = 'postgresql'
     
-    hook = PostgresHook(postgres_conn_id='postgres_source_conn')
-    df = hook.get_pandas_df("SELECT id, nom, email, departement, salaire, date_embauche FROM employes_source")
-    df['source'] = 'postgresql'
-    df['source_id'] = df['id'].astype(str)
-    df = ensure_columns(df)
+    if get_param(kwargs, 'extraction_mode') == 'cdc':
+        return extract_changes('postgresql', kwargs)
+    if get_param(kwargs, 'extraction_mode') == 'checksum':
+        return extract_buckets('postgresql', kwargs)
     
-    validate_schema(df)
+    # Position du changelog lue avant la table : les événements suivants seront rejoués par le mode 'cdc'
+    head = read_cdc_head('postgresql')
+    df = read_source('postgresql')
+    if head is not None:
+        ti.xcom_push(key=DB_SOURCES['postgresql']['cdc_key'], value={'source': 'postgresql', 'to_seq': head, 'deleted_emails': []})
     
-    ti.xcom_push(key='pgsql_data', value=df.to_json(date_format='iso'))
+    payload = to_payload(df)
+    ti.xcom_push(key='pgsql_data', value=payload)
+    stats['records_processed'] = len(df)
+    count_bytes(stats, payload)
     logger.info(f"✓ PostgreSQL extrait : {len(df)} lignes")
     return f"PostgreSQL extraction ok - {len(df)} lignes"
 
+# -----------------------
+# EXTRACTION PARTITIONNÉE (mode 'partitioned')
+# -----------------------
+def compute_id_ranges(source: str, count: int, strategy: str) -> List[Dict[str, Any]]:
+    """Découpe la table source en plages d'id [lo, hi)"""
+    hook = get_source_hook(source)
+    table = DB_SOURCES[source]['table']
+    
+    df_bounds = hook.get_pandas_df(f"SELECT MIN(id) AS min_id, MAX(id) AS max_id FROM {table}")
+    min_id, max_id = df_bounds.iloc[0]['min_id'], df_bounds.iloc[0]['max_id']
+    if pd.isna(min_id):
+        # Table vide : une seule partition, lecture complète
+        return [{'source': source, 'lo': None, 'hi': None}]
+    min_id, max_id = int(min_id), int(max_id)
+    
+    if strategy == 'quantile':
+        # Bornes de tranches de même effectif (parcours de l'index de la clé primaire)
+        df_lows = hook.get_pandas_df(f"""
+            SELECT MIN(id) AS lo
+            FROM (SELECT id, NTILE({int(count)}) OVER (ORDER BY id) AS tranche FROM {table}) t
+            GROUP BY tranche
+            ORDER BY lo
+        """)
+        lows = [int(v) for v in df_lows['lo']]
+    else:
+        width = max(1, -(-(max_id - min_id + 1) // count))
+        lows = list(range(min_id, max_id + 1, width))
+    
+    highs = lows[1:] + [max_id + 1]
+    return [{'source': source, 'lo': lo, 'hi': hi} for lo, hi in zip(lows, highs)]
+
+@track_task
+def plan_partitions(**kwargs) -> List[Dict[str, Any]]:
+    """Calcule les plages d'id à extraire en parallèle (liste vide en mode 'full')"""
+    logger.info("=== PLANIFICATION DES PARTITIONS ===")
+    stats = kwargs.get('task_stats', {})
+    
+    # Métriques des partitions du run précédent (leur nombre ou le mode a pu changer)
+    clear_mapped_metrics('extract_partition')
+    
+    if get_param(kwargs, 'extraction_mode') != 'partitioned':
+        logger.info("Mode 'full' : aucune partition")
+        return []
+    
+    count = max(1, int(get_param(kwargs, 'partition_count')))
+    strategy = get_param(kwargs, 'partition_strategy')
+    
+    partitions = []
+    for source, cfg in DB_SOURCES.items():
+        test_database_connection(cfg['conn_id'], cfg['db_type'])
+        ranges = compute_id_ranges(source, count, strategy)
+        logger.info(f"{source}: {len(ranges)} partitions ({strategy})")
+        partitions.extend(ranges)
+    
+    stats['records_processed'] = len(partitions)
+    return partitions
+
+@track_task
+def extract_partition(source: str, lo: Optional[int], hi: Optional[int], **kwargs) -> Dict[str, Any]:
+    """Extraction d'une plage d'id d'une source (instance de tâche mappée)"""
+    stats = kwargs.get('task_stats', {})
+    
+    df = read_source(source, lo, hi)
+    payload = to_payload(df)
+    
+    stats['source'] = source
+    stats['records_processed'] = len(df)
+    count_bytes(stats, payload)
+    logger.info(f"✓ {source} [{lo}, {hi}) extrait : {len(df)} lignes")
+    return {'source': source, 'data': payload}
+
+@track_task
+def merge_partitions(parts: Optional[List[Dict[str, Any]]] = None, **kwargs) -> str:
+    """Regroupe les partitions par source dans les clés XCom lues par transform_data"""
+    logger.info("=== FUSION DES PARTITIONS ===")
+    ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    
+    # parts : valeurs de retour de toutes les instances de extract_partition
+    frames = {source: [] for source in DB_SOURCES}
+    for part in parts or []:
+        count_bytes(stats, part['data'])
+        frames[part['source']].append(read_payload(part['data']))
+    
+    total = 0
+    for source, dfs in frames.items():
+        df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame(columns=EXTRACT_COLS)
+        df = apply_schema(ensure_columns(df, EXTRACT_COLS))
+        payload = to_payload(df)
+        ti.xcom_push(key=DB_SOURCES[source]['xcom_key'], value=payload)
+        count_bytes(stats, payload)
+        total += len(df)
+        logger.info(f"✓ {source}: {len(dfs)} partitions fusionnées, {len(df)} lignes")
+    
+    stats['records_processed'] = total
+    return f"Fusion ok - {total} lignes"
+
+# -----------------------
+# CAPTURE DES CHANGEMENTS (mode 'cdc')
+# -----------------------
+def read_cdc_head(source: str) -> Optional[int]:
+    """Dernière séquence du changelog de la source (None si les triggers ne sont pas installés)"""
+    cfg = DB_SOURCES[source]
+    try:
+        df = get_source_hook(source).get_pandas_df(f"SELECT MAX(seq) AS head FROM {cfg['changelog']}")
+    except Exception as e:
+        logger.info(f"Pas de changelog pour {source} ({cfg['changelog']}): {e}")
+        return None
+    head = df.iloc[0]['head']
+    return 0 if pd.isna(head) else int(head)
+
+def read_cdc_offset(source: str) -> Optional[int]:
+    """Dernière séquence appliquée à la cible pour cette source (None si jamais synchronisée)"""
+    hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+    df = hook.get_pandas_df("SELECT last_seq FROM etl_cdc_offsets WHERE source = %s", parameters=(source,))
+    return None if df.empty else int(df.iloc[0]['last_seq'])
+
+def select_safe_events(events: pd.DataFrame, last_seq: int, db_now: datetime, gap_timeout_s: float) -> pd.DataFrame:
+    """Événements consommables sans risque de perte.
+
+    Une séquence est attribuée à l'écriture mais visible au commit : un trou peut être
+    une transaction encore ouverte. On s'arrête au premier trou récent ; un trou plus
+    ancien que gap_timeout_s est considéré comme une transaction annulée.
+    """
+    expected = last_seq + 1
+    keep = 0
+    for seq, changed_at in zip(events['seq'], events['changed_at']):
+        if seq != expected and (db_now - pd.Timestamp(changed_at)).total_seconds() < gap_timeout_s:
+            logger.info(f"Trou de séquence récent avant {seq} : arrêt à {expected - 1}")
+            break
+        keep += 1
+        expected = int(seq) + 1
+    return events.iloc[:keep]
+
+def extract_changes(source: str, kwargs: Dict[str, Any]) -> str:
+    """Extraction CDC : lignes courantes des id modifiés et emails supprimés depuis le dernier offset"""
+    ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    cfg = DB_SOURCES[source]
+    hook = get_source_hook(source)
+    
+    last_seq = read_cdc_offset(source)
+    if last_seq is None:
+        raise AirflowException(f"Aucun offset CDC pour {source} : lancer d'abord une synchronisation 'full' "
+                               f"(les triggers de {cfg['changelog']} doivent être installés)")
+    
+    batch_size = max(1, int(get_param(kwargs, 'cdc_batch_size')))
+    db_now = pd.Timestamp(hook.get_pandas_df("SELECT LOCALTIMESTAMP AS db_now").iloc[0]['db_now'])
+    events = hook.get_pandas_df(
+        f"SELECT seq, op, employe_id, email, old_email, changed_at FROM {cfg['changelog']} "
+        f"WHERE seq > %s ORDER BY seq LIMIT {batch_size}",
+        parameters=(last_seq,)
+    )
+    events = select_safe_events(events, last_seq, db_now, float(get_param(kwargs, 'cdc_gap_timeout_s')))
+    
+    # État courant des id insérés/modifiés (un id supprimé depuis ne renvoie aucune ligne)
+    changed_ids = [int(i) for i in events.loc[events['op'] != 'D', 'employe_id'].unique()]
+    df = read_source(source, ids=changed_ids) if changed_ids else apply_schema(ensure_columns(pd.DataFrame(), EXTRACT_COLS))
+    
+    # Emails disparus : lignes supprimées et anciens emails des lignes modifiées
+    gone = events.loc[(events['op'] == 'D') | (events['old_email'] != events['email']), 'old_email'].dropna()
+    deleted_emails = sorted({e for e in gone} - set(df['email'].dropna()))
+    
+    to_seq = int(events['seq'].iloc[-1]) if not events.empty else last_seq
+    payload = to_payload(df)
+    ti.xcom_push(key=cfg['xcom_key'], value=payload)
+    ti.xcom_push(key=cfg['cdc_key'], value={
+        'source': source, 'from_seq': last_seq, 'to_seq': to_seq, 'events': len(events),
+        'deleted_emails': deleted_emails,
+    })
+    stats['records_processed'] = len(df)
+    count_bytes(stats, payload)
+    logger.info(f"✓ {source} CDC ({last_seq}, {to_seq}] : {len(events)} événements, "
+                f"{len(df)} lignes, {len(deleted_emails)} emails supprimés")
+    return f"{source} CDC ok - {len(events)} événements"
+
+def pull_cdc_changes(ti) -> List[Dict[str, Any]]:
+    """Métadonnées CDC poussées par les extractions (positions et emails supprimés)"""
+    changes = [ti.xcom_pull(key=cfg['cdc_key']) for cfg in DB_SOURCES.values()]
+    return [c for c in changes if c]
+
+def cdc_affected_emails(df: pd.DataFrame, changes: List[Dict[str, Any]]) -> List[str]:
+    """Emails touchés par les événements CDC (tels quels et normalisés)"""
+    emails = set(df['email'].dropna().astype(str)) if not df.empty else set()
+    for c in changes:
+        emails.update(c.get('deleted_emails') or [])
+    emails = {e.strip() for e in emails if e and e.strip()}
+    return sorted(emails | {e.lower() for e in emails})
+
+def read_affected_rows(df_delta: pd.DataFrame, emails: List[str]) -> List[pd.DataFrame]:
+    """Relit dans toutes les sources les lignes des emails touchés.
+
+    La fusion par priorité doit voir toutes les versions d'un email : une ligne MySQL
+    modifiée ne doit pas écraser la version PostgreSQL (plus prioritaire) restée identique.
+    """
+    if not emails:
+        return []
+    keys = {e.lower() for e in emails}
+    seen = set(zip(df_delta['source'].astype(str), df_delta['source_id'].astype(str))) if not df_delta.empty else set()
+    
+    frames = []
+    for source in DB_SOURCES:
+        d = read_source(source, emails=emails)
+        if d.empty:
+            continue
+        frames.append(d[[k not in seen for k in zip(d['source'].astype(str), d['source_id'].astype(str))]])
+    try:
+        csv = read_csv_source()
+        frames.append(csv[csv['email'].fillna('').astype(str).str.strip().str.lower().isin(keys)])
+    except FileNotFoundError:
+        logger.warning(f"CSV introuvable ({CSV_PATH}) : ignoré pour la relecture CDC")
+    return [f for f in frames if not f.empty]
+
+def cdc_ready(ti) -> bool:
+    """Comparaison et suppressions réussies : les événements lus peuvent être acquittés"""
+    deletions = ti.xcom_pull(task_ids='detect_deletions')
+    return (ti.xcom_pull(task_ids='compare_data') is not None
+            and isinstance(deletions, dict) and deletions.get('status') == 'success')
+
+def commit_cdc_offsets(kwargs: Dict[str, Any]) -> None:
+    """Enregistre les positions de changelog appliquées (après un chargement complet)"""
+    ti = kwargs['ti']
+    dag_run = kwargs.get('dag_run')
+    changes = pull_cdc_changes(ti)
+    if not changes:
+        return
+    
+    hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+    conn = hook.get_conn()
+    try:
+        cur = conn.cursor()
+        for c in changes:
+            cur.execute("""
+                INSERT INTO etl_cdc_offsets (source, last_seq, dag_run_id, updated_at)
+                VALUES (%s, %s, %s, NOW())
+                ON CONFLICT (source) DO UPDATE
+                SET last_seq = EXCLUDED.last_seq, dag_run_id = EXCLUDED.dag_run_id, updated_at = NOW()
+            """, (c['source'], c['to_seq'], dag_run.run_id if dag_run else kwargs.get('run_id')))
+            logger.info(f"Offset CDC {c['source']} -> {c['to_seq']}")
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+# -----------------------
+# RÉCONCILIATION PAR CHECKSUMS (mode 'checksum')
+# -----------------------
+def get_bucket_count(kwargs: Dict[str, Any]) -> int:
+    return max(1, int(get_param(kwargs, 'checksum_buckets')))
+
+def buckets_key(source: str) -> str:
+    return DB_SOURCES[source]['buckets_key'] if source in DB_SOURCES else 'csv_buckets'
+
+def target_checksums(source: str, bucket_count: int) -> Dict[int, Tuple[int, int]]:
+    """Empreintes par bucket des lignes actives de la cible issues de cette source"""
+    hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+    query = checksum_query('postgres', 'employes_unified', bucket_count, "statut='actif' AND source = %s")
+    return read_checksums(hook.get_pandas_df(query, parameters=(source,)))
+
+def read_saved_checksums(source: str, bucket_count: int,
+                         priority: List[str]) -> Optional[Dict[str, Dict[int, Tuple[int, int]]]]:
+    """Empreintes de la source et de la cible enregistrées au dernier chargement réussi.
+
+    None si jamais enregistrées, table absente, nombre de buckets ou priorité de fusion
+    différents (une autre priorité change le résultat même à sources identiques).
+    """
+    try:
+        hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+        df = hook.get_pandas_df(
+            "SELECT bucket_count, merge_priority, source_checksums, target_checksums "
+            "FROM etl_bucket_checksums WHERE source = %s",
+            parameters=(source,))
+    except Exception as e:
+        logger.warning(f"Impossible de lire etl_bucket_checksums: {e}")
+        return None
+    if (df.empty or int(df.iloc[0]['bucket_count']) != bucket_count
+            or json.loads(df.iloc[0]['merge_priority']) != priority):
+        return None
+    return {'source': load_checksums(df.iloc[0]['source_checksums']),
+            'target': load_checksums(df.iloc[0]['target_checksums'])}
+
+def save_checksums(kwargs: Dict[str, Any]) -> None:
+    """Enregistre les empreintes lues dans chaque source et celles de la cible après le chargement
+    (mode 'checksum', après un chargement complet) : référence du run suivant"""
+    if get_param(kwargs, 'extraction_mode') != 'checksum':
+        return
+    ti = kwargs['ti']
+    dag_run = kwargs.get('dag_run')
+    run_id = dag_run.run_id if dag_run else kwargs.get('run_id')
+    priority = json.dumps(get_merge_priority(kwargs))
+    
+    hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+    conn = hook.get_conn()
+    try:
+        cur = conn.cursor()
+        for source in ['csv'] + list(DB_SOURCES):
+            info = ti.xcom_pull(key=buckets_key(source))
+            if not info or 'checksums' not in info:
+                continue
+            target = target_checksums(source, info['bucket_count'])
+            cur.execute("""
+                INSERT INTO etl_bucket_checksums
+                    (source, bucket_count, merge_priority, source_checksums, target_checksums, dag_run_id, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (source) DO UPDATE
+                SET bucket_count = EXCLUDED.bucket_count, merge_priority = EXCLUDED.merge_priority,
+                    source_checksums = EXCLUDED.source_checksums, target_checksums = EXCLUDED.target_checksums,
+                    dag_run_id = EXCLUDED.dag_run_id, updated_at = NOW()
+            """, (source, info['bucket_count'], priority, info['checksums'], dump_checksums(target), run_id))
+        conn.commit()
+        cur.close()
+        logger.info("Empreintes des buckets enregistrées")
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Impossible d'enregistrer les empreintes des buckets: {e}")
+    finally:
+        conn.close()
+
+def extract_buckets(source: str, kwargs: Dict[str, Any], df: Optional[pd.DataFrame] = None) -> str:
+    """Extraction 'checksum' : lignes des seuls buckets modifiés depuis le dernier chargement réussi.
+
+    Les empreintes des bases sont calculées par GROUP BY côté serveur ; celles du CSV
+    (déjà lu en entier, df) en Python avec les mêmes règles de normalisation.
+    Un bucket est retenu si l'empreinte de la source a changé depuis ce chargement, ou si
+    celle des lignes cible de cette source a changé depuis (écriture hors DAG). La source
+    n'est pas comparée directement à la cible : un email perdu à la fusion (autre source
+    prioritaire) ou en double dans la source signalerait son bucket à chaque run.
+    Sans référence utilisable (premier run, nombre de buckets ou priorité modifiés) : comparaison à la cible.
+    """
+    ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    bucket_count = get_bucket_count(kwargs)
+    
+    if df is None:
+        cfg = DB_SOURCES[source]
+        query = checksum_query(cfg['db_type'], cfg['table'], bucket_count)
+        checksums = read_checksums(get_source_hook(source).get_pandas_df(query))
+    else:
+        checksums = frame_checksums(df, bucket_count)
+    target = target_checksums(source, bucket_count)
+    saved = read_saved_checksums(source, bucket_count, get_merge_priority(kwargs))
+    if saved is None:
+        buckets = diff_buckets(checksums, target)
+    else:
+        buckets = sorted(set(diff_buckets(checksums, saved['source'])) | set(diff_buckets(target, saved['target'])))
+    
+    if df is None:
+        df = (read_source(source, buckets=buckets, bucket_count=bucket_count) if buckets
+              else apply_schema(ensure_columns(pd.DataFrame(), EXTRACT_COLS)))
+    else:
+        df = in_buckets(df, buckets, bucket_count)
+    
+    payload = to_payload(df)
+    ti.xcom_push(key=DB_SOURCES[source]['xcom_key'] if source in DB_SOURCES else 'csv_data', value=payload)
+    ti.xcom_push(key=buckets_key(source), value={'source': source, 'bucket_count': bucket_count, 'buckets': buckets,
+                                                 'checksums': dump_checksums(checksums)})
+    stats['records_processed'] = len(df)
+    count_bytes(stats, payload)
+    reference = 'dernier chargement' if saved else 'cible'
+    logger.info(f"✓ {source} checksums : {len(buckets)}/{bucket_count} buckets modifiés ({reference}), {len(df)} lignes extraites")
+    return f"{source} checksum ok - {len(buckets)} buckets"
+
+def pull_checksum_buckets(ti) -> Dict[str, List[int]]:
+    """Buckets différents signalés par chaque extraction"""
+    flagged = {}
+    for source in ['csv'] + list(DB_SOURCES):
+        info = ti.xcom_pull(key=buckets_key(source))
+        if info:
+            flagged[source] = info['buckets']
+    return flagged
+
+def checksum_scope(ti) -> List[int]:
+    """Union des buckets à réconcilier, toutes sources confondues"""
+    return sorted(set().union(*pull_checksum_buckets(ti).values()))
+
+def read_bucket_rows(flagged: Dict[str, List[int]], bucket_count: int) -> List[pd.DataFrame]:
+    """Relit dans chaque source les buckets signalés par les autres sources.
+
+    Comme en mode 'cdc', la fusion par priorité doit voir toutes les versions des emails
+    d'un bucket ; les buckets déjà extraits par la source elle-même ne sont pas relus.
+    """
+    union = set().union(*flagged.values()) if flagged else set()
+    frames = []
+    for source in DB_SOURCES:
+        missing = sorted(union - set(flagged.get(source, [])))
+        if missing:
+            frames.append(read_source(source, buckets=missing, bucket_count=bucket_count))
+    missing = sorted(union - set(flagged.get('csv', [])))
+    if missing:
+        try:
+            frames.append(in_buckets(read_csv_source(), missing, bucket_count))
+        except FileNotFoundError:
+            logger.warning(f"CSV introuvable ({CSV_PATH}) : ignoré pour la relecture des buckets")
+    return [f for f in frames if not f.empty]
+
+# -----------------------
+# FUSION DES SOURCES
+# -----------------------
+def get_merge_priority(kwargs: Dict[str, Any]) -> List[str]:
+    """Priorité des sources (liste ou chaîne 'a,b,c' passée en conf)"""
+    priority = get_param(kwargs, 'merge_priority')
+    if isinstance(priority, str):
+        priority = [p.strip() for p in priority.split(',') if p.strip()]
+    return list(priority)
+
+def save_merge_priority(kwargs: Dict[str, Any]) -> None:
+    """Enregistre la priorité du chargement en cours (etl_settings), relue par la synchronisation
+    ciblée de l'API : les deux chemins d'écriture appliquent la même règle de fusion"""
+    dag_run = kwargs.get('dag_run')
+    hook = PostgresHook(postgres_conn_id='postgres_target_conn')
+    conn = hook.get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO etl_settings (name, value, dag_run_id, updated_at)
+            VALUES ('merge_priority', %s, %s, NOW())
+            ON CONFLICT (name) DO UPDATE
+            SET value = EXCLUDED.value, dag_run_id = EXCLUDED.dag_run_id, updated_at = NOW()
+        """, (json.dumps(get_merge_priority(kwargs)), dag_run.run_id if dag_run else kwargs.get('run_id')))
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Impossible d'enregistrer la priorité de fusion: {e}")
+    finally:
+        conn.close()
+
 # -----------------------
 # TRANSFORMATION
 # -----------------------
+@track_task
 def transform_data(**kwargs) -> str:
     """Transformation et consolidation des données"""
     logger.info("=== TRANSFORMATION ===")
     ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
     
     try:
         # Récupération des données depuis XCom
         csv_j = ti.xcom_pull(key='csv_data') or '[]'
         mysql_j = ti.xcom_pull(key='mysql_data') or '[]'
         pg_j = ti.xcom_pull(key='pgsql_data') or '[]'
+        for j in (csv_j, mysql_j, pg_j):
+            count_bytes(stats, j)
         
         dfs = []
         for j, source in zip([csv_j, mysql_j, pg_j], ['csv', 'mysql', 'postgresql']):
@@ -214,34 +1006,57 @@ def transform_data(**kwargs) -> str:
                 if not j or j == '[]':
                     logger.info(f"Aucune donnée pour {source}")
                     continue
-                d = pd.read_json(j)
+                d = read_payload(j)
                 if not d.empty:
                     dfs.append(d)
                     logger.info(f"Données {source}: {len(d)} lignes")
             except Exception as e:
                 logger.warning(f"Impossible de parser XCom JSON pour {source}: {e}")
 
+        # Mode CDC : toutes les versions des emails touchés participent à la fusion
+        if get_param(kwargs, 'extraction_mode') == 'cdc':
+            df_delta = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame(columns=EXPECTED_COLS)
+            extra = read_affected_rows(df_delta, cdc_affected_emails(df_delta, pull_cdc_changes(ti)))
+            dfs.extend(extra)
+            logger.info(f"CDC: {sum(len(d) for d in extra)} lignes relues dans les sources pour les emails touchés")
+        
+        # Mode checksum : les buckets signalés par une source sont relus dans les autres
+        if get_param(kwargs, 'extraction_mode') == 'checksum':
+            extra = read_bucket_rows(pull_checksum_buckets(ti), get_bucket_count(kwargs))
+            dfs.extend(extra)
+            logger.info(f"Checksum: {sum(len(d) for d in extra)} lignes relues dans les autres sources pour les buckets différents")
+
         # Consolidation
         if dfs:
             df = pd.concat(dfs, ignore_index=True, sort=False)
-            # Déduplication basée sur l'email (priorité aux dernières occurrences)
-            initial_count = len(df)
-            df = df.drop_duplicates(subset=['email'], keep='last')
-            deduplicated_count = initial_count - len(df)
-            if deduplicated_count > 0:
-                logger.info(f"Déduplication: {deduplicated_count} doublons supprimés")
+            # Déduplication sur l'email normalisé selon la priorité des sources
+            engine = get_engine(get_param(kwargs, 'engine'))
+            df, report = engine.merge(df, get_merge_priority(kwargs))
+            ti.xcom_push(key='merge_report', value=report)
+            stats['records_deduplicated'] = report['duplicates']
+            stats['merge_conflicts'] = report['conflicts']
+            if report['duplicates'] > 0:
+                logger.info(f"Déduplication ({engine.name}): {report['duplicates']} doublons supprimés "
+                            f"(priorité {' > '.join(report['priority'])})")
+            for c in report['conflicts']:
+                logger.info(f"Conflits {c['winner']} > {c['loser']}: {c['count']}")
+            if report['without_email']:
+                logger.warning(f"{report['without_email']} lignes sans email ignorées")
         else:
             df = pd.DataFrame(columns=EXPECTED_COLS)
             logger.info("Aucune donnée à transformer")
 
-        # Normalisation des dates pour assurer la cohérence
-        df['date_embauche'] = df['date_embauche'].apply(safe_normalize_date)
+        # Types compacts (catégories fusionnées, dates normalisées au jour)
+        df = apply_schema(df)
         
         # Validation finale
         validate_schema(df)
         df = ensure_columns(df)
         
-        ti.xcom_push(key='transformed_data', value=df.to_json(date_format='iso'))
+        payload = to_payload(df)
+        ti.xcom_push(key='transformed_data', value=payload)
+        stats['records_processed'] = len(df)
+        count_bytes(stats, payload)
         logger.info(f"✓ Transformation terminée: {len(df)} lignes")
         return f"Transformation ok - {len(df)} lignes"
         
@@ -253,20 +1068,23 @@ def transform_data(**kwargs) -> str:
 # -----------------------
 # COMPARAISON ET PREPARATION
 # -----------------------
+@track_task
 def compare_and_prepare(**kwargs) -> str:
     """Compare les données et prépare les inserts/updates"""
     logger.info("=== COMPARAISON ET PREPARATION ===")
     ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
     
     try:
         tjson = ti.xcom_pull(key='transformed_data')
+        count_bytes(stats, tjson)
         if not tjson:
             logger.info("Aucune donnée transformée -> rien à comparer")
             ti.xcom_push(key='inserts', value=[])
             ti.xcom_push(key='updates', value=[])
             return "0/0"
 
-        df_new = pd.read_json(tjson)
+        df_new = read_payload(tjson)
         if df_new.empty:
             logger.info("DataFrame transformé vide -> rien à comparer")
             ti.xcom_push(key='inserts', value=[])
@@ -277,68 +1095,36 @@ def compare_and_prepare(**kwargs) -> str:
         test_database_connection('postgres_target_conn', 'postgres')
         hook = PostgresHook(postgres_conn_id='postgres_target_conn')
         
+        # Mode CDC : seuls les emails touchés par les événements sont relus
+        # Mode checksum : seuls les buckets dont l'empreinte diffère
+        scope, buckets = None, None
+        if get_param(kwargs, 'extraction_mode') == 'cdc':
+            scope = cdc_affected_emails(df_new, pull_cdc_changes(ti))
+        elif get_param(kwargs, 'extraction_mode') == 'checksum':
+            buckets = checksum_scope(ti)
+        
         try:
             # Lire TOUS les enregistrements, pas seulement les actifs
-            df_existing = hook.get_pandas_df("SELECT * FROM employes_unified")
+            df_existing = apply_schema(read_target(hook, emails=scope, buckets=buckets,
+                                                   bucket_count=get_bucket_count(kwargs)))
         except Exception as e:
             logger.warning(f"Impossible de lire table cible (supposée vide): {e}")
             df_existing = pd.DataFrame(columns=EXPECTED_COLS + ['statut'])
 
-        # Index par email pour une recherche rapide
-        existing_map = {}
-        if not df_existing.empty:
-            for _, r in df_existing.iterrows():
-                email_key = normalize_str(r.get('email'))
-                if email_key:  # Ignorer les emails vides
-                    existing_map[email_key] = r
-
-        # Comparaison
-        inserts = []
-        updates = []
-        
-        for _, row in df_new.iterrows():
-            email = normalize_str(row.get('email'))
-            if not email:
-                logger.warning("Ligne sans email ignorée")
-                continue
-                
-            existing_row = existing_map.get(email)
-            
-            if existing_row is None:
-                # NOUVEL enregistrement
-                inserts.append(row.to_dict())
-            else:
-                # ENREGISTREMENT EXISTANT - vérifier si besoin de mise à jour
-                needs_update = False
-                
-                # Vérifier les changements de données
-                nom_change = normalize_str(existing_row.get('nom')) != normalize_str(row.get('nom'))
-                dept_change = normalize_str(existing_row.get('departement')) != normalize_str(row.get('departement'))
-                
-                # Comparaison robuste des salaires
-                try:
-                    ex_s = float(existing_row.get('salaire', 0)) if existing_row.get('salaire') not in (None, '', 'NULL') else 0.0
-                    new_s = float(row.get('salaire', 0)) if row.get('salaire') not in (None, '', 'NULL') else 0.0
-                    salaire_change = abs(ex_s - new_s) > 0.01
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Erreur conversion salaire pour {email}: {e}")
-                    salaire_change = str(existing_row.get('salaire')) != str(row.get('salaire'))
-                
-                date_change = not dates_equal(existing_row.get('date_embauche'), row.get('date_embauche'))
-                
-                # Vérifier si l'enregistrement est inactif (doit être réactivé)
-                statut_inactif = existing_row.get('statut') == 'inactif'
-                
-                # Mise à jour nécessaire si données changées OU statut inactif
-                if any([nom_change, dept_change, salaire_change, date_change, statut_inactif]):
-                    updates.append(row.to_dict())
-                    logger.debug(f"Mise à jour nécessaire pour {email}: "
-                               f"nom={nom_change}, dept={dept_change}, salaire={salaire_change}, "
-                               f"date={date_change}, inactif={statut_inactif}")
+        # Comparaison : positions des lignes de df_new à insérer / mettre à jour
+        engine = get_engine(get_param(kwargs, 'engine'))
+        insert_pos, update_pos = engine.compare(df_new, df_existing)
+        logger.info(f"Moteur de comparaison: {engine.name}")
 
+        inserts = to_records(df_new.iloc[insert_pos])
+        updates = to_records(df_new.iloc[update_pos])
+        
         # Push des résultats
         ti.xcom_push(key='inserts', value=inserts or [])
         ti.xcom_push(key='updates', value=updates or [])
+        stats['records_processed'] = len(df_new)
+        count_bytes(stats, inserts)
+        count_bytes(stats, updates)
         logger.info(f"Comparaison: inserts={len(inserts)} updates={len(updates)}")
         return f"{len(inserts)}/{len(updates)}"
         
@@ -351,19 +1137,39 @@ def compare_and_prepare(**kwargs) -> str:
 # -----------------------
 # DETECTION SUPPRESSIONS
 # -----------------------
+@track_task
 def detect_deletions(**kwargs) -> Dict[str, Any]:
     """Détecte les suppressions - Version corrigée"""
     logger.info("=== DETECTION SUPPRESSIONS ===")
     ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
     
     try:
+        # Mode CDC : seuls les emails disparus des changelogs sont candidats
+        scope = None
+        if get_param(kwargs, 'extraction_mode') == 'cdc':
+            deleted = [e for c in pull_cdc_changes(ti) for e in c.get('deleted_emails') or []]
+            scope = sorted({e.strip() for e in deleted if e} | {normalize_str(e) for e in deleted if e} - {''})
+            if not scope:
+                logger.info("CDC: aucun email supprimé -> aucune détection")
+                return {'status': 'success', 'count': 0}
+        
+        # Mode checksum : seules les lignes actives des buckets différents sont candidates
+        buckets = None
+        if get_param(kwargs, 'extraction_mode') == 'checksum':
+            buckets = checksum_scope(ti)
+            if not buckets:
+                logger.info("Checksum: aucun bucket différent -> aucune détection")
+                return {'status': 'success', 'count': 0}
+
         tjson = ti.xcom_pull(key='transformed_data')
-        if not tjson:
+        count_bytes(stats, tjson)
+        if not tjson and scope is None and buckets is None:
             logger.info("Aucune donnée transformée -> aucune détection")
             return {'status': 'success', 'count': 0}
 
-        df_new = pd.read_json(tjson)
-        if df_new.empty:
+        df_new = read_payload(tjson) if tjson else pd.DataFrame(columns=EXPECTED_COLS)
+        if df_new.empty and scope is None and buckets is None:
             logger.info("DataFrame transformé vide -> aucune détection")
             return {'status': 'success', 'count': 0}
 
@@ -372,7 +1178,8 @@ def detect_deletions(**kwargs) -> Dict[str, Any]:
         hook = PostgresHook(postgres_conn_id='postgres_target_conn')
         
         # Récupération des enregistrements actifs seulement
-        df_existing = hook.get_pandas_df("SELECT * FROM employes_unified WHERE statut='actif'")
+        df_existing = read_target(hook, emails=scope, active_only=True, buckets=buckets,
+                                  bucket_count=get_bucket_count(kwargs))
         
         if df_existing.empty:
             logger.info("Aucun enregistrement actif existant -> aucune suppression")
@@ -390,6 +1197,7 @@ def detect_deletions(**kwargs) -> Dict[str, Any]:
         to_soft_delete = existing_emails - new_emails
         
         logger.info(f"Emails existants: {len(existing_emails)}, Nouveaux emails: {len(new_emails)}, À supprimer: {len(to_soft_delete)}")
+        stats['records_processed'] = len(existing_emails)
         
         if to_soft_delete:
             conn = hook.get_conn()
@@ -409,7 +1217,10 @@ def detect_deletions(**kwargs) -> Dict[str, Any]:
                 
                 cur.execute(query, emails_list)
                 deleted_count = cur.rowcount
+                # Version courante fermée, version inactive ouverte, dans la même transaction
+                record_history(cur, emails_list)
                 conn.commit()
+                stats['records_soft_deleted'] = deleted_count
                 logger.info(f"✓ Soft-delete terminé: {deleted_count} enregistrements")
                 
                 # Log des emails supprimés pour vérification
@@ -435,21 +1246,70 @@ def detect_deletions(**kwargs) -> Dict[str, Any]:
 # -----------------------
 # CHARGEMENT (Gestion robuste des dates)
 # -----------------------
+@track_task
 def load_to_target(**kwargs) -> str:
     """Chargement sécurisé avec gestion robuste des types de données"""
     logger.info("=== CHARGEMENT ===")
     ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    
+    if ti.xcom_pull(key='fingerprint_skip'):
+        raise AirflowSkipException("Sources inchangées : rien à charger")
     
     inserts = ti.xcom_pull(key='inserts') or []
     updates = ti.xcom_pull(key='updates') or []
+    stats['records_processed'] = len(inserts) + len(updates)
+    count_bytes(stats, inserts)
+    count_bytes(stats, updates)
+    
+    # Priorité de ce changeset, appliquée ensuite aussi par la synchronisation ciblée de l'API
+    save_merge_priority(kwargs)
     
     if not inserts and not updates:
         logger.info("Aucun insert ni update. Rien à charger.")
+        if cdc_ready(ti):
+            commit_cdc_offsets(kwargs)
+            save_fingerprints(kwargs)
+            save_checksums(kwargs)
         return "Aucune modification détectée."
 
     test_database_connection('postgres_target_conn', 'postgres')
     hook = PostgresHook(postgres_conn_id='postgres_target_conn')
     
+    if get_param(kwargs, 'load_mode') == 'parallel':
+        inserted, updated, errors = load_parallel(
+            hook, inserts, updates,
+            workers=max(1, int(get_param(kwargs, 'load_workers'))),
+            retries=max(1, int(get_param(kwargs, 'load_retries')))
+        )
+    else:
+        inserted, updated, errors = load_serial(hook, inserts, updates)
+
+    logger.info(f"Chargement terminé: {inserted} inserts, {updated} updates, {errors} erreurs")
+    stats.update({'records_inserted': inserted, 'records_updated': updated, 'errors': errors})
+    
+    # Offsets CDC et empreintes enregistrés seulement si tout le lot a été appliqué
+    if errors == 0 and cdc_ready(ti):
+        commit_cdc_offsets(kwargs)
+        save_fingerprints(kwargs)
+        save_checksums(kwargs)
+    
+    if errors > 0:
+        return f"Chargement terminé avec {errors} erreurs ({inserted} inserts, {updated} updates)"
+    else:
+        return f"Chargement terminé ({inserted} inserts, {updated} updates)"
+
+def commit_with_history(conn, cur, emails: List[str]) -> None:
+    """Commit d'un lot de load_serial avec l'historique de ses lignes, dans la même transaction"""
+    try:
+        record_history(cur, emails)
+    except psycopg2.Error as e:
+        raise AirflowException(f"Historisation impossible, lot annulé: {e}")
+    conn.commit()
+    emails.clear()
+
+def load_serial(hook: PostgresHook, inserts: List[Dict], updates: List[Dict]) -> Tuple[int, int, int]:
+    """Chargement séquentiel sur une connexion, ligne par ligne (commit tous les 10, historique compris)"""
     inserted = 0
     updated = 0
     errors = 0
@@ -459,48 +1319,38 @@ def load_to_target(**kwargs) -> str:
         logger.info(f"Traitement de {len(inserts)} insertions")
         conn = hook.get_conn()
         cur = conn.cursor()
+        pending = []  # emails écrits depuis le dernier commit
         
         try:
             for i, row in enumerate(inserts):
                 try:
-                    # Préparation des données avec types corrects
-                    source = str(row.get('source', ''))
-                    source_id = str(row.get('source_id', ''))
-                    nom = str(row.get('nom', ''))
-                    email = str(row.get('email', ''))
-                    departement = str(row.get('departement', ''))
-                    
-                    # Gestion robuste du salaire
-                    try:
-                        salaire = float(row.get('salaire', 0)) if row.get('salaire') not in [None, ''] else 0.0
-                    except (ValueError, TypeError):
-                        salaire = 0.0
-                    
-                    # Normalisation de la date
-                    date_embauche = safe_normalize_date(row.get('date_embauche'))
-                    
                     cur.execute("""
                         INSERT INTO employes_unified 
                         (source, source_id, nom, email, departement, salaire, date_embauche, statut, updated_at)
                         VALUES (%s, %s, %s, %s, %s, %s, %s, 'actif', NOW())
-                    """, (source, source_id, nom, email, departement, salaire, date_embauche))
+                    """, insert_values(row))
                     inserted += 1
-                    
-                    # Commit tous les 10 enregistrements pour éviter les bloquages
-                    if (i + 1) % 10 == 0:
-                        conn.commit()
-                        logger.info(f"Commit intermédiaire après {i + 1} insertions")
+                    pending.append(row.get('email'))
                         
                 except Exception as e:
                     errors += 1
                     logger.error(f"Erreur insertion {row.get('email')}: {e}")
                     # Rollback de la transaction courante et continuation
                     conn.rollback()
+                    pending.clear()
                     continue
+                
+                # Commit tous les 10 enregistrements pour éviter les bloquages
+                if (i + 1) % 10 == 0:
+                    commit_with_history(conn, cur, pending)
+                    logger.info(f"Commit intermédiaire après {i + 1} insertions")
                     
-            conn.commit()
+            commit_with_history(conn, cur, pending)
             logger.info(f"Insertions terminées: {inserted} réussies, {errors} erreurs")
             
+        except AirflowException:
+            safe_rollback(conn)
+            raise
         except Exception as e:
             conn.rollback()
             logger.error(f"Erreur générale lors des insertions: {e}")
@@ -513,51 +1363,44 @@ def load_to_target(**kwargs) -> str:
         logger.info(f"Traitement de {len(updates)} mises à jour")
         conn = hook.get_conn()
         cur = conn.cursor()
+        pending = []
         
         try:
             for i, row in enumerate(updates):
                 try:
-                    # Préparation des données avec types corrects
-                    nom = str(row.get('nom', ''))
-                    departement = str(row.get('departement', ''))
                     email = str(row.get('email', ''))
-                    
-                    # Gestion robuste du salaire
-                    try:
-                        salaire = float(row.get('salaire', 0)) if row.get('salaire') not in [None, ''] else 0.0
-                    except (ValueError, TypeError):
-                        salaire = 0.0
-                    
-                    # Normalisation de la date
-                    date_embauche = safe_normalize_date(row.get('date_embauche'))
-                    
                     cur.execute("""
                         UPDATE employes_unified 
                         SET nom=%s, departement=%s, salaire=%s, date_embauche=%s, 
                             statut='actif', updated_at=NOW()
                         WHERE email=%s
-                    """, (nom, departement, salaire, date_embauche, email))
+                    """, update_values(row))
                     
                     if cur.rowcount > 0:
                         updated += 1
+                        pending.append(email)
                         logger.debug(f"Mis à jour: {email}")
                     else:
                         logger.warning(f"Aucune ligne mise à jour pour {email}")
-                    
-                    # Commit tous les 10 enregistrements
-                    if (i + 1) % 10 == 0:
-                        conn.commit()
-                        logger.info(f"Commit intermédiaire après {i + 1} mises à jour")
                         
                 except Exception as e:
                     errors += 1
                     logger.error(f"Erreur mise à jour {row.get('email')}: {e}")
                     conn.rollback()
+                    pending.clear()
                     continue
+                
+                # Commit tous les 10 enregistrements
+                if (i + 1) % 10 == 0:
+                    commit_with_history(conn, cur, pending)
+                    logger.info(f"Commit intermédiaire après {i + 1} mises à jour")
                     
-            conn.commit()
+            commit_with_history(conn, cur, pending)
             logger.info(f"Mises à jour terminées: {updated} réussies, {errors} erreurs")
             
+        except AirflowException:
+            safe_rollback(conn)
+            raise
         except Exception as e:
             conn.rollback()
             logger.error(f"Erreur générale lors des mises à jour: {e}")
@@ -565,19 +1408,119 @@ def load_to_target(**kwargs) -> str:
             cur.close()
             conn.close()
 
-    logger.info(f"Chargement terminé: {inserted} inserts, {updated} updates, {errors} erreurs")
+    return inserted, updated, errors
+
+# -----------------------
+# CHARGEMENT PARALLÈLE (mode 'parallel')
+# -----------------------
+INSERT_SQL = """
+    INSERT INTO employes_unified
+    (source, source_id, nom, email, departement, salaire, date_embauche, statut, updated_at)
+    VALUES %s
+"""
+INSERT_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, 'actif', NOW())"
+
+UPDATE_SQL = """
+    UPDATE employes_unified AS e
+    SET nom = v.nom, departement = v.departement, salaire = v.salaire,
+        date_embauche = v.date_embauche, statut = 'actif', updated_at = NOW()
+    FROM (VALUES %s) AS v(nom, departement, salaire, date_embauche, email)
+    WHERE e.email = v.email
+"""
+UPDATE_TEMPLATE = "(%s, %s, %s::numeric, %s::date, %s)"
+
+LOAD_PAGE_SIZE = 500
+
+def partition_changeset(inserts: List[Dict], updates: List[Dict], count: int) -> List[Tuple[List[Dict], List[Dict]]]:
+    """Répartit inserts/updates par hachage de l'email normalisé.
+
+    Toutes les variantes d'un même email tombent dans la même partition : deux
+    partitions ne peuvent donc jamais se disputer une ligne de l'index unique email.
+    """
+    parts = [([], []) for _ in range(count)]
+    for idx, rows in ((0, inserts), (1, updates)):
+        for row in rows:
+            key = zlib.crc32(normalize_str(row.get('email')).encode('utf-8')) % count
+            parts[key][idx].append(row)
+    return parts
+
+def safe_rollback(conn) -> None:
+    """Rollback sans masquer l'erreur d'origine (connexion absente, fermée ou perdue)"""
+    if conn is None or conn.closed:
+        return
+    try:
+        conn.rollback()
+    except psycopg2.Error as e:
+        logger.warning(f"Rollback impossible, connexion perdue: {e}")
+
+def apply_partition(hook: PostgresHook, part: int, inserts: List[Dict], updates: List[Dict],
+                    retries: int) -> Tuple[int, int, int]:
+    """Applique une partition sur sa propre connexion, en une transaction, avec reprise"""
+    for attempt in range(1, retries + 1):
+        conn = None
+        try:
+            conn = hook.get_conn()
+            cur = conn.cursor()
+            inserted = updated = 0
+            for i in range(0, len(inserts), LOAD_PAGE_SIZE):
+                page = [insert_values(r) for r in inserts[i:i + LOAD_PAGE_SIZE]]
+                execute_values(cur, INSERT_SQL, page, template=INSERT_TEMPLATE, page_size=LOAD_PAGE_SIZE)
+                inserted += cur.rowcount
+            for i in range(0, len(updates), LOAD_PAGE_SIZE):
+                page = [update_values(r) for r in updates[i:i + LOAD_PAGE_SIZE]]
+                execute_values(cur, UPDATE_SQL, page, template=UPDATE_TEMPLATE, page_size=LOAD_PAGE_SIZE)
+                updated += cur.rowcount
+            record_history(cur, [row.get('email') for row in inserts + updates])
+            conn.commit()
+            logger.info(f"Partition {part}: {inserted} inserts, {updated} updates (tentative {attempt})")
+            return inserted, updated, 0
+        except (psycopg2.OperationalError, psycopg2.extensions.TransactionRollbackError) as e:
+            # Erreur transitoire (connexion, deadlock, sérialisation) : nouvelle tentative
+            safe_rollback(conn)
+            logger.warning(f"Partition {part}: tentative {attempt}/{retries} échouée: {e}")
+            if attempt == retries:
+                return 0, 0, len(inserts) + len(updates)
+            time.sleep(0.5 * 2 ** attempt)
+        except psycopg2.Error as e:
+            # Erreur de données : on isole les lignes fautives en rejouant la partition ligne par ligne
+            safe_rollback(conn)
+            logger.warning(f"Partition {part}: erreur de données ({e}), rejeu ligne par ligne")
+            return load_serial(hook, inserts, updates)
+        finally:
+            if conn:
+                conn.close()
+
+def load_parallel(hook: PostgresHook, inserts: List[Dict], updates: List[Dict],
+                  workers: int, retries: int) -> Tuple[int, int, int]:
+    """Chargement parallèle : une partition par connexion dans un pool de workers"""
+    parts = partition_changeset(inserts, updates, workers)
+    logger.info(f"Chargement parallèle: {workers} partitions "
+                f"({', '.join(str(len(i) + len(u)) for i, u in parts)} lignes)")
     
-    if errors > 0:
-        return f"Chargement terminé avec {errors} erreurs ({inserted} inserts, {updated} updates)"
-    else:
-        return f"Chargement terminé ({inserted} inserts, {updated} updates)"
+    inserted = updated = errors = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(apply_partition, hook, part, ins, upd, retries)
+            for part, (ins, upd) in enumerate(parts) if ins or upd
+        ]
+        for future in as_completed(futures):
+            i, u, e = future.result()
+            inserted += i
+            updated += u
+            errors += e
+    
+    return inserted, updated, errors
 
 # -----------------------
 # VALIDATION FINALE
 # -----------------------
+@track_task
 def validate_data(**kwargs) -> str:
     """Validation finale des données chargées"""
     logger.info("=== VALIDATION ===")
+    ti = kwargs['ti']
+    stats = kwargs.get('task_stats', {})
+    skipped = bool(ti.xcom_pull(key='fingerprint_skip'))
     
     test_database_connection('postgres_target_conn', 'postgres')
     hook = PostgresHook(postgres_conn_id='postgres_target_conn')
@@ -586,6 +1529,7 @@ def validate_data(**kwargs) -> str:
         # Statistiques générales
         df_total = hook.get_pandas_df("SELECT COUNT(*) AS total FROM employes_unified")
         total = int(df_total.iloc[0]['total'])
+        stats['records_processed'] = total
         
         # Statistiques par statut
         df_stat = hook.get_pandas_df("""
@@ -607,6 +1551,8 @@ def validate_data(**kwargs) -> str:
         # Log des résultats
         logger.info(f"=== RAPPORT DE SYNCHRONISATION ===")
         logger.info(f"Total en base: {total}")
+        if skipped:
+            logger.info("Run court-circuité : sources inchangées, extraction et chargement ignorés")
         
         if not df_stat.empty:
             for _, r in df_stat.iterrows():
@@ -627,25 +1573,71 @@ def validate_data(**kwargs) -> str:
         elif active_count > 0:
             logger.info(f"{active_count} employés actifs synchronisés")
 
-        return f"Validation OK - {total} total ({active_count} actifs)"
+        summary = f"Validation OK - {total} total ({active_count} actifs)"
+        return f"{summary} - sources inchangées, synchronisation ignorée" if skipped else summary
         
     except Exception as e:
         logger.error(f"Erreur validation: {e}")
         raise AirflowException(f"Échec validation: {e}")
 
+# -----------------------
+# ARCHIVAGE DES INACTIFS
+# -----------------------
+@track_task
+def archive_inactive_task(**kwargs) -> Dict[str, Any]:
+    """Déplace par petits lots les inactifs anciens vers employes_unified_archive (etl_archive.py)"""
+    logger.info("=== ARCHIVAGE ===")
+    stats = kwargs.get('task_stats', {})
+    retention_days = float(get_param(kwargs, 'archive_retention_days'))
+    if retention_days <= 0:
+        raise AirflowSkipException("Archivage désactivé (archive_retention_days = 0)")
+
+    test_database_connection('postgres_target_conn', 'postgres')
+    conn = PostgresHook(postgres_conn_id='postgres_target_conn').get_conn()
+    try:
+        if not archive_ready(conn):
+            raise AirflowSkipException("Table employes_unified_archive absente (migration 004 non appliquée)")
+        report = archive_inactive(
+            conn, retention_days,
+            batch_size=max(1, int(get_param(kwargs, 'archive_batch_size'))),
+            pause_s=float(get_param(kwargs, 'archive_pause_s')),
+            max_batches=max(1, int(get_param(kwargs, 'archive_max_batches')))
+        )
+    finally:
+        conn.close()
+
+    stats['records_processed'] = report['archived']
+    logger.info(f"Archivage terminé: {report['archived']} lignes en {report['batches']} lots "
+                f"({report['lock_timeouts']} lots retardés par un verrou), {report['duration_s']} s")
+    return report
+
 # -----------------------
 # Tâches du DAG
 # -----------------------
+t_fingerprint = BranchPythonOperator(task_id='fingerprint', python_callable=check_fingerprint, dag=dag)
 t_csv = PythonOperator(task_id='extract_csv', python_callable=extract_csv, dag=dag)
 t_mysql = PythonOperator(task_id='extract_mysql', python_callable=extract_mysql, dag=dag)
 t_pgsql = PythonOperator(task_id='extract_pgsql', python_callable=extract_postgres, dag=dag)
-t_transform = PythonOperator(task_id='transform', python_callable=transform_data, dag=dag)
+t_plan = PythonOperator(task_id='plan_partitions', python_callable=plan_partitions, dag=dag)
+t_extract_part = PythonOperator.partial(
+    task_id='extract_partition', python_callable=extract_partition, dag=dag
+).expand(op_kwargs=t_plan.output)
+t_merge = PythonOperator(task_id='merge_partitions', python_callable=merge_partitions,
+                         op_kwargs={'parts': t_extract_part.output}, dag=dag)
+# Selon le mode, soit extract_mysql/extract_pgsql soit la branche partitionnée est ignorée
+t_transform = PythonOperator(task_id='transform', python_callable=transform_data,
+                             trigger_rule='none_failed_min_one_success', dag=dag)
 t_compare = PythonOperator(task_id='compare_data', python_callable=compare_and_prepare, dag=dag)
 t_delete = PythonOperator(task_id='detect_deletions', python_callable=detect_deletions, dag=dag)
 t_load = PythonOperator(task_id='load_data', python_callable=load_to_target, trigger_rule='all_done', dag=dag)
 t_validate = PythonOperator(task_id='validate', python_callable=validate_data, trigger_rule='all_done', dag=dag)
+t_archive = PythonOperator(task_id='archive_inactive', python_callable=archive_inactive_task, dag=dag)
 
 # ------------------------------------
 # Ordre d'exécution des taches du dag
 # ------------------------------------
-[t_csv, t_mysql, t_pgsql] >> t_transform >> t_compare >> t_delete >> t_load >> t_validate
\ No newline at end of file
+# Sources inchangées : seule la validation suit l'empreinte (load passe en skipped)
+t_fingerprint >> [t_csv, t_mysql, t_pgsql, t_plan, t_validate]
+[t_csv, t_mysql, t_pgsql, t_merge] >> t_transform >> t_compare >> t_delete >> t_load >> t_validate
+# Archivage après une validation réussie (y compris quand les sources sont inchangées)
+t_validate >> t_archive
\ No newline at end of file
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Équivalence et performance des moteurs de fusion/comparaison (dags/etl_engines.py)
+- Génère trois sources qui se recouvrent (variantes de casse/espaces, emails absents,
+  salaires et dates manquants) et une table cible avec lignes modifiées et inactives
+- Vérifie que chaque moteur disponible produit exactement le résultat de pandas
+- Affiche les durées de merge/compare et l'accélération par rapport à pandas
+
+Exemple :
+    python scripts/bench/bench_engines.py --rows 200000 --engines pandas,polars,duckdb
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'dags'))
+
+from etl_engines import ENGINES, get_engine  # noqa: E402
+from etl_schema import apply_schema  # noqa: E402
+
+DEPARTEMENTS = ['Finance', 'RH', 'Informatique', 'Commercial', 'Marketing', 'Logistique', 'Qualite']
+PRIORITY = ['postgresql', 'mysql', 'csv']
+
+
+def generate_sources(rows, rng):
+    """Lignes des trois sources : ~30 % d'emails partagés entre deux sources"""
+    frames = []
+    for source in ('csv', 'mysql', 'postgresql'):
+        ids = rng.integers(0, int(rows * 0.8), rows // 3)
+        emails = pd.Series([f"employe.{i}@entreprise.bf" for i in ids], dtype=object)
+        # Variantes de casse et d'espaces, quelques emails absents
+        upper = rng.random(len(ids)) < 0.05
+        emails[upper] = emails[upper].str.upper()
+        padded = rng.random(len(ids)) < 0.05
+        emails[padded] = '  ' + emails[padded] + ' '
+        emails[rng.random(len(ids)) < 0.002] = None
+
+        salaires = rng.integers(600000, 1300000, len(ids)).astype(float)
+        salaires[rng.random(len(ids)) < 0.01] = np.nan
+        dates = pd.to_datetime('2010-01-01') + pd.to_timedelta(rng.integers(0, 5000, len(ids)), unit='D')
+        dates = pd.Series(dates).where(rng.random(len(ids)) >= 0.01)
+        updated = None
+        if source != 'csv':
+            updated = pd.Series(pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 6, len(ids)), unit='s'))
+
+        frames.append(pd.DataFrame({
+            'nom': [f"Employe {i}" for i in ids],
+            'email': emails,
+            'departement': rng.choice(DEPARTEMENTS, len(ids)),
+            'salaire': salaires,
+            'date_embauche': dates,
+            'source': source,
+            'source_id': ids,
+            'last_updated': updated,
+        }))
+    return apply_schema(pd.concat(frames, ignore_index=True))
+
+
+def generate_target(merged, rng):
+    """Table cible : 80 % des lignes fusionnées, dont une partie modifiée ou inactive"""
+    existing = merged.sample(frac=0.8, random_state=1).reset_index(drop=True).copy()
+    existing['statut'] = np.where(rng.random(len(existing)) < 0.05, 'inactif', 'actif')
+    changed = rng.random(len(existing)) < 0.1
+    existing.loc[changed, 'salaire'] = existing.loc[changed, 'salaire'] + 1000
+    renamed = rng.random(len(existing)) < 0.05
+    existing.loc[renamed, 'nom'] = existing.loc[renamed, 'nom'].str.upper()
+    moved = rng.random(len(existing)) < 0.05
+    existing.loc[moved, 'date_embauche'] = existing.loc[moved, 'date_embauche'] + pd.Timedelta(days=1)
+    return apply_schema(existing.drop(columns=['last_updated']))
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Équivalence et durées des moteurs de fusion/comparaison")
+    parser.add_argument('--rows', type=int, default=200_000, help="Nombre total de lignes sources")
+    parser.add_argument('--engines', default=','.join(ENGINES), help="Moteurs à comparer (pandas toujours inclus)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    sources = generate_sources(args.rows, rng)
+
+    reference = get_engine('pandas')
+    (merged, report), ref_merge_s = timed(reference.merge, sources.copy(), PRIORITY)
+    existing = generate_target(merged, rng)
+    (inserts, updates), ref_compare_s = timed(reference.compare, merged, existing)
+
+    print(f"=== {len(sources)} lignes sources, {len(merged)} fusionnées, {len(existing)} en cible, "
+          f"{os.cpu_count()} cœurs ===")
+    print(f"  Référence : {report['duplicates']} doublons, {len(inserts)} inserts, {len(updates)} updates")
+    print(f"  {'moteur':<8} {'merge (s)':>10} {'compare (s)':>12} {'accélération':>13}  équivalent")
+    print(f"  {'pandas':<8} {ref_merge_s:>10.2f} {ref_compare_s:>12.2f} {'x1.0':>13}  référence")
+
+    failures = 0
+    for name in [e for e in args.engines.split(',') if e and e != 'pandas']:
+        try:
+            engine = get_engine(name)
+        except ImportError as e:
+            print(f"  {name:<8} ignoré : {e}")
+            continue
+
+        (e_merged, e_report), merge_s = timed(engine.merge, sources.copy(), PRIORITY)
+        (e_inserts, e_updates), compare_s = timed(engine.compare, merged, existing)
+
+        problems = []
+        try:
+            pd.testing.assert_frame_equal(e_merged, merged)
+        except AssertionError as e:
+            problems.append(f"fusion différente ({str(e).splitlines()[0]})")
+        if e_report != report:
+            problems.append("rapport de conflits différent")
+        if list(e_inserts) != list(inserts):
+            problems.append("inserts différents")
+        if list(e_updates) != list(updates):
+            problems.append("updates différents")
+        failures += bool(problems)
+
+        speedup = (ref_merge_s + ref_compare_s) / (merge_s + compare_s)
+        print(f"  {name:<8} {merge_s:>10.2f} {compare_s:>12.2f} {'x%.1f' % speedup:>13}  "
+              f"{'oui' if not problems else 'NON : ' + ', '.join(problems)}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
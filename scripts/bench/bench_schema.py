@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Mesure mémoire du schéma typé (dags/etl_schema.py) sur des données synthétiques
+- Représentation historique : colonnes object (source_id texte, dates Python, chaînes répétées)
+- Représentation typée : apply_schema()
+- Affiche l'empreinte par colonne (memory_usage deep) et la durée de conversion
+
+Exemple :
+    python scripts/bench/bench_schema.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'dags'))
+
+from etl_schema import apply_schema  # noqa: E402
+
+DEPARTEMENTS = [
+    'Direction Generale', 'Finance', 'Ingenierie', 'RH', 'Commercial', 'Marketing', 'Informatique',
+    'Operations', 'Qualite', 'Maintenance', 'Communication', 'Logistique', 'Administration',
+    'Securite', 'Formation', 'Recherche', 'Production', 'Juridique', 'Achats', 'Ventes',
+]
+SOURCES = ['csv', 'mysql', 'postgresql']
+
+
+def generate(rows, seed=42):
+    """Données au format historique du DAG (tout en object sauf le salaire)"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, rows + 1)
+    start = date(2010, 1, 1)
+    offsets = rng.integers(0, 5000, rows)
+    return pd.DataFrame({
+        'nom': [f"Employe {i}" for i in ids],
+        'email': [f"employe.{i}@entreprise.bf" for i in ids],
+        'departement': rng.choice(DEPARTEMENTS, rows).astype(object),
+        'salaire': rng.integers(600000, 1300000, rows).astype(float),
+        'date_embauche': [start + timedelta(days=int(d)) for d in offsets],
+        'source': rng.choice(SOURCES, rows).astype(object),
+        'source_id': ids.astype(str).astype(object),
+        'statut': rng.choice(['actif', 'inactif'], rows, p=[0.9, 0.1]).astype(object),
+    })
+
+
+def footprint(df):
+    """Octets par colonne (deep=True compte le contenu des objets Python)"""
+    return df.memory_usage(deep=True, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Empreinte mémoire object vs schéma typé")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Nombre de lignes générées")
+    args = parser.parse_args()
+
+    df = generate(args.rows)
+    before = footprint(df)
+
+    started = time.perf_counter()
+    typed = apply_schema(df.copy())
+    elapsed = time.perf_counter() - started
+    after = footprint(typed)
+
+    mb = 1024 * 1024
+    print(f"=== {args.rows:,} lignes ===".replace(',', ' '))
+    print(f"  {'colonne':<16} {'object (Mo)':>12} {'typé (Mo)':>12} {'dtype':>18}")
+    for col in df.columns:
+        print(f"  {col:<16} {before[col] / mb:>12.1f} {after[col] / mb:>12.1f} {str(typed[col].dtype):>18}")
+    print(f"  {'TOTAL':<16} {before.sum() / mb:>12.1f} {after.sum() / mb:>12.1f}"
+          f"   (÷{before.sum() / after.sum():.1f})")
+    print(f"  Conversion apply_schema : {elapsed:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
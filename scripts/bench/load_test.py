@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Test de charge de l'API : mode synchrone (python app.py) contre mode ASGI (asgi.py)
+- N connexions HTTP/1.1 keep-alive simultanées (client asyncio, sans dépendance)
+- Chaque connexion enchaîne les requêtes du tableau de bord pendant --duration secondes
+- Affiche débit, latences p50/p95/p99 et erreurs par URL de base
+
+Exemple (les deux serveurs lancés sur la même base) :
+    python app/app.py                                                  # port 5000
+    cd app && uvicorn asgi:application --port 5001 --workers 2
+    python scripts/bench/load_test.py --base http://localhost:5000 --base http://localhost:5001 \\
+        --connections 1000 --duration 30
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+# Requêtes émises à chaque rafraîchissement du tableau de bord
+DASHBOARD_PATHS = [
+    '/api/stats',
+    '/api/stats/sources',
+    '/api/sources/stats',
+    '/api/etl/last-sync',
+    '/api/employes?limit=50',
+]
+
+
+async def read_response(reader):
+    """Lit une réponse HTTP/1.1 (Content-Length ou chunked) ; retourne le code"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connexion fermée par le serveur')
+    status = int(status_line.split()[1])
+    length, chunked, close = None, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+        elif name == 'connection' and value == 'close':
+            close = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        close = True
+    return status, close
+
+
+async def client(host, port, paths, deadline, latencies, errors):
+    """Une connexion keep-alive qui enchaîne les requêtes jusqu'à l'échéance"""
+    reader = writer = None
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode())
+            await writer.drain()
+            status, close = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def run(base, connections, duration, paths):
+    url = urlsplit(base)
+    host, port = url.hostname, url.port or 80
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, paths, deadline, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def percentile(values, p):
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000 if values else float('nan')
+
+
+def report(base, latencies, errors, elapsed):
+    latencies.sort()
+    print(f"\n{base}")
+    print(f"  requêtes   : {len(latencies)} en {elapsed:.1f}s -> {len(latencies) / elapsed:.0f} req/s")
+    print(f"  latence ms : p50 {percentile(latencies, 0.50):.1f} | p95 {percentile(latencies, 0.95):.1f} | "
+          f"p99 {percentile(latencies, 0.99):.1f} | moyenne "
+          f"{(statistics.mean(latencies) * 1000 if latencies else float('nan')):.1f}")
+    if errors:
+        counts = {}
+        for e in errors:
+            counts[e] = counts.get(e, 0) + 1
+        print(f"  erreurs    : {len(errors)} {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge des routes du tableau de bord")
+    parser.add_argument('--base', action='append', required=True, help="URL de base (répétable : sync puis asgi)")
+    parser.add_argument('--connections', type=int, default=500, help="Connexions simultanées")
+    parser.add_argument('--duration', type=float, default=20, help="Durée par URL de base (secondes)")
+    parser.add_argument('--path', action='append', help="Chemin à interroger (défaut : routes du tableau de bord)")
+    args = parser.parse_args()
+
+    paths = args.path or DASHBOARD_PATHS
+    print(f"{args.connections} connexions, {args.duration:.0f}s, chemins : {', '.join(paths)}")
+    for base in args.base:
+        latencies, errors, elapsed = asyncio.run(run(base, args.connections, args.duration, paths))
+        report(base, latencies, errors, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+-- MySQL Source - Capture des changements (optionnel, mode 'cdc' du DAG)
+-- Chaque insert/update/delete sur employes_mysql ajoute un événement numéroté dans employes_mysql_changelog.
+-- Installation (les triggers nécessitent un compte privilégié lorsque le binlog est actif) :
+--   docker exec -i mysql-source mysql -uroot -prootpass source_db < scripts/sql/cdc/mysql-source-cdc.sql
+-- Puis lancer une synchronisation 'full' : elle enregistre la position de départ du changelog.
+SET NAMES utf8mb4;
+
+CREATE TABLE IF NOT EXISTS employes_mysql_changelog (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    op CHAR(1) NOT NULL COMMENT 'I = insert, U = update, D = delete',
+    employe_id INT NOT NULL,
+    email VARCHAR(100) NULL COMMENT 'Email après l''opération (NULL pour D)',
+    old_email VARCHAR(100) NULL COMMENT 'Email avant l''opération (NULL pour I)',
+    changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_changelog_changed_at (changed_at)
+);
+
+DROP TRIGGER IF EXISTS employes_mysql_cdc_insert;
+DROP TRIGGER IF EXISTS employes_mysql_cdc_update;
+DROP TRIGGER IF EXISTS employes_mysql_cdc_delete;
+
+CREATE TRIGGER employes_mysql_cdc_insert AFTER INSERT ON employes_mysql
+FOR EACH ROW
+    INSERT INTO employes_mysql_changelog (op, employe_id, email, old_email)
+    VALUES ('I', NEW.id, NEW.email, NULL);
+
+-- last_updated change à chaque UPDATE effectif : les UPDATE sans modification ne sont pas journalisés
+CREATE TRIGGER employes_mysql_cdc_update AFTER UPDATE ON employes_mysql
+FOR EACH ROW
+    INSERT INTO employes_mysql_changelog (op, employe_id, email, old_email)
+    SELECT 'U', NEW.id, NEW.email, OLD.email
+    FROM DUAL
+    WHERE NOT (OLD.nom <=> NEW.nom AND OLD.email <=> NEW.email AND OLD.departement <=> NEW.departement
+               AND OLD.salaire <=> NEW.salaire AND OLD.date_embauche <=> NEW.date_embauche);
+
+CREATE TRIGGER employes_mysql_cdc_delete AFTER DELETE ON employes_mysql
+FOR EACH ROW
+    INSERT INTO employes_mysql_changelog (op, employe_id, email, old_email)
+    VALUES ('D', OLD.id, NULL, OLD.email);
+
+-- Purge des événements déjà appliqués (offset lu dans etl_cdc_offsets de la base cible) :
+--   DELETE FROM employes_mysql_changelog WHERE seq <= <last_seq> AND changed_at < NOW() - INTERVAL 7 DAY;
@@ -0,0 +1,53 @@
+-- PostgreSQL Source - Capture des changements (optionnel, mode 'cdc' du DAG)
+-- Chaque insert/update/delete sur employes_source ajoute un événement numéroté dans employes_source_changelog.
+-- Installation :
+--   docker exec -i postgres-source psql -U sourceuser -d source_db < scripts/sql/cdc/postgres-source-cdc.sql
+-- Puis lancer une synchronisation 'full' : elle enregistre la position de départ du changelog.
+
+CREATE TABLE IF NOT EXISTS employes_source_changelog (
+    seq BIGSERIAL PRIMARY KEY,
+    op CHAR(1) NOT NULL CHECK (op IN ('I', 'U', 'D')),
+    employe_id INTEGER NOT NULL,
+    email VARCHAR(100),
+    old_email VARCHAR(100),
+    changed_at TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+);
+
+COMMENT ON TABLE employes_source_changelog IS 'Événements insert/update/delete de employes_source (consommés par le mode cdc du DAG)';
+COMMENT ON COLUMN employes_source_changelog.email IS 'Email après l''opération (NULL pour D)';
+COMMENT ON COLUMN employes_source_changelog.old_email IS 'Email avant l''opération (NULL pour I)';
+
+CREATE INDEX IF NOT EXISTS idx_changelog_changed_at ON employes_source_changelog(changed_at);
+
+CREATE OR REPLACE FUNCTION employes_source_capture() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO employes_source_changelog (op, employe_id, email, old_email) VALUES ('I', NEW.id, NEW.email, NULL);
+        RETURN NEW;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO employes_source_changelog (op, employe_id, email, old_email) VALUES ('U', NEW.id, NEW.email, OLD.email);
+        RETURN NEW;
+    ELSE
+        INSERT INTO employes_source_changelog (op, employe_id, email, old_email) VALUES ('D', OLD.id, NULL, OLD.email);
+        RETURN OLD;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS employes_source_cdc ON employes_source;
+DROP TRIGGER IF EXISTS employes_source_cdc_update ON employes_source;
+
+CREATE TRIGGER employes_source_cdc
+AFTER INSERT OR DELETE ON employes_source
+FOR EACH ROW EXECUTE FUNCTION employes_source_capture();
+
+-- Les UPDATE sans modification des colonnes synchronisées ne sont pas journalisés
+CREATE TRIGGER employes_source_cdc_update
+AFTER UPDATE ON employes_source
+FOR EACH ROW
+WHEN ((OLD.nom, OLD.email, OLD.departement, OLD.salaire, OLD.date_embauche)
+      IS DISTINCT FROM (NEW.nom, NEW.email, NEW.departement, NEW.salaire, NEW.date_embauche))
+EXECUTE FUNCTION employes_source_capture();
+
+-- Purge des événements déjà appliqués (offset lu dans etl_cdc_offsets de la base cible) :
+--   DELETE FROM employes_source_changelog WHERE seq <= <last_seq> AND changed_at < NOW() - INTERVAL '7 days';
@@ -0,0 +1,26 @@
+-- ========================================================================
+--    Migration 001 - Recherche approximative sur employes_unified
+-- ========================================================================
+-- GET /api/employes/search : sous-chaînes et fautes de frappe, sans
+-- tenir compte des accents ni de la casse, sur nom, email et département.
+--
+-- Application sur une base existante :
+--   docker exec -i postgres-target psql -U targetuser -d target_db < scripts/sql/migrations/001_employes_search.sql
+-- (inclus dans postgres-target-init.sql pour les nouvelles installations)
+-- ========================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() n'est que STABLE (dictionnaire modifiable) : enveloppe IMMUTABLE
+-- avec dictionnaire explicite, utilisable dans un index d'expression
+CREATE OR REPLACE FUNCTION search_normalize(value TEXT) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+$$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, value)) $$;
+
+-- Document de recherche : l'API filtre et trie sur exactement cette expression
+-- GiST plutôt que GIN : l'opérateur de distance <<-> (tri par pertinence) est servi par l'index
+CREATE INDEX IF NOT EXISTS idx_employes_search ON employes_unified
+    USING gist (search_normalize(nom || ' ' || email || ' ' || COALESCE(departement, '')) gist_trgm_ops);
+
+ANALYZE employes_unified;
@@ -0,0 +1,35 @@
+-- ========================================================================
+--    Migration 002 - Index composites de la liste des employés
+-- ========================================================================
+-- GET /api/employes (services/employe_filters.py) : conditions SARGables
+-- (=, = ANY, >=, <=) puis tri whitelisté complété par id. La page d'id est
+-- lue par jointure différée : avec ces index, parcours index-only.
+--
+-- Ordre des colonnes : égalités d'abord (statut, source, departement),
+-- puis la colonne de plage ou de tri, puis id (départage et pagination).
+--
+-- Application sur une base existante :
+--   docker exec -i postgres-target psql -U targetuser -d target_db < scripts/sql/migrations/002_employes_list_indexes.sql
+-- (inclus dans postgres-target-init.sql pour les nouvelles installations)
+-- ========================================================================
+
+-- Statut + départements, tri par id
+CREATE INDEX IF NOT EXISTS idx_employes_statut_dept_id ON employes_unified (statut, departement, id);
+
+-- Statut + fourchette ou tri de salaire
+CREATE INDEX IF NOT EXISTS idx_employes_statut_salaire_id ON employes_unified (statut, salaire, id);
+
+-- Statut + période ou tri d'embauche
+CREATE INDEX IF NOT EXISTS idx_employes_statut_embauche_id ON employes_unified (statut, date_embauche, id);
+
+-- Statut + tri alphabétique
+CREATE INDEX IF NOT EXISTS idx_employes_statut_nom_id ON employes_unified (statut, nom, id);
+
+-- Source (+ statut), tri par id
+CREATE INDEX IF NOT EXISTS idx_employes_source_statut_id ON employes_unified (source, statut, id);
+
+-- idx_statut est couvert par les index ci-dessus (préfixe statut)
+DROP INDEX IF EXISTS idx_statut;
+
+-- Carte de visibilité à jour : condition des parcours index-only
+VACUUM ANALYZE employes_unified;
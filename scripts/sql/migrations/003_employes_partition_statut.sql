@@ -0,0 +1,146 @@
+-- ========================================================================
+--    Migration 003 - Partitionnement de employes_unified par statut
+-- ========================================================================
+-- Les lignes inactives (soft delete) s'accumulent sans limite. Avec un
+-- partitionnement LIST sur statut :
+--   - employes_unified_actif   : statut = 'actif'
+--   - employes_unified_inactif : statut = 'inactif'
+-- les requêtes sur les actifs (vue employes_actifs, detect_deletions,
+-- validate_data, liste ?statut=actif, checksums) ne lisent que la partition
+-- active (élagage au plan). Un soft delete ou une réactivation
+-- (UPDATE ... SET statut) déplace la ligne d'une partition à l'autre, en
+-- gardant son id.
+--
+-- Contraintes :
+--   - clé primaire (id, statut) et unicité (email, statut) : une contrainte
+--     unique d'une table partitionnée doit contenir la clé de partition
+--   - unicité de l'email toutes partitions confondues : table de clés
+--     employes_unified_emails (clé primaire email) tenue par le trigger
+--     employes_unified_email_unique, même code d'erreur unique_violation que
+--     l'ancienne contrainte ; verrous de ligne seulement, quel que soit le
+--     nombre de lignes écrites par transaction (chargement parallèle)
+--   - index de liste sans la colonne statut (constante dans une partition)
+--
+-- Application sur une base existante (DAG en pause, table verrouillée pendant la copie) :
+--   docker exec -i postgres-target psql -v ON_ERROR_STOP=1 -U targetuser -d target_db < scripts/sql/migrations/003_employes_partition_statut.sql
+-- Mesures : python scripts/bench/bench_partition.py
+-- ========================================================================
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'employes_unified'::regclass) = 'p' THEN
+        RAISE EXCEPTION 'employes_unified est déjà partitionnée';
+    END IF;
+END $$;
+
+LOCK TABLE employes_unified IN ACCESS EXCLUSIVE MODE;
+
+-- Les vues référencent la table (et non son nom) : recréées plus bas
+DROP VIEW IF EXISTS employes_actifs;
+DROP VIEW IF EXISTS employes_inactifs;
+
+-- La séquence des id est conservée (sinon supprimée avec l'ancienne table)
+ALTER SEQUENCE employes_unified_id_seq OWNED BY NONE;
+ALTER TABLE employes_unified RENAME TO employes_unified_plain;
+
+CREATE TABLE employes_unified (
+    id INTEGER NOT NULL DEFAULT nextval('employes_unified_id_seq'),
+    source VARCHAR(20) NOT NULL,
+    source_id INTEGER,
+    nom VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL,
+    departement VARCHAR(50),
+    salaire DECIMAL(10,2),
+    date_embauche DATE,
+    statut VARCHAR(20) DEFAULT 'actif' NOT NULL CHECK (statut IN ('actif', 'inactif')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) PARTITION BY LIST (statut);
+
+CREATE TABLE employes_unified_actif PARTITION OF employes_unified FOR VALUES IN ('actif');
+CREATE TABLE employes_unified_inactif PARTITION OF employes_unified FOR VALUES IN ('inactif');
+
+INSERT INTO employes_unified
+    (id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at, updated_at)
+SELECT id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at, updated_at
+FROM employes_unified_plain;
+
+DROP TABLE employes_unified_plain;
+ALTER SEQUENCE employes_unified_id_seq OWNED BY employes_unified.id;
+
+-- Contraintes (créées après la suppression de l'ancienne table : mêmes noms d'index)
+ALTER TABLE employes_unified ADD CONSTRAINT employes_unified_pkey PRIMARY KEY (id, statut);
+ALTER TABLE employes_unified ADD CONSTRAINT employes_unified_email_statut_key UNIQUE (email, statut);
+
+-- Clés d'unicité de l'email : une ligne par employé, toutes partitions confondues
+CREATE TABLE employes_unified_emails (email VARCHAR(100) PRIMARY KEY);
+INSERT INTO employes_unified_emails (email) SELECT email FROM employes_unified;
+
+CREATE OR REPLACE FUNCTION employes_unified_email_unique() RETURNS trigger
+    LANGUAGE plpgsql AS
+$$
+BEGIN
+    -- Changement de statut : ligne déplacée (DELETE puis INSERT, triggers déclenchés sur chaque partition)
+    IF TG_OP = 'UPDATE' AND NEW.statut IS DISTINCT FROM OLD.statut THEN
+        RETURN NEW;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM employes_unified_emails WHERE email = OLD.email;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    -- Insertion concurrente d'un même email : attente de l'autre transaction (clé primaire),
+    -- sans sous-transaction par ligne
+    INSERT INTO employes_unified_emails (email) VALUES (NEW.email) ON CONFLICT DO NOTHING;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'duplicate key value violates unique constraint "employes_unified_email_key"'
+            USING ERRCODE = 'unique_violation',
+                  DETAIL = format('Key (email)=(%s) already exists.', NEW.email);
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER employes_unified_email_unique
+    BEFORE INSERT OR UPDATE OF email, statut OR DELETE ON employes_unified
+    FOR EACH ROW EXECUTE FUNCTION employes_unified_email_unique();
+
+-- Index (créés sur chaque partition) : statut n'est plus utile en tête
+CREATE INDEX idx_source ON employes_unified(source);
+CREATE INDEX idx_email_normalized ON employes_unified(LOWER(TRIM(email)));
+CREATE INDEX idx_employes_dept_id ON employes_unified (departement, id);
+CREATE INDEX idx_employes_salaire_id ON employes_unified (salaire, id);
+CREATE INDEX idx_employes_embauche_id ON employes_unified (date_embauche, id);
+CREATE INDEX idx_employes_nom_id ON employes_unified (nom, id);
+CREATE INDEX idx_employes_source_id ON employes_unified (source, id);
+CREATE INDEX idx_employes_search ON employes_unified
+    USING gist (search_normalize(nom || ' ' || email || ' ' || COALESCE(departement, '')) gist_trgm_ops);
+
+-- Archivage déjà en place (migration 004) : index des lots et trigger de réactivation
+DO $$
+BEGIN
+    IF to_regclass('employes_unified_archive') IS NOT NULL THEN
+        CREATE INDEX idx_employes_inactif_updated ON employes_unified (updated_at, id) WHERE statut = 'inactif';
+        CREATE TRIGGER employes_unified_unarchive
+            BEFORE INSERT ON employes_unified
+            FOR EACH ROW EXECUTE FUNCTION employes_unified_unarchive();
+    END IF;
+END $$;
+
+COMMENT ON COLUMN employes_unified.statut IS 'Statut de l''employé : actif (présent dans les sources) ou inactif (supprimé des sources) ; clé de partition';
+COMMENT ON COLUMN employes_unified.source IS 'Source de données : CSV, MySQL, ou PostgreSQL';
+COMMENT ON COLUMN employes_unified.source_id IS 'ID dans la base source';
+COMMENT ON COLUMN employes_unified.email IS 'Clé unique pour identifier un employé entre les sources (table employes_unified_emails, trigger employes_unified_email_unique)';
+
+CREATE OR REPLACE VIEW employes_actifs AS
+SELECT * FROM employes_unified WHERE statut = 'actif';
+
+CREATE OR REPLACE VIEW employes_inactifs AS
+SELECT * FROM employes_unified WHERE statut = 'inactif';
+
+COMMIT;
+
+ANALYZE employes_unified;
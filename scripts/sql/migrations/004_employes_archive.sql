@@ -0,0 +1,66 @@
+-- ========================================================================
+--    Migration 004 - Archivage des employés inactifs
+-- ========================================================================
+-- Les lignes passées 'inactif' par detect_deletions restent indéfiniment
+-- dans employes_unified. La tâche archive_inactive du DAG (ou
+-- scripts/archive_inactive.py) déplace par petits lots les lignes inactives
+-- depuis plus de archive_retention_days jours vers employes_unified_archive.
+--
+-- Réactivation transparente : un INSERT dans employes_unified dont l'email
+-- (normalisé) est archivé retire la ligne de l'archive et reprend son id et
+-- son created_at. Le DAG, la synchronisation ciblée et l'API n'insèrent que
+-- les emails absents de la table : aucun code à modifier.
+--
+-- Application sur une base existante :
+--   docker exec -i postgres-target psql -U targetuser -d target_db < scripts/sql/migrations/004_employes_archive.sql
+-- (inclus dans postgres-target-init.sql pour les nouvelles installations)
+-- ========================================================================
+
+CREATE TABLE IF NOT EXISTS employes_unified_archive (
+    id INTEGER PRIMARY KEY,
+    source VARCHAR(20) NOT NULL,
+    source_id INTEGER,
+    nom VARCHAR(100) NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    departement VARCHAR(50),
+    salaire DECIMAL(10,2),
+    date_embauche DATE,
+    statut VARCHAR(20) DEFAULT 'inactif' NOT NULL,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+COMMENT ON TABLE employes_unified_archive IS 'Employés inactifs archivés (mêmes colonnes et id que employes_unified) ; GET /api/employes?archived=only|include';
+COMMENT ON COLUMN employes_unified_archive.updated_at IS 'Dernière mise à jour avant archivage (passage à inactif)';
+
+-- Réactivation : recherche par email normalisé
+CREATE INDEX IF NOT EXISTS idx_archive_email_normalized ON employes_unified_archive (LOWER(TRIM(email)));
+
+-- Sélection des lots à archiver : inactifs les plus anciens d'abord
+CREATE INDEX IF NOT EXISTS idx_employes_inactif_updated ON employes_unified (updated_at, id) WHERE statut = 'inactif';
+
+CREATE OR REPLACE FUNCTION employes_unified_unarchive() RETURNS trigger
+    LANGUAGE plpgsql AS
+$$
+DECLARE
+    archived employes_unified_archive%ROWTYPE;
+BEGIN
+    -- Variantes de casse/espaces d'un même email : la plus récemment archivée
+    DELETE FROM employes_unified_archive
+    WHERE id = (SELECT id FROM employes_unified_archive
+                WHERE LOWER(TRIM(email)) = LOWER(TRIM(NEW.email))
+                ORDER BY archived_at DESC LIMIT 1)
+    RETURNING * INTO archived;
+    IF FOUND THEN
+        NEW.id := archived.id;
+        NEW.created_at := archived.created_at;
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS employes_unified_unarchive ON employes_unified;
+CREATE TRIGGER employes_unified_unarchive
+    BEFORE INSERT ON employes_unified
+    FOR EACH ROW EXECUTE FUNCTION employes_unified_unarchive();
@@ -0,0 +1,126 @@
+-- ========================================================================
+--    Migration 005 - Historique temporel des employés
+-- ========================================================================
+-- employes_history garde une version par état successif d'un employé,
+-- valable sur l'intervalle valid_during (tsrange [début, fin), fin vide pour
+-- la version courante). Les versions ne sont jamais supprimées : un
+-- changement ferme la version ouverte et en ajoute une nouvelle.
+--
+-- Maintenance ensembliste : employes_history_sync(ids, emails) compare les
+-- lignes courantes (employes_unified et archive) aux versions ouvertes et
+-- n'écrit que les différences, en une requête. Appelée dans la transaction
+-- des écritures : chargement du DAG (load_to_target, detect_deletions),
+-- synchronisation ciblée et routes PUT/POST/DELETE de la base unifiée.
+--
+-- Index :
+--   - exclusion GiST (employe_id, valid_during) : pas de chevauchement de
+--     versions d'un même employé (extension btree_gist)
+--   - GiST valid_during : GET /api/employes?as_of=... (valid_during @> instant)
+--   - partiel employe_id des versions ouvertes : maintenance
+--
+-- Application sur une base existante (après la migration 004) :
+--   docker exec -i postgres-target psql -v ON_ERROR_STOP=1 -U targetuser -d target_db < scripts/sql/migrations/005_employes_history.sql
+-- (inclus dans postgres-target-init.sql pour les nouvelles installations)
+-- ========================================================================
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE TABLE IF NOT EXISTS employes_history (
+    id BIGSERIAL PRIMARY KEY,
+    employe_id INTEGER NOT NULL,
+    source VARCHAR(20) NOT NULL,
+    source_id INTEGER,
+    nom VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL,
+    departement VARCHAR(50),
+    salaire DECIMAL(10,2),
+    date_embauche DATE,
+    statut VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP,
+    valid_during TSRANGE NOT NULL,
+    -- Vérifiée en fin d'instruction : fermeture et ouverture dans la même requête
+    CONSTRAINT employes_history_no_overlap
+        EXCLUDE USING gist (employe_id WITH =, valid_during WITH &&) DEFERRABLE INITIALLY IMMEDIATE
+);
+
+COMMENT ON TABLE employes_history IS 'Versions successives des employés (ajout seul) ; GET /api/employes?as_of=...';
+COMMENT ON COLUMN employes_history.valid_during IS 'Intervalle de validité [début, fin) ; fin vide : version courante';
+
+CREATE INDEX IF NOT EXISTS idx_employes_history_valid ON employes_history USING gist (valid_during);
+CREATE INDEX IF NOT EXISTS idx_employes_history_open ON employes_history (employe_id) WHERE upper_inf(valid_during);
+
+CREATE OR REPLACE FUNCTION employes_history_sync(ids INTEGER[] DEFAULT NULL, emails TEXT[] DEFAULT NULL)
+    RETURNS INTEGER
+    LANGUAGE plpgsql AS
+$$
+DECLARE
+    scope INTEGER[];
+    changed INTEGER;
+BEGIN
+    IF ids IS NULL AND emails IS NULL THEN
+        -- Réconciliation complète (remplissage initial)
+        SELECT array_agg(id) INTO scope FROM (
+            SELECT id FROM employes_unified
+            UNION SELECT id FROM employes_unified_archive
+            UNION SELECT employe_id FROM employes_history WHERE upper_inf(valid_during)
+        ) s;
+    ELSE
+        -- Emails normalisés comme la comparaison du DAG : index idx_email_normalized
+        emails := ARRAY(SELECT DISTINCT LOWER(TRIM(e)) FROM unnest(emails) e);
+        SELECT array_agg(id) INTO scope FROM (
+            SELECT id FROM employes_unified WHERE id = ANY(ids) OR LOWER(TRIM(email)) = ANY(emails)
+            UNION SELECT id FROM employes_unified_archive WHERE id = ANY(ids) OR LOWER(TRIM(email)) = ANY(emails)
+            UNION SELECT employe_id FROM employes_history WHERE upper_inf(valid_during) AND employe_id = ANY(ids)
+        ) s;
+        -- Écritures concurrentes d'un même employé sérialisées (verrous de ligne, sans table de verrous)
+        PERFORM 1 FROM employes_unified WHERE id = ANY(scope) ORDER BY id FOR UPDATE;
+        PERFORM 1 FROM employes_unified_archive WHERE id = ANY(scope) ORDER BY id FOR UPDATE;
+    END IF;
+
+    IF scope IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    WITH current AS (
+        SELECT id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at, updated_at
+        FROM employes_unified WHERE id = ANY(scope)
+        UNION ALL
+        SELECT id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at, updated_at
+        FROM employes_unified_archive WHERE id = ANY(scope)
+    ), opened AS (
+        SELECT * FROM employes_history WHERE upper_inf(valid_during) AND employe_id = ANY(scope)
+    ), changes AS (
+        -- Nouvelle ligne, ligne supprimée, ou colonne historisée modifiée
+        SELECT c.*, o.id AS history_id,
+               GREATEST(COALESCE(c.updated_at, LOCALTIMESTAMP), lower(o.valid_during)) AS changed_at
+        FROM current c
+        FULL JOIN opened o ON o.employe_id = c.id
+        WHERE o.id IS NULL OR c.id IS NULL
+           OR (c.source, c.source_id, c.nom, c.email, c.departement, c.salaire, c.date_embauche, c.statut)
+              IS DISTINCT FROM
+              (o.source, o.source_id, o.nom, o.email, o.departement, o.salaire, o.date_embauche, o.statut)
+    ), closed AS (
+        UPDATE employes_history h
+        SET valid_during = tsrange(lower(h.valid_during), ch.changed_at)
+        FROM changes ch
+        WHERE h.id = ch.history_id
+    ), inserted AS (
+        INSERT INTO employes_history
+            (employe_id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at,
+             valid_during)
+        SELECT id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at,
+               tsrange(changed_at, NULL)
+        FROM changes
+        WHERE id IS NOT NULL
+    )
+    SELECT COUNT(*) INTO changed FROM changes;
+
+    RETURN changed;
+END
+$$;
+
+COMMENT ON FUNCTION employes_history_sync(INTEGER[], TEXT[]) IS
+    'Historise les employés donnés (id ou email), tous si aucun argument ; retourne le nombre de changements';
+
+-- Remplissage initial : une version ouverte par employé, depuis sa dernière mise à jour
+SELECT employes_history_sync();
@@ -9,7 +9,9 @@ CREATE TABLE IF NOT EXISTS employes_mysql (
     departement VARCHAR(50),
     salaire DECIMAL(10,2),
     date_embauche DATE,
-    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    -- Recherche par email normalisé (synchronisation ciblée de l'API, même clé que le DAG)
+    INDEX idx_email_normalized ((LOWER(TRIM(email))))
 );
 
 -- Insertion des employés
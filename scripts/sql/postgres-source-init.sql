@@ -9,6 +9,22 @@ CREATE TABLE IF NOT EXISTS employes_source (
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- last_updated avancé à chaque UPDATE qui ne le positionne pas (équivalent du ON UPDATE de MySQL) :
+-- l'empreinte COUNT(*) / MAX(last_updated) du DAG détecte ainsi toute modification
+CREATE OR REPLACE FUNCTION employes_source_touch() RETURNS trigger AS $$
+BEGIN
+    IF NEW.last_updated IS NOT DISTINCT FROM OLD.last_updated THEN
+        NEW.last_updated := CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS employes_source_touch ON employes_source;
+CREATE TRIGGER employes_source_touch
+    BEFORE UPDATE ON employes_source
+    FOR EACH ROW EXECUTE FUNCTION employes_source_touch();
+
 -- Insertion des employés
 INSERT INTO employes_source (nom, email, departement, salaire, date_embauche) VALUES
 ('Béatrice Zoungrana', 'beatrice.zoungrana@entreprise.bf', 'Qualité', 740000, '2019-03-20'),
@@ -29,8 +29,173 @@ COMMENT ON COLUMN employes_unified.email IS 'Clé unique pour identifier un empl
 -- Index pour améliorer les performances
 CREATE INDEX IF NOT EXISTS idx_email ON employes_unified(email);
 CREATE INDEX IF NOT EXISTS idx_source ON employes_unified(source);
-CREATE INDEX IF NOT EXISTS idx_statut ON employes_unified(statut);
 CREATE INDEX IF NOT EXISTS idx_email_statut ON employes_unified(email, statut);
+-- Liste filtrée et triée (GET /api/employes) : voir scripts/sql/migrations/002_employes_list_indexes.sql
+CREATE INDEX IF NOT EXISTS idx_employes_statut_dept_id ON employes_unified (statut, departement, id);
+CREATE INDEX IF NOT EXISTS idx_employes_statut_salaire_id ON employes_unified (statut, salaire, id);
+CREATE INDEX IF NOT EXISTS idx_employes_statut_embauche_id ON employes_unified (statut, date_embauche, id);
+CREATE INDEX IF NOT EXISTS idx_employes_statut_nom_id ON employes_unified (statut, nom, id);
+CREATE INDEX IF NOT EXISTS idx_employes_source_statut_id ON employes_unified (source, statut, id);
+-- Recherche sur l'email normalisé (synchronisation ciblée de l'API)
+CREATE INDEX IF NOT EXISTS idx_email_normalized ON employes_unified(LOWER(TRIM(email)));
+
+-- Recherche approximative (GET /api/employes/search) : voir scripts/sql/migrations/001_employes_search.sql
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+CREATE OR REPLACE FUNCTION search_normalize(value TEXT) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+$$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, value)) $$;
+
+CREATE INDEX IF NOT EXISTS idx_employes_search ON employes_unified
+    USING gist (search_normalize(nom || ' ' || email || ' ' || COALESCE(departement, '')) gist_trgm_ops);
+
+-- Archive des inactifs (tâche archive_inactive du DAG) : voir scripts/sql/migrations/004_employes_archive.sql
+CREATE TABLE IF NOT EXISTS employes_unified_archive (
+    id INTEGER PRIMARY KEY,
+    source VARCHAR(20) NOT NULL,
+    source_id INTEGER,
+    nom VARCHAR(100) NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    departement VARCHAR(50),
+    salaire DECIMAL(10,2),
+    date_embauche DATE,
+    statut VARCHAR(20) DEFAULT 'inactif' NOT NULL,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+COMMENT ON TABLE employes_unified_archive IS 'Employés inactifs archivés (mêmes colonnes et id que employes_unified) ; GET /api/employes?archived=only|include';
+COMMENT ON COLUMN employes_unified_archive.updated_at IS 'Dernière mise à jour avant archivage (passage à inactif)';
+
+CREATE INDEX IF NOT EXISTS idx_archive_email_normalized ON employes_unified_archive (LOWER(TRIM(email)));
+CREATE INDEX IF NOT EXISTS idx_employes_inactif_updated ON employes_unified (updated_at, id) WHERE statut = 'inactif';
+
+-- Réactivation transparente : un email archivé réinséré reprend son id et son created_at
+CREATE OR REPLACE FUNCTION employes_unified_unarchive() RETURNS trigger
+    LANGUAGE plpgsql AS
+$$
+DECLARE
+    archived employes_unified_archive%ROWTYPE;
+BEGIN
+    DELETE FROM employes_unified_archive
+    WHERE id = (SELECT id FROM employes_unified_archive
+                WHERE LOWER(TRIM(email)) = LOWER(TRIM(NEW.email))
+                ORDER BY archived_at DESC LIMIT 1)
+    RETURNING * INTO archived;
+    IF FOUND THEN
+        NEW.id := archived.id;
+        NEW.created_at := archived.created_at;
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS employes_unified_unarchive ON employes_unified;
+CREATE TRIGGER employes_unified_unarchive
+    BEFORE INSERT ON employes_unified
+    FOR EACH ROW EXECUTE FUNCTION employes_unified_unarchive();
+
+-- Historique temporel (GET /api/employes?as_of=...) : voir scripts/sql/migrations/005_employes_history.sql
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE TABLE IF NOT EXISTS employes_history (
+    id BIGSERIAL PRIMARY KEY,
+    employe_id INTEGER NOT NULL,
+    source VARCHAR(20) NOT NULL,
+    source_id INTEGER,
+    nom VARCHAR(100) NOT NULL,
+    email VARCHAR(100) NOT NULL,
+    departement VARCHAR(50),
+    salaire DECIMAL(10,2),
+    date_embauche DATE,
+    statut VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP,
+    valid_during TSRANGE NOT NULL,
+    -- Vérifiée en fin d'instruction : fermeture et ouverture dans la même requête
+    CONSTRAINT employes_history_no_overlap
+        EXCLUDE USING gist (employe_id WITH =, valid_during WITH &&) DEFERRABLE INITIALLY IMMEDIATE
+);
+
+COMMENT ON TABLE employes_history IS 'Versions successives des employés (ajout seul) ; GET /api/employes?as_of=...';
+COMMENT ON COLUMN employes_history.valid_during IS 'Intervalle de validité [début, fin) ; fin vide : version courante';
+
+CREATE INDEX IF NOT EXISTS idx_employes_history_valid ON employes_history USING gist (valid_during);
+CREATE INDEX IF NOT EXISTS idx_employes_history_open ON employes_history (employe_id) WHERE upper_inf(valid_during);
+
+CREATE OR REPLACE FUNCTION employes_history_sync(ids INTEGER[] DEFAULT NULL, emails TEXT[] DEFAULT NULL)
+    RETURNS INTEGER
+    LANGUAGE plpgsql AS
+$$
+DECLARE
+    scope INTEGER[];
+    changed INTEGER;
+BEGIN
+    IF ids IS NULL AND emails IS NULL THEN
+        -- Réconciliation complète (remplissage initial)
+        SELECT array_agg(id) INTO scope FROM (
+            SELECT id FROM employes_unified
+            UNION SELECT id FROM employes_unified_archive
+            UNION SELECT employe_id FROM employes_history WHERE upper_inf(valid_during)
+        ) s;
+    ELSE
+        -- Emails normalisés comme la comparaison du DAG : index idx_email_normalized
+        emails := ARRAY(SELECT DISTINCT LOWER(TRIM(e)) FROM unnest(emails) e);
+        SELECT array_agg(id) INTO scope FROM (
+            SELECT id FROM employes_unified WHERE id = ANY(ids) OR LOWER(TRIM(email)) = ANY(emails)
+            UNION SELECT id FROM employes_unified_archive WHERE id = ANY(ids) OR LOWER(TRIM(email)) = ANY(emails)
+            UNION SELECT employe_id FROM employes_history WHERE upper_inf(valid_during) AND employe_id = ANY(ids)
+        ) s;
+        -- Écritures concurrentes d'un même employé sérialisées (verrous de ligne, sans table de verrous)
+        PERFORM 1 FROM employes_unified WHERE id = ANY(scope) ORDER BY id FOR UPDATE;
+        PERFORM 1 FROM employes_unified_archive WHERE id = ANY(scope) ORDER BY id FOR UPDATE;
+    END IF;
+
+    IF scope IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    WITH current AS (
+        SELECT id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at, updated_at
+        FROM employes_unified WHERE id = ANY(scope)
+        UNION ALL
+        SELECT id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at, updated_at
+        FROM employes_unified_archive WHERE id = ANY(scope)
+    ), opened AS (
+        SELECT * FROM employes_history WHERE upper_inf(valid_during) AND employe_id = ANY(scope)
+    ), changes AS (
+        -- Nouvelle ligne, ligne supprimée, ou colonne historisée modifiée
+        SELECT c.*, o.id AS history_id,
+               GREATEST(COALESCE(c.updated_at, LOCALTIMESTAMP), lower(o.valid_during)) AS changed_at
+        FROM current c
+        FULL JOIN opened o ON o.employe_id = c.id
+        WHERE o.id IS NULL OR c.id IS NULL
+           OR (c.source, c.source_id, c.nom, c.email, c.departement, c.salaire, c.date_embauche, c.statut)
+              IS DISTINCT FROM
+              (o.source, o.source_id, o.nom, o.email, o.departement, o.salaire, o.date_embauche, o.statut)
+    ), closed AS (
+        UPDATE employes_history h
+        SET valid_during = tsrange(lower(h.valid_during), ch.changed_at)
+        FROM changes ch
+        WHERE h.id = ch.history_id
+    ), inserted AS (
+        INSERT INTO employes_history
+            (employe_id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at,
+             valid_during)
+        SELECT id, source, source_id, nom, email, departement, salaire, date_embauche, statut, created_at,
+               tsrange(changed_at, NULL)
+        FROM changes
+        WHERE id IS NOT NULL
+    )
+    SELECT COUNT(*) INTO changed FROM changes;
+
+    RETURN changed;
+END
+$$;
+
+COMMENT ON FUNCTION employes_history_sync(INTEGER[], TEXT[]) IS
+    'Historise les employés donnés (id ou email), tous si aucun argument ; retourne le nombre de changements';
 
 -- Table de logs ETL
 CREATE TABLE IF NOT EXISTS etl_log (
@@ -42,14 +207,72 @@ CREATE TABLE IF NOT EXISTS etl_log (
     records_inserted INTEGER,
     records_updated INTEGER,
     records_soft_deleted INTEGER,
+    bytes_moved BIGINT,
+    peak_memory_kb BIGINT,
+    duration_ms INTEGER,
     start_time TIMESTAMP,
     end_time TIMESTAMP,
     error_message TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Colonnes de performance (mise à niveau des bases déjà initialisées)
+ALTER TABLE etl_log ADD COLUMN IF NOT EXISTS bytes_moved BIGINT;
+ALTER TABLE etl_log ADD COLUMN IF NOT EXISTS peak_memory_kb BIGINT;
+ALTER TABLE etl_log ADD COLUMN IF NOT EXISTS duration_ms INTEGER;
+
 -- Commentaire sur la nouvelle colonne
 COMMENT ON COLUMN etl_log.records_soft_deleted IS 'Nombre d''employés marqués comme inactifs lors de cette exécution';
+COMMENT ON COLUMN etl_log.bytes_moved IS 'Volume de données XCom lues et écrites par la tâche (octets)';
+COMMENT ON COLUMN etl_log.peak_memory_kb IS 'Pic de mémoire résidente du processus de la tâche (Ko)';
+COMMENT ON COLUMN etl_log.duration_ms IS 'Durée d''exécution de la tâche (millisecondes)';
+
+-- Index pour les tendances de performance par exécution et par étape
+CREATE INDEX IF NOT EXISTS idx_etl_log_run ON etl_log(dag_run_id);
+CREATE INDEX IF NOT EXISTS idx_etl_log_task_start ON etl_log(task_name, start_time);
+
+-- Positions des changelogs sources déjà appliquées (mode 'cdc' du DAG)
+CREATE TABLE IF NOT EXISTS etl_cdc_offsets (
+    source VARCHAR(20) PRIMARY KEY,
+    last_seq BIGINT NOT NULL DEFAULT 0,
+    dag_run_id VARCHAR(250),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE etl_cdc_offsets IS 'Dernière séquence de changelog appliquée à employes_unified, par source';
+
+-- Empreintes des sources au dernier run réussi (court-circuit du DAG si rien n'a changé)
+CREATE TABLE IF NOT EXISTS etl_fingerprints (
+    source VARCHAR(20) PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    dag_run_id VARCHAR(250),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE etl_fingerprints IS 'CSV : taille et SHA-256 ; bases : COUNT(*) et MAX(last_updated) ; config : priorité de fusion';
+
+-- Mode checksum : empreintes par bucket de chaque source et de ses lignes cible au dernier chargement réussi
+CREATE TABLE IF NOT EXISTS etl_bucket_checksums (
+    source VARCHAR(20) PRIMARY KEY,
+    bucket_count INTEGER NOT NULL,
+    merge_priority TEXT NOT NULL,
+    source_checksums TEXT NOT NULL,
+    target_checksums TEXT NOT NULL,
+    dag_run_id VARCHAR(250),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE etl_bucket_checksums IS 'Listes JSON de triplets [bucket, nombre de lignes, somme des hash] ; référence du run checksum suivant';
+
+-- Réglages du dernier chargement relus par l'API (synchronisation ciblée : même priorité de fusion que le DAG)
+CREATE TABLE IF NOT EXISTS etl_settings (
+    name VARCHAR(50) PRIMARY KEY,
+    value TEXT NOT NULL,
+    dag_run_id VARCHAR(250),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE etl_settings IS 'merge_priority : liste JSON des sources, de la plus prioritaire à la moins prioritaire';
 
 -- Vue pour faciliter les requêtes sur les employés actifs
 CREATE OR REPLACE VIEW employes_actifs AS
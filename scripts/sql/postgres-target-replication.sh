@@ -0,0 +1,9 @@
+#!/bin/bash
+# PostgreSQL Target - Autorise les connexions de réplication (conteneur postgres-target-replica, profil 'replica')
+# Exécuté au premier démarrage du conteneur (docker-entrypoint-initdb.d).
+# Base existante :
+#   docker exec postgres-target bash -c 'echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"'
+#   docker exec postgres-target psql -U targetuser -d target_db -c "SELECT pg_reload_conf()"
+set -e
+
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"